@@ -0,0 +1,137 @@
+"""
+Particle simulation scaling benchmark (no rendering, no ffmpeg).
+
+Times the per-frame simulation work (positions, connection pass, keyword
+anchor lookup) for increasing particle counts, with the cell-grid neighbour
+index and, up to --max-all-pairs, the O(n^2) all-pairs reference. Fields
+are built like the renderer builds them for --profile; the default counts
+start at the count that profile renders with (GP_PARTICLE_COUNT applies).
+
+Example:
+  python -m geopilot_publisher.bench.particles --counts 64,256,1000,2500,5000
+  GP_PARTICLE_COUNT=2500 python -m geopilot_publisher.bench.particles --profile preview
+"""
+import argparse
+import json
+import time
+from random import Random
+
+from geopilot_publisher.models.render_profile import get_render_profile, particle_count
+from geopilot_publisher.utils.particles import (
+    CellGrid,
+    ParticleField,
+    all_pairs_connections,
+)
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+    p.add_argument("--profile", default=None, help="render profile (default GP_RENDER_PROFILE)")
+    p.add_argument(
+        "--counts",
+        default=None,
+        help="comma-separated particle counts (default: the profile's, 256, 1000, 2500, 5000)",
+    )
+    p.add_argument("--size", default=None, help="WIDTHxHEIGHT (default: the profile's)")
+    p.add_argument("--connect-dist", type=float, default=None)
+    p.add_argument("--frames", type=int, default=30)
+    p.add_argument("--anchors", type=int, default=10, help="keyword anchor lookups per frame")
+    p.add_argument("--max-all-pairs", type=int, default=2500)
+    p.add_argument("--json", action="store_true", help="print one JSON record per count")
+    return p.parse_args()
+
+
+def make_field(count: int, width: int, height: int, scale: float, motion: float) -> ParticleField:
+    # Same ranges as render_video.prepare_render.
+    return ParticleField.random(
+        count,
+        width,
+        height,
+        speed=(0.12 * motion, 0.35 * motion),
+        radius=(2.1 * scale, 3.1 * scale),
+    )
+
+
+def bench_count(
+    count: int,
+    width: int,
+    height: int,
+    connect_dist: float,
+    frames: int,
+    anchors: int,
+    all_pairs: bool,
+    scale: float = 1.0,
+    motion: float = 1.0,
+) -> dict:
+    field = make_field(count, width, height, scale, motion)
+    rng = Random(7)
+    points = [(rng.uniform(0, width), rng.uniform(0, height)) for _ in range(anchors)]
+
+    grid_s = 0.0
+    brute_s = 0.0
+    edges = 0
+    for idx in range(frames):
+        positions = field.positions(idx)
+        t0 = time.perf_counter()
+        grid = CellGrid(positions, connect_dist)
+        edge_i, _, _ = field.connections(positions, connect_dist, 170, grid=grid)
+        field.nearest(positions, points, grid=grid)
+        grid_s += time.perf_counter() - t0
+        edges += len(edge_i)
+
+        if all_pairs:
+            t0 = time.perf_counter()
+            all_pairs_connections(positions, connect_dist, 170)
+            ParticleField.nearest(positions, points)
+            brute_s += time.perf_counter() - t0
+
+    return {
+        "particles": count,
+        "size": f"{width}x{height}",
+        "connect_dist": connect_dist,
+        "frames": frames,
+        "edges_per_frame": edges / frames,
+        "grid_ms_per_frame": grid_s * 1000 / frames,
+        "all_pairs_ms_per_frame": brute_s * 1000 / frames if all_pairs else None,
+    }
+
+
+def main():
+    args = parse_args()
+    profile = get_render_profile(args.profile)
+    if args.size:
+        width, height = (int(v) for v in args.size.lower().split("x"))
+    else:
+        width, height = profile.width, profile.height
+    connect_dist = args.connect_dist if args.connect_dist is not None else 205.0 * profile.scale
+    if args.counts:
+        counts = [int(c) for c in args.counts.split(",") if c.strip()]
+    else:
+        counts = sorted({particle_count(profile), 256, 1000, 2500, 5000})
+
+    if not args.json:
+        print(f"{'particles':>10} {'edges/frame':>12} {'grid ms':>10} {'all-pairs ms':>13}")
+    for count in counts:
+        row = bench_count(
+            count,
+            width,
+            height,
+            connect_dist,
+            args.frames,
+            args.anchors,
+            all_pairs=count <= args.max_all_pairs,
+            scale=profile.scale,
+            motion=profile.motion,
+        )
+        if args.json:
+            print(json.dumps(row))
+            continue
+        brute = row["all_pairs_ms_per_frame"]
+        print(
+            f"{count:>10} {row['edges_per_frame']:>12.0f} {row['grid_ms_per_frame']:>10.2f} "
+            f"{(f'{brute:.2f}' if brute is not None else '-'):>13}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Render micro-benchmark: frames/sec, per-phase timings and golden-frame hashes.
+
+Renders a fixed script and keyword set for a synthetic duration in-process
+(no OpenAI, no audio, no ffmpeg) and prints one JSON document, so numbers
+can be tracked across commits. SHA-256 hashes of selected frames guard
+performance refactors against visual regressions: save a run with --out
+and compare later runs against it with --check.
+
+Example:
+  python -m geopilot_publisher.bench.render --seconds 5 --out bench_render.json
+  python -m geopilot_publisher.bench.render --seconds 5 --check bench_render.json
+"""
+import argparse
+import hashlib
+import json
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from geopilot_publisher.models.render_profile import get_render_profile
+from geopilot_publisher.stages import render_video
+
+BENCH_SCRIPT = (
+    "More data does not automatically mean better decisions.\n\n"
+    "Models learn patterns from historical information.\n"
+    "If those patterns reflect imbalances, more of the same data reinforces them.\n\n"
+    "Bias is often about how the data was produced, not how much of it exists."
+)
+BENCH_KEYWORDS = [
+    "DATA BIAS",
+    "TRAINING SIGNALS",
+    "HISTORICAL PATTERNS",
+    "MODEL CONFIDENCE",
+    "CONTEXT DEPENDENCE",
+    "FAIRNESS LIMITS",
+    "SYSTEM DESIGN",
+    "HUMAN OVERSIGHT",
+]
+PHASES = (
+    "connections",
+    "points",
+    "glow",
+    "keyword_update",
+    "keyword_draw",
+    "frame_output",
+)
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+    p.add_argument("--profile", default="final")
+    p.add_argument("--seconds", type=float, default=5.0)
+    p.add_argument(
+        "--hash-frames",
+        default="0,mid,last",
+        help="comma-separated frame indices to hash; 'mid' and 'last' are allowed",
+    )
+    p.add_argument("--out", default=None, help="also write the JSON result here")
+    p.add_argument("--check", default=None, help="compare frame hashes with a saved result")
+    return p.parse_args()
+
+
+def run_benchmark(profile_name: str, seconds: float, hash_frames: str) -> dict:
+    profile = get_render_profile(profile_name)
+
+    t0 = time.perf_counter()
+    scene = render_video._build_scene(BENCH_SCRIPT, seconds, profile, keywords=BENCH_KEYWORDS)
+    scene_s = time.perf_counter() - t0
+
+    total = scene.total_frames
+    wanted = _resolve_frames(hash_frames, total)
+    timings: dict[str, float] = {}
+    hashes: dict[str, str] = {}
+
+    t0 = time.perf_counter()
+    for idx in range(total):
+        frame = render_video._render_frame(scene, idx, timings)
+        t_out = time.perf_counter()
+        data = frame.tobytes()
+        timings["frame_output"] = timings.get("frame_output", 0.0) + time.perf_counter() - t_out
+        if idx in wanted:
+            hashes[str(idx)] = hashlib.sha256(data).hexdigest()
+    render_s = time.perf_counter() - t0
+
+    phases = {}
+    for name in PHASES:
+        spent = timings.get(name, 0.0)
+        phases[name] = {
+            "total_s": round(spent, 6),
+            "ms_per_frame": round(spent * 1000 / total, 4),
+            "share": round(spent / render_s, 4) if render_s else 0.0,
+        }
+
+    return {
+        "benchmark": "render",
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "profile": profile.name,
+        "width": scene.width,
+        "height": scene.height,
+        "fps": scene.fps,
+        "frames": total,
+        "scene_build_s": round(scene_s, 6),
+        "render_s": round(render_s, 6),
+        "frames_per_s": round(total / render_s, 3) if render_s else None,
+        "phases": phases,
+        "frame_hashes": hashes,
+    }
+
+
+def _resolve_frames(spec: str, total: int) -> set[int]:
+    frames = set()
+    for item in spec.split(","):
+        item = item.strip().lower()
+        if not item:
+            continue
+        if item == "mid":
+            frames.add(total // 2)
+        elif item == "last":
+            frames.add(total - 1)
+        else:
+            frames.add(int(item))
+    return {idx for idx in frames if 0 <= idx < total}
+
+
+def _git_commit() -> str | None:
+    try:
+        p = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+    except OSError:
+        return None
+    if p.returncode != 0:
+        return None
+    return p.stdout.decode("utf-8").strip() or None
+
+
+def _compare_hashes(result: dict, golden_path: str) -> list[str]:
+    golden = json.loads(Path(golden_path).read_text(encoding="utf-8"))
+    problems = []
+    for key in ("profile", "width", "height", "fps", "frames"):
+        if golden.get(key) != result.get(key):
+            problems.append(f"{key}: expected {golden.get(key)!r}, got {result.get(key)!r}")
+    for idx, expected in golden.get("frame_hashes", {}).items():
+        actual = result["frame_hashes"].get(idx)
+        if actual != expected:
+            problems.append(f"frame {idx}: expected {expected[:16]}, got {str(actual)[:16]}")
+    return problems
+
+
+def main():
+    args = parse_args()
+    result = run_benchmark(args.profile, args.seconds, args.hash_frames)
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    if args.check:
+        problems = _compare_hashes(result, args.check)
+        if problems:
+            print("[bench] golden frame mismatch:\n  " + "\n  ".join(problems), file=sys.stderr)
+            sys.exit(1)
+        print(f"[bench] frame hashes match {args.check}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Named render profiles (output size, frame rate, encoder speed).
+
+The renderer's visual constants are tuned for the `final` 1080x1920 @ 30 fps
+output. Other profiles scale all geometry by `scale` and per-frame motion by
+`motion`, so a draft is a faithful miniature of the final video rather than
+a crop or a sped-up cut.
+
+`particle_count` sizes the network background. The cell-grid connection
+pass keeps thousands of particles cheap; GP_PARTICLE_COUNT overrides the
+profile's count for any render.
+"""
+import os
+from dataclasses import dataclass
+
+
+REFERENCE_WIDTH = 1080
+REFERENCE_FPS = 30
+
+
+@dataclass(frozen=True)
+class RenderProfile:
+    name: str
+    width: int
+    height: int
+    fps: int
+    x264_preset: str
+    particle_count: int = 64
+
+    @property
+    def scale(self) -> float:
+        """Geometry scale relative to the 1080 px wide reference layout."""
+        return self.width / REFERENCE_WIDTH
+
+    @property
+    def motion(self) -> float:
+        """Per-frame displacement scale: same on-screen speed in px/second."""
+        return self.scale * REFERENCE_FPS / self.fps
+
+
+PROFILES = {
+    "final": RenderProfile("final", 1080, 1920, 30, "medium"),
+    "preview": RenderProfile("preview", 540, 960, 24, "veryfast"),
+    "draft": RenderProfile("draft", 360, 640, 12, "ultrafast"),
+}
+
+
+def particle_count(profile: RenderProfile) -> int:
+    """Particles to simulate for `profile`; GP_PARTICLE_COUNT overrides it."""
+    raw = os.getenv("GP_PARTICLE_COUNT", "").strip()
+    if not raw:
+        return profile.particle_count
+    try:
+        count = int(raw)
+    except ValueError:
+        raise RuntimeError(f"GP_PARTICLE_COUNT must be an integer, got: {raw!r}") from None
+    if count < 1:
+        raise RuntimeError(f"GP_PARTICLE_COUNT must be at least 1, got: {count}")
+    return count
+
+
+def get_render_profile(name: str | None = None) -> RenderProfile:
+    """Resolve a profile by name, falling back to GP_RENDER_PROFILE, then `final`."""
+    name = (name or os.getenv("GP_RENDER_PROFILE") or "final").strip().lower()
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise RuntimeError(
+            f"Unknown render profile: {name!r} (choose from: {', '.join(PROFILES)})"
+        ) from None
@@ -0,0 +1,287 @@
+"""
+Batch runner: many videos per process from a JSONL manifest.
+
+Each manifest line is one item:
+
+  {"id": "gps-timing", "script": "...", "keywords": ["GPS", "Timing"],
+   "publish": false, "profile": "final", "captions": true}
+
+Only `script` or nothing is needed: items without a script get an idea and
+script from the LLM. Stages run with bounded concurrency per kind of work:
+up to GP_BATCH_LLM_CONCURRENCY LLM/TTS calls in flight (default 4) on one
+asyncio loop sharing the pooled AsyncOpenAI client, renders one
+at a time on the renderer's process pool (GP_RENDER_WORKERS, default: all
+cores) and uploads on GP_BATCH_UPLOAD_CONCURRENCY threads (default 2) through
+the quota-aware upload scheduler (pipeline/uploads.py). Items the day's
+YouTube quota cannot cover are recorded as "deferred", not failed.
+Because everything runs in one process, fonts, background plates, sprites,
+cached audio/particle layers and API clients stay warm across items.
+
+Each item writes its artifacts under artifacts/batch/<id>/ together with a
+result.json record; all records are also appended to
+artifacts/batch/results.jsonl. A failing item is recorded and skipped, it
+does not stop the batch. Per-item stage spans, API calls, ffmpeg runs and
+upload chunks are traced to artifacts/trace.jsonl (utils.logging).
+"""
+import asyncio
+import contextlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import as_completed
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from geopilot_publisher.models.render_profile import get_render_profile
+from geopilot_publisher.pipeline.uploads import UploadScheduler
+from geopilot_publisher.services.openai_client import aclose_async_clients
+from geopilot_publisher.services.response_cache import print_cache_report
+from geopilot_publisher.stages.generate_ideas import generate_ideas_async
+from geopilot_publisher.stages.generate_script import generate_script_async
+from geopilot_publisher.stages.render_video import render_video
+from geopilot_publisher.stages.tts import synthesize_voice_async
+from geopilot_publisher.utils.logging import export_chrome_trace, print_trace_summary, span
+
+
+@dataclass
+class BatchItem:
+    id: str
+    script: str = ""
+    keywords: list[str] = field(default_factory=list)
+    publish: bool = False
+    profile: str | None = None
+    captions: bool | None = None
+
+
+@dataclass
+class BatchResult:
+    id: str
+    status: str = "pending"
+    out_dir: str = ""
+    video_path: str | None = None
+    url: str | None = None
+    error: str | None = None
+    stage: str | None = None
+    timings: dict[str, float] = field(default_factory=dict)
+
+
+def load_manifest(path: str | Path) -> list[BatchItem]:
+    items: list[BatchItem] = []
+    seen: set[str] = set()
+    lines = Path(path).read_text(encoding="utf-8").splitlines()
+    for lineno, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            raw = json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise RuntimeError(f"{path}:{lineno}: invalid JSON: {exc}") from exc
+        if not isinstance(raw, dict):
+            raise RuntimeError(f"{path}:{lineno}: each line must be a JSON object")
+
+        item_id = _safe_id(str(raw.get("id") or f"item-{lineno:04d}"))
+        if item_id in seen:
+            raise RuntimeError(f"{path}:{lineno}: duplicate item id: {item_id}")
+        seen.add(item_id)
+
+        profile = raw.get("profile") or None
+        if profile is not None:
+            try:
+                get_render_profile(profile)
+            except RuntimeError as exc:
+                # Fail before any LLM/TTS spend, not at render time.
+                raise RuntimeError(f"{path}:{lineno}: {exc}") from None
+
+        keywords = raw.get("keywords") or []
+        if isinstance(keywords, str):
+            keywords = keywords.splitlines()
+        keywords = [str(k).strip() for k in keywords if str(k).strip()]
+
+        items.append(
+            BatchItem(
+                id=item_id,
+                script=str(raw.get("script") or "").strip(),
+                keywords=keywords,
+                publish=_as_bool(raw.get("publish", False)),
+                profile=profile,
+                captions=None if raw.get("captions") is None else _as_bool(raw["captions"]),
+            )
+        )
+    return items
+
+
+def run_batch(manifest_path: str | Path, out_root: str | Path | None = None) -> list[BatchResult]:
+    items = load_manifest(manifest_path)
+    out_root = Path(out_root) if out_root is not None else Path("artifacts") / "batch"
+    out_root.mkdir(parents=True, exist_ok=True)
+    llm_workers = _env_concurrency("GP_BATCH_LLM_CONCURRENCY", 4)
+    upload_workers = _env_concurrency("GP_BATCH_UPLOAD_CONCURRENCY", 2)
+    print(
+        f"[batch] items={len(items)} llm_tts={llm_workers} uploads={upload_workers} "
+        f"out={out_root}"
+    )
+
+    results = {item.id: BatchResult(id=item.id, out_dir=str(out_root / item.id)) for item in items}
+    with _event_loop_thread() as loop, \
+            UploadScheduler(upload_workers) as scheduler:
+        limit = asyncio.run_coroutine_threadsafe(_semaphore(llm_workers), loop).result()
+        prepared = {
+            asyncio.run_coroutine_threadsafe(
+                _prepare_item(item, results[item.id], limit), loop
+            ): item
+            for item in items
+        }
+        uploads = {}
+        # Render in the order items become ready; the renderer parallelizes
+        # internally, so one render at a time keeps every core busy.
+        for future in as_completed(prepared):
+            item = prepared[future]
+            result = results[item.id]
+            try:
+                script, audio_path = future.result()
+                result.stage = "render"
+                started = time.perf_counter()
+                with span("stage.render", item=item.id):
+                    result.video_path = render_video(
+                        script,
+                        audio_path,
+                        profile=item.profile,
+                        captions=item.captions,
+                        keywords=item.keywords,
+                        out_dir=result.out_dir,
+                    )
+                result.timings["render"] = round(time.perf_counter() - started, 3)
+            except Exception as exc:
+                _fail(result, exc, out_root)
+                continue
+            if item.publish:
+                result.stage = "upload"
+                upload = scheduler.submit(
+                    item.id,
+                    result.video_path,
+                    script_path=Path(result.out_dir) / "script.txt",
+                    keywords=item.keywords,
+                )
+                uploads[upload] = item
+            else:
+                result.status = "rendered"
+                print(f"[batch] {item.id}: rendered {result.video_path} (dry-run, not uploaded)")
+                _write_result(result, out_root)
+
+        for future in as_completed(uploads):
+            item = uploads[future]
+            result = results[item.id]
+            outcome = future.result()
+            result.timings["upload"] = outcome.seconds
+            result.status = outcome.status
+            result.url = outcome.url
+            result.error = outcome.error
+            if outcome.status == "deferred":
+                print(f"[batch] {item.id}: upload deferred to the next quota day")
+            _write_result(result, out_root)
+
+    ordered = [results[item.id] for item in items]
+    failed = sum(1 for r in ordered if r.status == "failed")
+    deferred = sum(1 for r in ordered if r.status == "deferred")
+    print(
+        f"[batch] done: {len(ordered) - failed - deferred} ok, {failed} failed, "
+        f"{deferred} deferred"
+    )
+    print_cache_report()
+    print_trace_summary()
+    export_chrome_trace()
+    return ordered
+
+
+async def _prepare_item(
+    item: BatchItem, result: BatchResult, limit: asyncio.Semaphore
+) -> tuple[str, Path]:
+    """Script (generated if the manifest has none), keywords and voice for one item."""
+    out_dir = Path(result.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    script = item.script
+    if not script:
+        result.stage = "script"
+        started = time.perf_counter()
+        with span("stage.script", item=item.id):
+            async with limit:
+                idea = await generate_ideas_async(artifacts_dir=out_dir)
+            async with limit:
+                script = await generate_script_async(idea)
+        result.timings["script"] = round(time.perf_counter() - started, 3)
+    (out_dir / "script.txt").write_text(script, encoding="utf-8")
+    if item.keywords:
+        (out_dir / "keywords.txt").write_text("\n".join(item.keywords) + "\n", encoding="utf-8")
+    elif item.publish:
+        raise RuntimeError(f"Publish requested for {item.id} but the manifest item has no keywords")
+
+    result.stage = "tts"
+    started = time.perf_counter()
+    with span("stage.tts", item=item.id):
+        async with limit:
+            audio_path = Path(await synthesize_voice_async(script, str(out_dir / "voice.mp3")))
+    result.timings["tts"] = round(time.perf_counter() - started, 3)
+    print(f"[batch] {item.id}: script + voice ready")
+    return script, audio_path
+
+
+async def _semaphore(limit: int) -> asyncio.Semaphore:
+    return asyncio.Semaphore(limit)
+
+
+@contextlib.contextmanager
+def _event_loop_thread():
+    """An asyncio loop running on a background thread for the LLM/TTS calls."""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="gp-llm", daemon=True)
+    thread.start()
+    try:
+        yield loop
+    finally:
+        asyncio.run_coroutine_threadsafe(aclose_async_clients(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+def _fail(result: BatchResult, exc: Exception, out_root: Path) -> None:
+    result.status = "failed"
+    result.error = f"{type(exc).__name__}: {exc}"
+    print(f"[batch] {result.id}: failed during {result.stage}: {result.error}")
+    _write_result(result, out_root)
+
+
+def _write_result(result: BatchResult, out_root: Path) -> None:
+    record = asdict(result)
+    out_dir = Path(result.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / "result.json").write_text(json.dumps(record, indent=2), encoding="utf-8")
+    # Only the main thread writes records, so appends never interleave.
+    with (out_root / "results.jsonl").open("a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def _safe_id(raw: str) -> str:
+    cleaned = re.sub(r"[^A-Za-z0-9._-]+", "-", raw).strip(".-")
+    if not cleaned:
+        raise RuntimeError(f"Invalid batch item id: {raw!r}")
+    return cleaned
+
+
+def _as_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in {"true", "1", "yes", "y"}
+
+
+def _env_concurrency(name: str, default: int) -> int:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return max(1, int(raw))
+    except ValueError as exc:
+        raise RuntimeError(f"{name} must be an integer, got: {raw!r}") from exc
@@ -0,0 +1,146 @@
+"""
+Minimal dependency-graph executor for pipeline stages.
+
+Each stage names the stages it needs; it starts on a worker thread as soon
+as all of them have finished and receives their results as keyword
+arguments. Stages are I/O- or subprocess-bound (API calls, ffmpeg, the
+render process pool), so threads are enough to overlap them.
+
+After the run a timing table is printed with the critical path marked:
+the chain of stages, each gated by its last-finishing dependency, that
+determined the end-to-end wall time. Each stage is also traced as a
+"stage.<name>" span (utils.logging).
+"""
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from geopilot_publisher.utils.logging import span
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable[..., Any]
+    needs: tuple[str, ...] = ()
+
+
+@dataclass
+class StageTiming:
+    start: float
+    end: float
+
+    @property
+    def seconds(self) -> float:
+        return self.end - self.start
+
+
+def run_stages(stages: list[Stage], label: str = "pipeline") -> dict[str, Any]:
+    """
+    Run `stages` respecting `needs` and return {stage name: result}.
+    The first stage error is re-raised once running stages have finished;
+    stages that had not started yet are skipped.
+    """
+    by_name = _validate(stages)
+    results: dict[str, Any] = {}
+    timings: dict[str, StageTiming] = {}
+    t0 = time.perf_counter()
+    error: BaseException | None = None
+
+    with ThreadPoolExecutor(max_workers=len(stages) or 1, thread_name_prefix="gp-stage") as pool:
+        running = {}
+        pending = [stage.name for stage in stages]
+        while pending or running:
+            if error is None:
+                for name in [n for n in pending if all(d in results for d in by_name[n].needs)]:
+                    pending.remove(name)
+                    stage = by_name[name]
+                    kwargs = {dep: results[dep] for dep in stage.needs}
+                    running[pool.submit(_timed, stage, kwargs, t0)] = name
+            elif not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                start, end, value, exc = future.result()
+                timings[name] = StageTiming(start, end)
+                if exc is not None:
+                    print(f"[{label}] stage {name} failed after {end - start:.2f}s: {exc}")
+                    error = error or exc
+                else:
+                    results[name] = value
+
+    print_timing_summary(by_name, timings, time.perf_counter() - t0, label)
+    if error is not None:
+        raise error
+    return results
+
+
+def critical_path(stages: dict[str, Stage], timings: dict[str, StageTiming]) -> list[str]:
+    """Stages on the longest dependency chain, in run order."""
+    if not timings:
+        return []
+    name = max(timings, key=lambda n: timings[n].end)
+    path = [name]
+    while True:
+        deps = [d for d in stages[name].needs if d in timings]
+        if not deps:
+            break
+        name = max(deps, key=lambda d: timings[d].end)
+        path.append(name)
+    return path[::-1]
+
+
+def print_timing_summary(
+    stages: dict[str, Stage],
+    timings: dict[str, StageTiming],
+    wall: float,
+    label: str = "pipeline",
+) -> None:
+    path = critical_path(stages, timings)
+    print(f"[{label}] stage timings (* = critical path):")
+    for name in sorted(timings, key=lambda n: timings[n].start):
+        t = timings[name]
+        mark = "*" if name in path else " "
+        print(
+            f"[{label}]  {mark} {name:<14} start={t.start:7.2f}s "
+            f"end={t.end:7.2f}s took={t.seconds:7.2f}s"
+        )
+    busy = sum(timings[name].seconds for name in path)
+    print(
+        f"[{label}] wall={wall:.2f}s critical path={' -> '.join(path)} "
+        f"({busy:.2f}s busy, {sum(t.seconds for t in timings.values()):.2f}s total stage time)"
+    )
+
+
+def _timed(stage: Stage, kwargs: dict[str, Any], t0: float):
+    start = time.perf_counter() - t0
+    try:
+        with span(f"stage.{stage.name}"):
+            value = stage.fn(**kwargs)
+    except Exception as exc:
+        return start, time.perf_counter() - t0, None, exc
+    return start, time.perf_counter() - t0, value, None
+
+
+def _validate(stages: list[Stage]) -> dict[str, Stage]:
+    by_name: dict[str, Stage] = {}
+    for stage in stages:
+        if stage.name in by_name:
+            raise RuntimeError(f"Duplicate stage name: {stage.name}")
+        by_name[stage.name] = stage
+    for stage in stages:
+        for dep in stage.needs:
+            if dep not in by_name:
+                raise RuntimeError(f"Stage {stage.name} needs unknown stage: {dep}")
+    # Kahn's algorithm: every stage must become ready at some point.
+    done: set[str] = set()
+    remaining = list(by_name)
+    while remaining:
+        ready = [n for n in remaining if all(d in done for d in by_name[n].needs)]
+        if not ready:
+            raise RuntimeError(f"Stage dependency cycle among: {', '.join(remaining)}")
+        done.update(ready)
+        remaining = [n for n in remaining if n not in done]
+    return by_name
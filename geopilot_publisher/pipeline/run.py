@@ -3,20 +3,48 @@ Pipeline entry point (local + CI).
 
 Example:
   python -m geopilot_publisher.pipeline.run --publish false
+  python -m geopilot_publisher.pipeline.run --publish false --profile draft
+  python -m geopilot_publisher.pipeline.run --publish false --captions true
+  python -m geopilot_publisher.pipeline.run --batch manifest.jsonl
 """
 import argparse
+from geopilot_publisher.pipeline.batch import run_batch
 from geopilot_publisher.pipeline.stages import run_all
 
 def parse_args():
     p = argparse.ArgumentParser()
     p.add_argument("--publish", default="false")
+    p.add_argument(
+        "--profile",
+        default=None,
+        help="render profile: final (default), preview, draft; or set GP_RENDER_PROFILE",
+    )
+    p.add_argument(
+        "--captions",
+        default=None,
+        help="burn in captions (true/false); defaults to GP_CAPTIONS",
+    )
+    p.add_argument(
+        "--batch",
+        default=None,
+        help="JSONL manifest: render (and publish) every item in one process",
+    )
     return p.parse_args()
 
 def main():
     args = parse_args()
+    if args.batch:
+        print(f"[pipeline] batch={args.batch}")
+        results = run_batch(args.batch)
+        if any(r.status in ("failed", "deferred") for r in results):
+            raise SystemExit(1)
+        return
     publish = str(args.publish).strip().lower() in {"true", "1", "yes", "y"}
     print(f"[pipeline] publish={publish} (raw={args.publish})")
-    run_all(publish=publish)
+    captions = None
+    if args.captions is not None:
+        captions = str(args.captions).strip().lower() in {"true", "1", "yes", "y"}
+    run_all(publish=publish, profile=args.profile, captions=captions)
 
 if __name__ == "__main__":
     main()
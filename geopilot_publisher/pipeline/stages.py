@@ -1,32 +1,62 @@
 """
-Orchestration layer: orders the stages and passes artifacts between them.
+Orchestration layer: wires the stages into a dependency graph and passes
+artifacts between them. Stages start as soon as their inputs are ready, so
+render setup overlaps TTS and YouTube auth overlaps the render.
 """
 
 import hashlib
 import os
 from pathlib import Path
 
+from geopilot_publisher.pipeline.dag import Stage, run_stages
+from geopilot_publisher.services.response_cache import print_cache_report
 from geopilot_publisher.stages.generate_ideas import generate_ideas
-from geopilot_publisher.stages.generate_script import generate_script
-from geopilot_publisher.stages.tts import synthesize_voice
-from geopilot_publisher.stages.render_video import render_video
-from geopilot_publisher.stages.upload_youtube import upload_video
+from geopilot_publisher.stages.generate_script import generate_script, generate_script_stream
+from geopilot_publisher.stages.tts import StreamingVoice, synthesize_voice
+from geopilot_publisher.stages.render_video import prepare_render, render_video
+from geopilot_publisher.stages.upload_youtube import get_youtube_client, upload_video
+from geopilot_publisher.utils.logging import export_chrome_trace, print_trace_summary
 
 
 
-def run_all(publish: bool = False) -> None:
+def run_all(
+    publish: bool = False,
+    profile: str | None = None,
+    captions: bool | None = None,
+) -> None:
+    """
+    Stage graph (edges are data dependencies):
+
+      idea -> script -+-> voice -------+-> render -> upload
+                      +-> render_prep -+             |
+      youtube_client --------------------------------+
+
+    render_prep (profile, background, fonts, keyword layout, sprites) only
+    needs the script and keywords, so it runs while TTS is in flight; the
+    YouTube client is built and its token refreshed in parallel from the
+    start. Outputs are the same as running the stages one after another.
+
+    With GP_STREAM_SCRIPT=1 the script is streamed from the LLM and each
+    finished sentence goes to TTS while the rest is still generating; the
+    voice stage then only waits for the last sentences.
+
+    Stages and their sub-phases are traced to artifacts/trace.jsonl; a
+    summary table and a Chrome trace (artifacts/trace.chrome.json) are
+    written at the end of the run.
+    """
     artifacts_dir = Path("artifacts")
     artifacts_dir.mkdir(exist_ok=True)
 
     use_content = os.getenv("GP_USE_CONTENT") == "1"
     reuse = os.getenv("GP_REUSE_SCRIPT") == "1"
+    stream_script = os.getenv("GP_STREAM_SCRIPT") == "1"
     script_path = artifacts_dir / "script.txt"
     audio_path = artifacts_dir / "voice.mp3"
     keywords_path = artifacts_dir / "keywords.txt"
     content_script = Path("content") / "script.txt"
     content_keywords = Path("content") / "keywords.txt"
 
-    if use_content:
+    def load_content_script() -> str:
         if (
             not content_script.exists()
             or not content_keywords.exists()
@@ -48,28 +78,87 @@ def run_all(publish: bool = False) -> None:
         print(f"[content] script preview: {script_preview}")
         print(f"[content] script sha256: {script_hash}")
         print(f"[content] keywords: {keyword_count}")
-        audio_path = Path(synthesize_voice(script))
-    elif reuse:
+        return script
+
+    def load_reused_script() -> str:
         if not script_path.exists() or not audio_path.exists():
             raise RuntimeError(
                 "GP_REUSE_SCRIPT=1 requires artifacts/script.txt and artifacts/voice.mp3"
             )
-        script = script_path.read_text(encoding="utf-8")
-    else:
-        idea = generate_ideas()
+        return script_path.read_text(encoding="utf-8")
+
+    def write_generated_script(idea: dict) -> str:
         script = generate_script(idea)
         script_path.write_text(script, encoding="utf-8")
-        audio_path = Path(synthesize_voice(script))
+        return script
 
-    if publish and (not keywords_path.exists() or not keywords_path.read_text(encoding="utf-8").strip()):
-        raise RuntimeError(
-            "Publish requested but artifacts/keywords.txt is missing or empty. "
-            "CI runs clean; add keywords.txt to artifacts before publishing."
-        )
+    streaming_voice: list[StreamingVoice] = []
 
-    video_path = render_video(script, audio_path)
+    def write_streamed_script(idea: dict) -> str:
+        voice_stream = StreamingVoice(str(audio_path))
+        try:
+            script = generate_script_stream(idea, voice_stream.feed)
+        except Exception:
+            voice_stream.close()
+            raise
+        script_path.write_text(script, encoding="utf-8")
+        streaming_voice.append(voice_stream)
+        return script
 
-    if publish:
-        upload_video(video_path)
+    def voice(script: str) -> Path:
+        if reuse and not use_content:
+            return audio_path
+        if streaming_voice:
+            return Path(streaming_voice[0].finish())
+        return Path(synthesize_voice(script))
+
+    def render_prep(script: str):
+        if publish and (
+            not keywords_path.exists() or not keywords_path.read_text(encoding="utf-8").strip()
+        ):
+            raise RuntimeError(
+                "Publish requested but artifacts/keywords.txt is missing or empty. "
+                "CI runs clean; add keywords.txt to artifacts before publishing."
+            )
+        return prepare_render(script, profile, captions=captions)
+
+    def render(script: str, voice: Path, render_prep) -> str:
+        return render_video(script, voice, prep=render_prep)
+
+    if use_content:
+        stages = [Stage("script", load_content_script)]
+    elif reuse:
+        stages = [Stage("script", load_reused_script)]
     else:
-        print(f"[dry-run] would upload: {video_path}")
+        stages = [
+            Stage("idea", generate_ideas),
+            Stage(
+                "script",
+                write_streamed_script if stream_script else write_generated_script,
+                needs=("idea",),
+            ),
+        ]
+    stages += [
+        Stage("voice", voice, needs=("script",)),
+        Stage("render_prep", render_prep, needs=("script",)),
+        Stage("render", render, needs=("script", "voice", "render_prep")),
+    ]
+    if publish:
+        stages += [
+            Stage("youtube_client", get_youtube_client),
+            Stage(
+                "upload",
+                lambda render, youtube_client: upload_video(render, youtube=youtube_client),
+                needs=("render", "youtube_client"),
+            ),
+        ]
+
+    try:
+        results = run_stages(stages)
+    finally:
+        print_cache_report()
+        print_trace_summary()
+        export_chrome_trace()
+
+    if not publish:
+        print(f"[dry-run] would upload: {results['render']}")
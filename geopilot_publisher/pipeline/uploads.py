@@ -0,0 +1,209 @@
+"""
+Upload scheduler for publishing many videos from one process.
+
+Finished videos are queued with submit() and uploaded up to `workers` at a
+time over one shared YouTube client (authorized once, on first use), so
+uploads overlap with whatever the caller does next, e.g. rendering the
+following items.
+
+Every videos.insert is charged to a quota ledger before any byte is sent;
+resuming an interrupted upload's saved session is not a new insert and is
+not charged. The ledger is kept per API quota day (which resets at
+midnight Pacific time) under <cache>/youtube/quota.json, so separate runs
+on the same day add up. An upload that would take the day past GP_YOUTUBE_DAILY_QUOTA is
+deferred rather than sent into a quotaExceeded error; after a
+quotaExceeded response the rest of the day's uploads are deferred too.
+
+Tuning (env):
+  GP_YOUTUBE_DAILY_QUOTA    quota units per day (default 10000)
+  GP_YOUTUBE_INSERT_UNITS   cost of one videos.insert (default 1600)
+"""
+from __future__ import annotations
+
+import datetime as dt
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from geopilot_publisher.services.youtube_client import YouTubeClient
+from geopilot_publisher.stages.upload_youtube import get_youtube_client, upload_video
+from geopilot_publisher.utils.logging import span
+from geopilot_publisher.utils.paths import cache_dir
+
+
+@dataclass
+class UploadOutcome:
+    id: str
+    status: str  # "published", "failed" or "deferred"
+    url: str | None = None
+    error: str | None = None
+    seconds: float = 0.0
+    quota_units: int = 0
+
+
+class QuotaDeferred(RuntimeError):
+    """Raised instead of uploading when the day's quota cannot cover the call."""
+
+
+class QuotaLedger:
+    def __init__(self, daily_limit: int | None = None, path: Path | None = None) -> None:
+        self.daily_limit = (
+            daily_limit if daily_limit is not None else _env_int("GP_YOUTUBE_DAILY_QUOTA", 10000)
+        )
+        self.costs = {"videos.insert": _env_int("GP_YOUTUBE_INSERT_UNITS", 1600)}
+        self.path = path or cache_dir("youtube") / "quota.json"
+        self._lock = threading.Lock()
+        self._day = ""
+        self._units = 0
+        self._calls: dict[str, int] = {}
+        self._load()
+
+    def spend(self, call: str) -> int:
+        """Charge one `call`; raises QuotaDeferred if it would exceed the day's limit."""
+        cost = self.costs[call]
+        with self._lock:
+            self._roll_day()
+            if self._units + cost > self.daily_limit:
+                raise QuotaDeferred(
+                    f"quota: {call} needs {cost} units, "
+                    f"{max(0, self.daily_limit - self._units)} left for {self._day}"
+                )
+            self._units += cost
+            self._calls[call] = self._calls.get(call, 0) + 1
+            self._save()
+        return cost
+
+    def exhaust(self) -> None:
+        """The API reported quotaExceeded: treat the rest of the day as spent."""
+        with self._lock:
+            self._roll_day()
+            self._units = max(self._units, self.daily_limit)
+            self._save()
+
+    def summary(self) -> str:
+        with self._lock:
+            self._roll_day()
+            calls = ", ".join(f"{name}={count}" for name, count in sorted(self._calls.items()))
+            return (
+                f"{self._units}/{self.daily_limit} units used for {self._day}"
+                + (f" ({calls})" if calls else "")
+            )
+
+    def _load(self) -> None:
+        try:
+            state = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            state = {}
+        self._day = str(state.get("day", ""))
+        self._units = int(state.get("units", 0))
+        self._calls = dict(state.get("calls", {}))
+        self._roll_day()
+
+    def _roll_day(self) -> None:
+        today = _quota_day()
+        if self._day != today:
+            self._day, self._units, self._calls = today, 0, {}
+
+    def _save(self) -> None:
+        tmp = self.path.with_name(self.path.name + f".{os.getpid()}.tmp")
+        tmp.write_text(
+            json.dumps({"day": self._day, "units": self._units, "calls": self._calls}),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self.path)
+
+
+class UploadScheduler:
+    """Bounded-concurrency uploads with quota accounting; use as a context manager."""
+
+    def __init__(
+        self,
+        workers: int = 2,
+        ledger: QuotaLedger | None = None,
+        client: YouTubeClient | None = None,
+    ) -> None:
+        self.ledger = ledger or QuotaLedger()
+        self.outcomes: list[UploadOutcome] = []
+        self._client = client
+        self._client_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max(1, workers), thread_name_prefix="gp-upload")
+
+    def __enter__(self) -> "UploadScheduler":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
+
+    def submit(
+        self,
+        item_id: str,
+        video_path: str | Path,
+        script_path: str | Path | None = None,
+        keywords: list[str] | None = None,
+    ) -> "Future[UploadOutcome]":
+        """Queue one upload; the future resolves to its outcome and never raises."""
+        return self._pool.submit(self._upload, item_id, video_path, script_path, keywords)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True)
+        print(f"[uploads] quota: {self.ledger.summary()}")
+
+    def _upload(self, item_id, video_path, script_path, keywords) -> UploadOutcome:
+        outcome = UploadOutcome(id=item_id, status="failed")
+        started = time.perf_counter()
+
+        def charge() -> None:
+            outcome.quota_units += self.ledger.spend("videos.insert")
+
+        try:
+            with span("upload.video", item=item_id):
+                outcome.url = upload_video(
+                    str(video_path),
+                    script_path=script_path,
+                    keywords=keywords,
+                    youtube=self._get_client(),
+                    before_upload=charge,
+                )
+            outcome.status = "published"
+        except QuotaDeferred as exc:
+            outcome.status = "deferred"
+            outcome.error = str(exc)
+        except Exception as exc:
+            outcome.error = f"{type(exc).__name__}: {exc}"
+            if "quotaExceeded" in str(exc):
+                self.ledger.exhaust()
+                outcome.status = "deferred"
+        outcome.seconds = round(time.perf_counter() - started, 3)
+        if outcome.status != "published":
+            print(f"[uploads] {item_id}: {outcome.status}: {outcome.error}")
+        self.outcomes.append(outcome)
+        return outcome
+
+    def _get_client(self) -> YouTubeClient:
+        with self._client_lock:
+            if self._client is None:
+                self._client = get_youtube_client()
+            return self._client
+
+
+def _quota_day() -> str:
+    try:
+        tz = ZoneInfo("America/Los_Angeles")
+    except ZoneInfoNotFoundError:
+        tz = dt.timezone(dt.timedelta(hours=-8))  # no tz database: PST
+    return dt.datetime.now(tz).date().isoformat()
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return int(raw)
+    except ValueError as exc:
+        raise RuntimeError(f"{name} must be an integer, got: {raw!r}") from exc
@@ -1,8 +1,215 @@
+"""
+Process-wide OpenAI clients.
+
+Every stage goes through get_client() (or get_async_client() in async
+code), so all calls share one HTTP connection pool and keep-alive
+connections instead of paying a new TLS handshake per request.
+
+Tuning (env):
+  GP_OPENAI_MAX_CONNECTIONS   pool size (default 20)
+  GP_OPENAI_MAX_KEEPALIVE     idle keep-alive connections (default 10)
+  GP_OPENAI_TIMEOUT           request timeout in seconds (default 120)
+  GP_OPENAI_CONNECT_TIMEOUT   connect timeout in seconds (default 10)
+  GP_OPENAI_MAX_RETRIES       SDK retries on 429/5xx/connection errors (default 2)
+  OPENAI_BASE_URL             API root, e.g. a local stand-in server for tests
+
+Chat completions go through create_chat_completion() (or
+stream_chat_completion()), which replay identical requests from the
+response cache (services/response_cache.py).
+"""
+import asyncio
 import os
-from openai import OpenAI
+import threading
+import weakref
+from typing import Callable
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+from openai.types.chat import ChatCompletion, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+
+from geopilot_publisher.services.response_cache import (
+    cached_response,
+    cached_response_async,
+    is_sampled,
+)
+
+_CLIENTS: dict[tuple, OpenAI] = {}
+# Async clients hold connections bound to one event loop, so they are cached
+# per loop and dropped with it.
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = (
+    weakref.WeakKeyDictionary()
+)
+_LOCK = threading.Lock()
+
 
 def get_client() -> OpenAI:
+    """
+    Shared OpenAI client for the current OPENAI_API_KEY / OPENAI_BASE_URL.
+    The client is thread-safe, so stages (and batch items) share one pool.
+    """
+    key, kwargs = _client_config()
+    with _LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            client = _CLIENTS[key] = OpenAI(
+                **kwargs,
+                http_client=httpx.Client(limits=_limits(), timeout=kwargs["timeout"]),
+            )
+    return client
+
+
+def get_async_client() -> AsyncOpenAI:
+    """AsyncOpenAI counterpart of get_client(), shared within the running event loop."""
+    loop = asyncio.get_running_loop()
+    key, kwargs = _client_config()
+    with _LOCK:
+        clients = _ASYNC_CLIENTS.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            client = clients[key] = AsyncOpenAI(
+                **kwargs,
+                http_client=httpx.AsyncClient(limits=_limits(), timeout=kwargs["timeout"]),
+            )
+    return client
+
+
+def create_chat_completion(request: dict) -> ChatCompletion:
+    """chat.completions.create(**request) on the shared client, via the response cache."""
+    data = cached_response(
+        "chat.completions",
+        request,
+        lambda: get_client().chat.completions.create(**request).model_dump_json().encode("utf-8"),
+        sampled=is_sampled(request),
+    )
+    return ChatCompletion.model_validate_json(data)
+
+
+def stream_chat_completion(request: dict, on_text: Callable[[str], None]) -> str:
+    """
+    Like create_chat_completion(), but streamed: `on_text` gets each content
+    delta as it arrives and the full message text is returned. A cached
+    response is replayed as a single delta.
+    """
+    streamed = False
+
+    def fetch() -> bytes:
+        nonlocal streamed
+        streamed = True
+        parts: list[str] = []
+        meta = {"id": "", "created": 0, "model": request["model"], "finish_reason": "stop"}
+        for chunk in get_client().chat.completions.create(**request, stream=True):
+            meta.update(id=chunk.id, created=chunk.created, model=chunk.model)
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            if choice.delta.content:
+                parts.append(choice.delta.content)
+                on_text(choice.delta.content)
+            meta["finish_reason"] = choice.finish_reason or meta["finish_reason"]
+        # Stored in the same shape as a non-streamed response.
+        resp = ChatCompletion(
+            id=meta["id"],
+            object="chat.completion",
+            created=meta["created"],
+            model=meta["model"],
+            choices=[
+                Choice(
+                    index=0,
+                    finish_reason=meta["finish_reason"],
+                    message=ChatCompletionMessage(role="assistant", content="".join(parts)),
+                )
+            ],
+        )
+        return resp.model_dump_json().encode("utf-8")
+
+    data = cached_response("chat.completions", request, fetch, sampled=is_sampled(request))
+    text = ChatCompletion.model_validate_json(data).choices[0].message.content or ""
+    if not streamed:
+        on_text(text)
+    return text
+
+
+async def create_chat_completion_async(request: dict) -> ChatCompletion:
+    """create_chat_completion() on the shared AsyncOpenAI client."""
+
+    async def fetch() -> bytes:
+        resp = await get_async_client().chat.completions.create(**request)
+        return resp.model_dump_json().encode("utf-8")
+
+    data = await cached_response_async(
+        "chat.completions", request, fetch, sampled=is_sampled(request)
+    )
+    return ChatCompletion.model_validate_json(data)
+
+
+async def aclose_async_clients() -> None:
+    """Close the running loop's async clients; call before the loop shuts down."""
+    with _LOCK:
+        clients = _ASYNC_CLIENTS.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.close()
+
+
+def reset_clients() -> None:
+    """Close and forget the cached sync clients (e.g. after changing env in tests)."""
+    with _LOCK:
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+    for client in clients:
+        client.close()
+
+
+def _client_config() -> tuple[tuple, dict]:
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY is not set")
-    return OpenAI(api_key=api_key)
\ No newline at end of file
+    base_url = os.getenv("OPENAI_BASE_URL") or None
+    timeout = httpx.Timeout(
+        _env_float("GP_OPENAI_TIMEOUT", 120.0),
+        connect=_env_float("GP_OPENAI_CONNECT_TIMEOUT", 10.0),
+    )
+    max_retries = _env_int("GP_OPENAI_MAX_RETRIES", 2)
+    kwargs = {
+        "api_key": api_key,
+        "base_url": base_url,
+        "timeout": timeout,
+        "max_retries": max_retries,
+    }
+    key = (
+        api_key,
+        base_url,
+        timeout.read,
+        timeout.connect,
+        max_retries,
+        _limits().max_connections,
+        _limits().max_keepalive_connections,
+    )
+    return key, kwargs
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=_env_int("GP_OPENAI_MAX_CONNECTIONS", 20),
+        max_keepalive_connections=_env_int("GP_OPENAI_MAX_KEEPALIVE", 10),
+    )
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return int(raw)
+    except ValueError as exc:
+        raise RuntimeError(f"{name} must be an integer, got: {raw!r}") from exc
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return float(raw)
+    except ValueError as exc:
+        raise RuntimeError(f"{name} must be a number, got: {raw!r}") from exc
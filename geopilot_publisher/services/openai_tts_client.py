@@ -1,32 +1,49 @@
-import os
-from pathlib import Path
-from openai import OpenAI
+from geopilot_publisher.services.openai_client import get_async_client, get_client
+from geopilot_publisher.services.response_cache import cached_response, cached_response_async
 
+# Raw PCM from the speech endpoint: 24 kHz, 16-bit signed little-endian, mono.
+PCM_SAMPLE_RATE = 24000
+PCM_SAMPLE_WIDTH = 2
 
-def tts_to_mp3(
+
+def tts_to_pcm(
     text: str,
-    out_path: str = "artifacts/voice.mp3",
     model: str = "gpt-4o-mini-tts",
     voice: str = "marin",
-) -> str:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise RuntimeError("OPENAI_API_KEY is not set")
+) -> bytes:
+    """Synthesize `text` to raw PCM; chunks in this format concatenate exactly."""
+    return speech(text, model, voice, "pcm")
 
-    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
 
-    client = OpenAI(api_key=api_key)
+async def tts_to_pcm_async(
+    text: str,
+    model: str = "gpt-4o-mini-tts",
+    voice: str = "marin",
+) -> bytes:
+    """tts_to_pcm() on the shared AsyncOpenAI client."""
+    return await speech_async(text, model, voice, "pcm")
 
-    # NOTE: It's `response_format`, not `format`
-    audio = client.audio.speech.create(
-        model=model,
-        voice=voice,
-        input=text,
-        response_format="mp3",
-    )
 
+def speech(text: str, model: str, voice: str, response_format: str) -> bytes:
+    """
+    Audio bytes for `text`, via the response cache: the same text, model,
+    voice and format are only ever synthesized once.
+    """
+    request = dict(model=model, voice=voice, input=text, response_format=response_format)
     # openai-python returns binary audio content
-    with open(out_path, "wb") as f:
-        f.write(audio.read() if hasattr(audio, "read") else audio)
+    return cached_response(
+        "audio.speech",
+        request,
+        lambda: get_client().audio.speech.create(**request).read(),
+    )
+
+
+async def speech_async(text: str, model: str, voice: str, response_format: str) -> bytes:
+    """speech() on the shared AsyncOpenAI client."""
+    request = dict(model=model, voice=voice, input=text, response_format=response_format)
+
+    async def fetch() -> bytes:
+        audio = await get_async_client().audio.speech.create(**request)
+        return audio.read()
 
-    return out_path
\ No newline at end of file
+    return await cached_response_async("audio.speech", request, fetch)
\ No newline at end of file
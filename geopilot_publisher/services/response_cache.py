@@ -0,0 +1,202 @@
+"""
+Disk cache for API responses.
+
+A response is identified by its endpoint and the full request parameters
+(model, messages/input, voice, format, ...); the hash of both names the
+file under <cache>/responses/. Bodies are stored as-is: JSON text for chat
+completions, audio bytes for speech. Re-running the pipeline with the same
+inputs (re-renders, CI re-runs, debugging replays) then costs no API calls.
+
+Calls with sampling (temperature > 0) are meant to vary, so they bypass the
+cache unless GP_CACHE_SAMPLED=1 asks for deterministic replays. Hits touch
+the file's mtime and the cache is trimmed oldest-first past its size cap.
+Every call, hit or not, is traced as an "api.<endpoint>" span.
+
+Tuning (env):
+  GP_RESPONSE_CACHE      0 disables the cache (default 1)
+  GP_RESPONSE_CACHE_MB   size cap in MiB (default 512)
+  GP_CACHE_SAMPLED       1 also caches sampled calls (default 0)
+"""
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from geopilot_publisher.utils.logging import span
+from geopilot_publisher.utils.paths import cache_dir
+
+# Bump when the stored body format changes for the same request.
+RESPONSE_CACHE_VERSION = 1
+
+_STATS: dict[str, Counter] = {}
+_LOCK = threading.Lock()
+
+
+def response_key(endpoint: str, params: dict) -> str:
+    payload = json.dumps(
+        {"endpoint": endpoint, "params": params, "version": RESPONSE_CACHE_VERSION},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_sampled(params: dict) -> bool:
+    """Chat-style requests sample unless temperature is 0 (the API default is 1)."""
+    return float(params.get("temperature", 1.0)) > 0
+
+
+def cached_response(
+    endpoint: str,
+    params: dict,
+    fetch: Callable[[], bytes],
+    sampled: bool = False,
+) -> bytes:
+    """Response body for (endpoint, params), calling `fetch()` on a miss."""
+    with span(f"api.{endpoint}", model=params.get("model")) as current:
+        path = _lookup(endpoint, params, sampled)
+        if path is None:
+            current["cache"] = "off"
+            data = fetch()
+        else:
+            data = _read(path)
+            current["cache"] = "miss" if data is None else "hit"
+            if data is not None:
+                _count(endpoint, "hits")
+            else:
+                _count(endpoint, "misses")
+                data = fetch()
+                _store(path, data)
+        current["bytes"] = len(data)
+        return data
+
+
+async def cached_response_async(
+    endpoint: str,
+    params: dict,
+    fetch: Callable[[], Awaitable[bytes]],
+    sampled: bool = False,
+) -> bytes:
+    """cached_response() for a coroutine `fetch`."""
+    with span(f"api.{endpoint}", model=params.get("model")) as current:
+        path = _lookup(endpoint, params, sampled)
+        if path is None:
+            current["cache"] = "off"
+            data = await fetch()
+        else:
+            data = _read(path)
+            current["cache"] = "miss" if data is None else "hit"
+            if data is not None:
+                _count(endpoint, "hits")
+            else:
+                _count(endpoint, "misses")
+                data = await fetch()
+                _store(path, data)
+        current["bytes"] = len(data)
+        return data
+
+
+def cache_stats() -> dict[str, dict[str, int]]:
+    with _LOCK:
+        return {endpoint: dict(counts) for endpoint, counts in _STATS.items()}
+
+
+def reset_cache_stats() -> None:
+    with _LOCK:
+        _STATS.clear()
+
+
+def print_cache_report(label: str = "cache") -> None:
+    """One line per endpoint used this run; silent if nothing went through the cache."""
+    for endpoint, counts in sorted(cache_stats().items()):
+        print(
+            f"[{label}] {endpoint}: hits={counts.get('hits', 0)} "
+            f"misses={counts.get('misses', 0)} bypassed={counts.get('bypassed', 0)} "
+            f"evicted={counts.get('evicted', 0)}"
+        )
+
+
+def _lookup(endpoint: str, params: dict, sampled: bool) -> Path | None:
+    """Cache file for the request, or None if it must go straight to the API."""
+    if os.getenv("GP_RESPONSE_CACHE", "1") == "0":
+        return None
+    if sampled and os.getenv("GP_CACHE_SAMPLED") != "1":
+        _count(endpoint, "bypassed")
+        return None
+    key = response_key(endpoint, params)
+    return cache_dir("responses", key[:2]) / f"{endpoint}-{key[:32]}"
+
+
+def _read(path: Path) -> bytes | None:
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return None
+    if not data:
+        return None
+    with contextlib.suppress(OSError):
+        os.utime(path)  # recency for eviction
+    return data
+
+
+def _store(path: Path, data: bytes) -> None:
+    if not data:
+        return
+    fd, tmp = tempfile.mkstemp(prefix=path.name, suffix=".partial", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+    _evict()
+
+
+def _evict() -> None:
+    """Drop least recently used responses until the cache fits its cap."""
+    cap = _env_int("GP_RESPONSE_CACHE_MB", 512) * 1024 * 1024
+    entries = []
+    total = 0
+    for path in cache_dir("responses").glob("*/*"):
+        if path.name.endswith(".partial"):
+            continue
+        try:
+            st = path.stat()
+        except OSError:
+            continue  # evicted by a concurrent writer
+        entries.append((st.st_mtime, st.st_size, path))
+        total += st.st_size
+    if total <= cap:
+        return
+    entries.sort()
+    # Keep the newest entry even if it alone exceeds the cap.
+    for _, size, path in entries[:-1]:
+        with contextlib.suppress(OSError):
+            path.unlink()
+            total -= size
+            _count(path.name.split("-", 1)[0], "evicted")
+        if total <= cap:
+            break
+
+
+def _count(endpoint: str, what: str) -> None:
+    with _LOCK:
+        _STATS.setdefault(endpoint, Counter())[what] += 1
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return max(0, int(raw))
+    except ValueError as exc:
+        raise RuntimeError(f"{name} must be an integer, got: {raw!r}") from exc
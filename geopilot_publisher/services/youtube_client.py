@@ -1 +1,404 @@
-# TODO: implement YouTube upload client using refresh token
+"""
+YouTube upload client: OAuth credentials from the refresh token and the
+resumable upload protocol over an authorized requests session.
+
+Uploads talk to the upload endpoint directly, so no API discovery document
+is fetched or built. The access token from the refresh is cached with its
+expiry under <cache>/youtube/token.json and reused by later runs until
+shortly before it expires; within a process, get_youtube_client() returns
+one shared client.
+
+An upload session is persisted next to the video (<video>.upload.json)
+with its session URI and the last acknowledged byte offset, so a process
+that dies mid-upload resumes where the server left off instead of starting
+over. Chunk PUTs are retried on 5xx/429 and connection errors with
+exponential backoff and full jitter, re-querying the server for its offset
+before continuing, and the chunk size follows measured throughput. Each
+chunk PUT is traced as an "upload.chunk" span.
+
+Tuning (env):
+  GP_YOUTUBE_UPLOAD_URL     resumable upload endpoint (e.g. a local stand-in)
+  GP_YOUTUBE_TOKEN_CACHE    0 disables the on-disk access token cache (default 1)
+  GP_UPLOAD_CHUNK_MB        first chunk size in MiB (default 8)
+  GP_UPLOAD_CHUNK_SECONDS   target seconds per chunk (default 15)
+  GP_UPLOAD_MAX_RETRIES     consecutive retries before giving up (default 8)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import datetime as dt
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+import requests
+from google.auth.transport.requests import AuthorizedSession, Request
+from google.oauth2.credentials import Credentials
+
+from geopilot_publisher.utils.logging import span
+from geopilot_publisher.utils.paths import cache_dir
+
+YOUTUBE_UPLOAD_SCOPE = "https://www.googleapis.com/auth/youtube.upload"
+TOKEN_URI = "https://oauth2.googleapis.com/token"
+UPLOAD_URL = "https://www.googleapis.com/upload/youtube/v3/videos"
+
+# Chunks other than the last must be multiples of 256 KiB.
+CHUNK_ALIGN = 256 * 1024
+MAX_CHUNK = 256 * 1024 * 1024
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Refresh a cached token this long before it expires.
+TOKEN_EXPIRY_MARGIN = dt.timedelta(minutes=5)
+
+_CLIENT: YouTubeClient | None = None
+_CLIENT_KEY = ""
+_CLIENT_LOCK = threading.Lock()
+
+
+class YouTubeClient:
+    """Authorized HTTP session for the YouTube upload endpoints."""
+
+    def __init__(self, credentials: Credentials) -> None:
+        self.credentials = credentials
+        self.session = AuthorizedSession(credentials)
+
+
+def _require_env(name: str) -> str:
+    val = os.getenv(name)
+    if not val:
+        raise RuntimeError(f"Missing required env var: {name}")
+    return val
+
+
+def get_youtube_client() -> YouTubeClient:
+    """The process-wide client for the YT_* credentials, authorized on first use."""
+    global _CLIENT, _CLIENT_KEY
+    client_id = _require_env("YT_CLIENT_ID")
+    client_secret = _require_env("YT_CLIENT_SECRET")
+    refresh_token = _require_env("YT_REFRESH_TOKEN")
+    key = hashlib.sha256(
+        "\0".join([client_id, client_secret, refresh_token]).encode("utf-8")
+    ).hexdigest()
+
+    with _CLIENT_LOCK:
+        if _CLIENT is not None and _CLIENT_KEY == key:
+            return _CLIENT
+
+        creds = Credentials(
+            token=None,
+            refresh_token=refresh_token,
+            token_uri=TOKEN_URI,
+            client_id=client_id,
+            client_secret=client_secret,
+            scopes=[YOUTUBE_UPLOAD_SCOPE],
+        )
+        if not _load_cached_token(creds, key):
+            # IMPORTANT: refresh explicitly so we fail here (with a clear error) if auth is wrong
+            creds.refresh(Request())
+            _save_cached_token(creds, key)
+
+        _CLIENT, _CLIENT_KEY = YouTubeClient(creds), key
+        return _CLIENT
+
+
+def _token_cache_path() -> Path | None:
+    if os.getenv("GP_YOUTUBE_TOKEN_CACHE", "1") == "0":
+        return None
+    return cache_dir("youtube") / "token.json"
+
+
+def _load_cached_token(creds: Credentials, key: str) -> bool:
+    """Put a cached, still-valid access token for these credentials on `creds`."""
+    path = _token_cache_path()
+    if path is None:
+        return False
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+        expiry = dt.datetime.fromisoformat(state["expiry"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+    # google-auth keeps expiry as naive UTC.
+    if state.get("key") != key or expiry - TOKEN_EXPIRY_MARGIN <= _utcnow():
+        return False
+    creds.token = state["token"]
+    creds.expiry = expiry
+    remaining = int((expiry - _utcnow()).total_seconds())
+    print(f"[youtube_client] reusing cached access token ({remaining}s left)")
+    return True
+
+
+def _save_cached_token(creds: Credentials, key: str) -> None:
+    path = _token_cache_path()
+    if path is None or not creds.token or creds.expiry is None:
+        return
+    tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+    # Bearer token: readable by the owner only.
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"key": key, "token": creds.token, "expiry": creds.expiry.isoformat()}, f)
+    os.replace(tmp, path)
+
+
+def _utcnow() -> dt.datetime:
+    return dt.datetime.now(dt.timezone.utc).replace(tzinfo=None)
+
+
+def upload_resumable(
+    client: YouTubeClient,
+    path: str | Path,
+    body: dict,
+    part: str = "snippet,status",
+    mimetype: str = "video/mp4",
+    on_initiate: Callable[[], None] | None = None,
+) -> dict:
+    """
+    Upload `path` as a new video with metadata `body`; returns the video resource.
+    `on_initiate` runs before each new upload session (a videos.insert call)
+    is opened, but not when a saved session is resumed.
+    """
+    return _ResumableUpload(client, Path(path), body, part, mimetype, on_initiate).run()
+
+
+class _Retryable(Exception):
+    pass
+
+
+class _SessionExpired(Exception):
+    pass
+
+
+class _ResumableUpload:
+    def __init__(
+        self,
+        client: YouTubeClient,
+        path: Path,
+        body: dict,
+        part: str,
+        mimetype: str,
+        on_initiate: Callable[[], None] | None = None,
+    ) -> None:
+        self.session = client.session
+        self.on_initiate = on_initiate
+        self.path = path
+        self.body = body
+        self.part = part
+        self.mimetype = mimetype
+        self.size = path.stat().st_size
+        self.state_path = path.with_name(path.name + ".upload.json")
+        self.url = os.getenv("GP_YOUTUBE_UPLOAD_URL") or UPLOAD_URL
+        self.chunk = _align(int(_env_float("GP_UPLOAD_CHUNK_MB", 8.0) * 1024 * 1024))
+        self.chunk_seconds = _env_float("GP_UPLOAD_CHUNK_SECONDS", 15.0)
+        self.max_retries = int(_env_float("GP_UPLOAD_MAX_RETRIES", 8))
+        self.fingerprint = self._fingerprint()
+
+    def run(self) -> dict:
+        session_uri, offset = self._resume()
+        attempt = restarts = 0
+        with self.path.open("rb") as f:
+            while True:
+                try:
+                    if offset is None:
+                        offset, resource = self._query(session_uri)
+                        if resource is not None:
+                            return self._done(resource)
+                    resource, offset = self._send_chunk(f, session_uri, offset)
+                    if resource is not None:
+                        return self._done(resource)
+                    attempt = 0
+                except _SessionExpired:
+                    restarts += 1
+                    if restarts > 3:
+                        raise RuntimeError(
+                            "YouTube API upload failed: upload session keeps expiring"
+                        )
+                    print("[upload_youtube] upload session expired; starting a new one")
+                    session_uri, offset = self._initiate(), 0
+                except _Retryable as exc:
+                    attempt += 1
+                    if attempt > self.max_retries:
+                        raise RuntimeError(
+                            f"YouTube API upload failed after {self.max_retries} retries: {exc}"
+                        ) from None
+                    # Smaller chunks lose less on a flaky connection.
+                    self.chunk = _align(self.chunk // 2)
+                    delay = random.uniform(0, min(60.0, 2.0**attempt))
+                    print(
+                        f"[upload_youtube] {exc}; retry {attempt}/{self.max_retries} "
+                        f"in {delay:.1f}s"
+                    )
+                    time.sleep(delay)
+                    offset = None  # ask the server what it actually has
+
+    def _resume(self) -> tuple[str, int | None]:
+        """Saved session for this file and metadata, or a new one."""
+        try:
+            state = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            state = None
+        if state and state.get("fingerprint") == self.fingerprint and state.get("session_uri"):
+            print(
+                f"[upload_youtube] resuming upload session "
+                f"(last saved offset {state.get('offset', 0)}/{self.size} bytes)"
+            )
+            return state["session_uri"], None
+        return self._initiate(), 0
+
+    def _initiate(self) -> str:
+        if self.on_initiate is not None:
+            self.on_initiate()
+
+        def start() -> requests.Response:
+            return self.session.post(
+                self.url,
+                params={"uploadType": "resumable", "part": self.part},
+                json=self.body,
+                headers={
+                    "X-Upload-Content-Type": self.mimetype,
+                    "X-Upload-Content-Length": str(self.size),
+                },
+                timeout=(10, 60),
+            )
+
+        resp = self._with_retries(start)
+        session_uri = resp.headers.get("Location")
+        if resp.status_code != 200 or not session_uri:
+            _raise_api_error(resp)
+        self._save(session_uri, 0)
+        return session_uri
+
+    def _query(self, session_uri: str) -> tuple[int, dict | None]:
+        """Server-side offset of the session (or the resource if it already completed)."""
+        resp = self._call(
+            lambda: self.session.put(
+                session_uri,
+                data=b"",
+                headers={"Content-Range": f"bytes */{self.size}"},
+                timeout=(10, 60),
+            )
+        )
+        if resp.status_code in (200, 201):
+            return self.size, resp.json()
+        if resp.status_code == 308:
+            return _next_offset(resp), None
+        if resp.status_code in (404, 410):
+            raise _SessionExpired()
+        _raise_api_error(resp)
+
+    def _send_chunk(self, f, session_uri: str, offset: int) -> tuple[dict | None, int]:
+        f.seek(offset)
+        data = f.read(self.chunk)
+        end = offset + len(data) - 1
+        started = time.perf_counter()
+        with span("upload.chunk", offset=offset, bytes=len(data)) as current:
+            resp = self._call(
+                lambda: self.session.put(
+                    session_uri,
+                    data=data,
+                    headers={
+                        "Content-Type": self.mimetype,
+                        "Content-Range": f"bytes {offset}-{end}/{self.size}",
+                    },
+                    timeout=(10, max(60.0, self.chunk_seconds * 8)),
+                )
+            )
+            current["status"] = resp.status_code
+        elapsed = time.perf_counter() - started
+        if resp.status_code in (200, 201):
+            return resp.json(), self.size
+        if resp.status_code in (404, 410):
+            raise _SessionExpired()
+        if resp.status_code != 308:
+            _raise_api_error(resp)
+
+        new_offset = _next_offset(resp)
+        self._save(session_uri, new_offset)
+        rate = (new_offset - offset) / max(elapsed, 1e-3)
+        pct = int(new_offset * 100 / self.size)
+        print(
+            f"[upload_youtube] progress: {pct}% ({new_offset}/{self.size} bytes, "
+            f"chunk {len(data) / 1048576:.1f} MiB at {rate / 1048576:.2f} MiB/s)"
+        )
+        if new_offset > offset:
+            # Aim for chunk_seconds per request; grow at most 2x per step.
+            self.chunk = min(_align(int(rate * self.chunk_seconds)), self.chunk * 2, MAX_CHUNK)
+        return None, new_offset
+
+    def _call(self, send) -> requests.Response:
+        """One request; transient failures raise _Retryable for the upload loop."""
+        try:
+            resp = send()
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            raise _Retryable(f"connection error: {exc}") from None
+        if resp.status_code in _RETRY_STATUSES:
+            raise _Retryable(f"HTTP {resp.status_code}")
+        return resp
+
+    def _with_retries(self, send) -> requests.Response:
+        for attempt in range(1, self.max_retries + 2):
+            try:
+                return self._call(send)
+            except _Retryable as exc:
+                if attempt > self.max_retries:
+                    raise RuntimeError(f"YouTube API upload failed: {exc}") from None
+                delay = random.uniform(0, min(60.0, 2.0**attempt))
+                print(f"[upload_youtube] {exc}; retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _done(self, resource: dict) -> dict:
+        self.state_path.unlink(missing_ok=True)
+        return resource
+
+    def _save(self, session_uri: str, offset: int) -> None:
+        tmp = self.state_path.with_name(self.state_path.name + ".tmp")
+        tmp.write_text(
+            json.dumps(
+                {
+                    "session_uri": session_uri,
+                    "offset": offset,
+                    "size": self.size,
+                    "fingerprint": self.fingerprint,
+                    "updated": time.time(),
+                },
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self.state_path)
+
+    def _fingerprint(self) -> str:
+        # A session is only valid for the same bytes and the same metadata.
+        st = self.path.stat()
+        payload = json.dumps(
+            [st.st_size, st.st_mtime_ns, self.url, self.part, self.body], sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _next_offset(resp: requests.Response) -> int:
+    # "Range: bytes=0-N" acknowledges N+1 bytes; no Range means none yet.
+    received = resp.headers.get("Range", "")
+    if not received.startswith("bytes=0-"):
+        return 0
+    return int(received.rsplit("-", 1)[1]) + 1
+
+
+def _raise_api_error(resp: requests.Response):
+    # Surface the real YouTube API error message.
+    raise RuntimeError(f"YouTube API upload failed:\n{resp.text}")
+
+
+def _align(size: int) -> int:
+    return max(CHUNK_ALIGN, size - size % CHUNK_ALIGN)
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return float(raw)
+    except ValueError as exc:
+        raise RuntimeError(f"{name} must be a number, got: {raw!r}") from exc
@@ -1,28 +1,33 @@
 import json
-import os
 from pathlib import Path
-from openai import OpenAI
 
+from geopilot_publisher.services.openai_client import (
+    create_chat_completion,
+    create_chat_completion_async,
+)
 
-def generate_ideas() -> dict:
+
+def generate_ideas(artifacts_dir: str | Path = "artifacts") -> dict:
     """
     Generate ONE AI Shorts idea and return a dict with keys:
       hook, premise, takeaway
 
     This is CI-safe:
     - Forces JSON output via response_format
-    - Writes raw model output to artifacts/idea_raw.txt for debugging
+    - Writes raw model output to <artifacts_dir>/idea_raw.txt for debugging
     - Falls back to a safe default if parsing fails
     """
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise RuntimeError("OPENAI_API_KEY is not set")
+    resp = create_chat_completion(_idea_request())
+    return _parse_idea(resp, artifacts_dir)
+
 
-    client = OpenAI(api_key=api_key)
+async def generate_ideas_async(artifacts_dir: str | Path = "artifacts") -> dict:
+    """generate_ideas() on the shared AsyncOpenAI client."""
+    resp = await create_chat_completion_async(_idea_request())
+    return _parse_idea(resp, artifacts_dir)
 
-    artifacts_dir = Path("artifacts")
-    artifacts_dir.mkdir(exist_ok=True)
 
+def _idea_request() -> dict:
     prompt = (
         "Generate ONE strong YouTube Shorts idea about AI.\n"
         "Return JSON only with keys: hook, premise, takeaway.\n"
@@ -30,13 +35,18 @@ def generate_ideas() -> dict:
     )
 
     # Force JSON output (prevents the exact failure you hit)
-    resp = client.chat.completions.create(
+    return dict(
         model="gpt-4o-mini",
         response_format={"type": "json_object"},
         messages=[{"role": "user", "content": prompt}],
         temperature=0.7,
     )
 
+
+def _parse_idea(resp, artifacts_dir: str | Path) -> dict:
+    artifacts_dir = Path(artifacts_dir)
+    artifacts_dir.mkdir(parents=True, exist_ok=True)
+
     text = (resp.choices[0].message.content or "").strip()
 
     # Always save raw output for debugging
@@ -61,4 +71,4 @@ def generate_ideas() -> dict:
             "takeaway": "The advantage isn’t learning every tool—it's learning how to think in workflows.",
         }
 
-    return {"hook": hook, "premise": premise, "takeaway": takeaway}
\ No newline at end of file
+    return {"hook": hook, "premise": premise, "takeaway": takeaway}
@@ -1,12 +1,28 @@
-from openai import OpenAI
-import os
+from typing import Callable
+
+from geopilot_publisher.services.openai_client import (
+    create_chat_completion,
+    create_chat_completion_async,
+    stream_chat_completion,
+)
 
 def generate_script(idea: dict) -> str:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise RuntimeError("OPENAI_API_KEY is not set")
-    client = OpenAI(api_key=api_key)
+    resp = create_chat_completion(_script_request(idea))
+    return resp.choices[0].message.content.strip()
+
+
+async def generate_script_async(idea: dict) -> str:
+    """generate_script() on the shared AsyncOpenAI client."""
+    resp = await create_chat_completion_async(_script_request(idea))
+    return resp.choices[0].message.content.strip()
+
 
+def generate_script_stream(idea: dict, on_text: Callable[[str], None]) -> str:
+    """generate_script() streamed: `on_text` receives the text as it is generated."""
+    return stream_chat_completion(_script_request(idea), on_text).strip()
+
+
+def _script_request(idea: dict) -> dict:
     prompt = f"""
 Write a 45–60 second YouTube Shorts script in a calm, analytical voice.
 
@@ -24,10 +40,8 @@ Rules:
 Return plain text only.
 """.strip()
 
-    resp = client.chat.completions.create(
+    return dict(
         model="gpt-4o-mini",
         messages=[{"role": "user", "content": prompt}],
         temperature=0.6,
-    )
-
-    return resp.choices[0].message.content.strip()
\ No newline at end of file
+    )
\ No newline at end of file
@@ -1,12 +1,56 @@
+import contextlib
+import copy
+import dataclasses
+import functools
 import hashlib
-import hashlib
+import json
 import math
+import multiprocessing
 import os
-import subprocess
+import shutil
 import tempfile
+import time
+from collections import deque
+from dataclasses import dataclass
 from pathlib import Path
 from random import Random
 
+import numpy as np
+
+from geopilot_publisher.models.render_profile import (
+    REFERENCE_WIDTH,
+    RenderProfile,
+    get_render_profile,
+    particle_count,
+)
+from geopilot_publisher.utils.captions import (
+    FONT_SIZE as CAPTION_FONT_SIZE,
+    Caption,
+    build_captions_from_script,
+    caption_margin_v,
+    caption_opacity,
+    caption_sprite,
+    fit_captions_to_duration,
+    write_ass,
+)
+from geopilot_publisher.utils.ffmpeg import (
+    EncoderSettings,
+    FfmpegProcess,
+    build_concat_command,
+    build_encode_command,
+    cached_aac,
+    image_sequence_input_args,
+    rawvideo_input_args,
+    run_ffmpeg,
+)
+from geopilot_publisher.utils.frame_store import FrameStore
+from geopilot_publisher.utils.layer_cache import cached_layer
+from geopilot_publisher.utils.logging import span
+from geopilot_publisher.utils.paths import cache_dir
+from geopilot_publisher.utils.particles import CellGrid, ParticleField
+from geopilot_publisher.utils.probe import media_duration
+from geopilot_publisher.utils.sprites import blit_sprite, measure_text, text_sprite
+
 try:
     from PIL import Image, ImageDraw, ImageFilter, ImageFont
 except Exception as exc:  # pragma: no cover - dependency guard
@@ -16,38 +60,230 @@ except Exception as exc:  # pragma: no cover - dependency guard
     ) from exc
 
 
-def render_video(script: str, audio_path: str) -> str:
+def render_video(
+    script: str,
+    audio_path: str,
+    profile: RenderProfile | str | None = None,
+    captions: bool | None = None,
+    keywords: list[str] | None = None,
+    out_dir: str | Path | None = None,
+    prep: "RenderPrep | None" = None,
+) -> str:
     """
     GeoPilots-themed particle network animation.
-    Frames are rendered in Python; ffmpeg encodes and muxes audio.
+    Frames are rendered in Python and streamed as raw RGBA over stdin to a
+    single ffmpeg process that encodes and muxes audio as frames arrive; the
+    voice track is AAC-encoded once per content hash and stream-copied.
+    Encoder settings come from the profile plus GP_X264_* env overrides
+    (see utils.ffmpeg.EncoderSettings).
+    Set GP_RENDER_PNG_FRAMES=1 to write PNG frames to a temp dir instead
+    (debug path: the same single encode + mux runs after the frame loop).
+    Frame state is a pure function of the frame index, so frames can be
+    rendered across a process pool (GP_RENDER_WORKERS, default: all cores);
+    the output is identical to the serial path (GP_RENDER_WORKERS=1).
+    The particle network does not depend on the script: with
+    GP_PARTICLE_LAYER=1 it is pre-rendered once per render profile into a
+    lossless frame store shared by all videos, and each video only draws
+    its keyword layer on top (same output, a fraction of the work).
+    `captions` (or GP_CAPTIONS=1) burns in captions from the script, timed
+    to the voice track, as a layer drawn in the same frame loop; the same
+    cues are written to artifacts/captions.ass.
+    `profile` (or GP_RENDER_PROFILE) picks size/fps/encoder speed, e.g.
+    "draft" for quick previews; the default "final" is the publish output.
+    Set GP_RENDER_SEGMENTS=1 for long renders: the timeline is encoded as
+    GOP-aligned segments (GP_SEGMENT_SECONDS, default 10) by parallel ffmpeg
+    processes, checkpointed under the cache dir, and joined losslessly; a
+    rerun after a crash only redoes the missing segments.
+    `keywords` defaults to artifacts/keywords.txt; `out_dir` (default
+    artifacts/) receives the outputs, e.g. one dir per batch item.
+    `prep` is a prepare_render() result built ahead of time (e.g. while
+    TTS runs); it fixes profile, keywords and captions.
     Output: artifacts/video.mp4
     """
-    artifacts_dir = Path("artifacts")
-    artifacts_dir.mkdir(exist_ok=True)
+    artifacts_dir = Path(out_dir) if out_dir is not None else Path("artifacts")
+    artifacts_dir.mkdir(parents=True, exist_ok=True)
 
     out_path = artifacts_dir / "video.mp4"
-    tmp_video = artifacts_dir / "video_tmp.mp4"
     audio_path = str(audio_path)
 
     ffmpeg = os.getenv("FFMPEG_BIN", "ffmpeg")
     ffprobe = os.getenv("FFPROBE_BIN", "ffprobe")
-    W, H, FPS = 1080, 1920, 30
 
-    tracking = 2.0
-    duration = _get_audio_duration(ffprobe, audio_path)
+    duration = media_duration(audio_path, ffprobe)
     if duration <= 0:
-        raise RuntimeError(f"Invalid audio duration from ffprobe: {duration}")
+        raise RuntimeError(f"Invalid audio duration: {duration}")
+
+    if prep is None:
+        prep = prepare_render(script, profile, keywords=keywords, captions=captions)
+    profile = prep.profile
+    scene = _build_scene(script, duration, profile, prep=prep)
+    if scene.captions:
+        write_ass(scene.captions, artifacts_dir / "captions.ass")
+    settings = EncoderSettings.from_env(profile.x264_preset)
+    aac_path = cached_aac(ffmpeg, audio_path, settings.audio_bitrate)
+    workers = _render_workers()
+    segmented = os.getenv("GP_RENDER_SEGMENTS") == "1"
+    png_frames = os.getenv("GP_RENDER_PNG_FRAMES") == "1"
+    output = "segments" if segmented else "png" if png_frames else "stream"
+    print(
+        f"[render_video] profile={profile.name} {scene.width}x{scene.height} "
+        f"frames={scene.total_frames} fps={scene.fps} "
+        f"workers={workers} output={output} captions={len(scene.captions)}"
+    )
+
+    if os.getenv("GP_PARTICLE_LAYER") == "1":
+        scene.particle_layer = _particle_layer_store(scene)
+        with span("render.particle_layer"):
+            _ensure_particle_layer(ffmpeg, scene, workers)
+
+    if segmented:
+        _render_segmented(
+            ffmpeg,
+            scene,
+            settings,
+            aac_path,
+            out_path,
+            workers,
+            _segment_run_key(script, profile, scene, settings),
+        )
+    else:
+        _render_single_pass(ffmpeg, scene, settings, aac_path, out_path, workers, png_frames)
+
+    if not out_path.exists() or out_path.stat().st_size == 0:
+        raise RuntimeError("video.mp4 was not created or is empty")
+
+    return str(out_path)
+
+
+def _render_single_pass(
+    ffmpeg: str,
+    scene: "_Scene",
+    settings: EncoderSettings,
+    aac_path: Path,
+    out_path: Path,
+    workers: int,
+    png_frames: bool,
+) -> None:
+    with contextlib.ExitStack() as stack:
+        encoder = None
+        frames_path = None
+        if png_frames:
+            frames_path = Path(
+                stack.enter_context(tempfile.TemporaryDirectory(prefix="geopilot_frames_"))
+            )
+        else:
+            encoder = stack.enter_context(
+                FfmpegProcess(
+                    build_encode_command(
+                        ffmpeg,
+                        rawvideo_input_args(scene.width, scene.height, scene.fps),
+                        aac_path,
+                        out_path,
+                        settings,
+                        audio_copy=True,
+                    ),
+                    "stream encode",
+                    stdin=True,
+                )
+            )
 
-    total_frames = max(1, int(math.ceil(duration * FPS)))
+        # Frames are produced and written to the encoder in one loop, so this
+        # span includes time blocked on ffmpeg (see the ffmpeg.* spans).
+        with span("render.frames", frames=scene.total_frames, workers=workers):
+            for idx, data in _iter_frame_bytes(ffmpeg, scene, workers):
+                if encoder is not None:
+                    encoder.write(data)
+                else:
+                    frame = Image.frombytes("RGBA", (scene.width, scene.height), data)
+                    frame.save(frames_path / f"frame_{idx:06d}.png")
+
+        if encoder is not None:
+            encoder.finish()
+        else:
+            run_ffmpeg(
+                build_encode_command(
+                    ffmpeg,
+                    image_sequence_input_args(frames_path / "frame_%06d.png", scene.fps),
+                    aac_path,
+                    out_path,
+                    settings,
+                    audio_copy=True,
+                ),
+                "encode",
+            )
+
+
+@dataclass
+class _Scene:
+    """Everything needed to render any frame index independently."""
+
+    width: int
+    height: int
+    fps: int
+    total_frames: int
+    base_bg: Image.Image
+    particles: ParticleField
+    connect_dist: float
+    line_max_alpha: int
+    line_width: int
+    glow_radius: float
+    point_color: tuple[int, int, int, int]
+    line_color: tuple[int, int, int]
+    keyword_color: tuple[int, int, int, int]
+    keyword_font: ImageFont.ImageFont
+    tracking: float
+    keyword_nodes: list[dict]
+    keyword_track: list[list[tuple[float, float, int, bool]]]
+    # Pre-rendered background + particles per frame (GP_PARTICLE_LAYER=1).
+    particle_layer: FrameStore | None = None
+    # Burned-in captions, timed in seconds of the voice track, and their
+    # sprites (same order), rasterized once for this render.
+    captions: list[Caption] = dataclasses.field(default_factory=list)
+    caption_sprites: list[Image.Image] = dataclasses.field(default_factory=list)
+
+
+@dataclass
+class RenderPrep:
+    """
+    Render setup that needs the script and keywords but not the audio:
+    profile, background plate, particles, fonts, keyword layout, warm text
+    sprites and the caption sprites. `scene` has no timeline yet
+    (total_frames=0).
+    """
+
+    script: str
+    profile: RenderProfile
+    scene: _Scene
+
+
+def prepare_render(
+    script: str,
+    profile: RenderProfile | str | None = None,
+    keywords: list[str] | None = None,
+    captions: bool | None = None,
+) -> RenderPrep:
+    """Do the duration-independent part of render_video (see `prep` there)."""
+    if not isinstance(profile, RenderProfile):
+        profile = get_render_profile(profile)
+    if captions is None:
+        captions = os.getenv("GP_CAPTIONS") == "1"
+
+    W, H, FPS = profile.width, profile.height, profile.fps
+    # Constants below are tuned for 1080x1920 @ 30 fps; `scale` maps lengths
+    # and `motion` maps per-frame speeds onto the profile.
+    scale = profile.scale
+    motion = profile.motion
+
+    tracking = 2.0 * scale
 
     # Visual tuning (GeoPilots theme)
-    particle_count = 64
-    max_speed = 0.35
-    min_speed = 0.12
-    connect_dist = 205.0
+    n_particles = particle_count(profile)
+    max_speed = 0.35 * motion
+    min_speed = 0.12 * motion
+    connect_dist = 205.0 * scale
     line_max_alpha = 170
-    point_min_r = 2.1
-    point_max_r = 3.1
+    point_min_r = 2.1 * scale
+    point_max_r = 3.1 * scale
 
     bg_top = (9, 24, 58)
     bg_bottom = (6, 36, 88)
@@ -56,21 +292,20 @@ def render_video(script: str, audio_path: str) -> str:
     line_color = (90, 200, 210)
     keyword_color = (220, 240, 255, 190)
 
-    rng = Random(42)
-    particles = []
-    for _ in range(particle_count):
-        x = rng.uniform(0, W)
-        y = rng.uniform(0, H)
-        speed = rng.uniform(min_speed, max_speed)
-        angle = rng.uniform(0, math.tau)
-        vx = math.cos(angle) * speed
-        vy = math.sin(angle) * speed
-        r = rng.uniform(point_min_r, point_max_r)
-        particles.append([x, y, vx, vy, r])
-
-    base_bg = _build_background(W, H, bg_top, bg_bottom, grid_color)
-    keywords = _load_keywords(Path("artifacts") / "keywords.txt")
-    keyword_font = _load_keyword_font(size=42)
+    particles = ParticleField.random(
+        n_particles,
+        W,
+        H,
+        speed=(min_speed, max_speed),
+        radius=(point_min_r, point_max_r),
+    )
+
+    base_bg = _build_background(
+        W, H, bg_top, bg_bottom, grid_color, grid_spacing=max(2, round(120 * scale))
+    )
+    if keywords is None:
+        keywords = _load_keywords(Path("artifacts") / "keywords.txt")
+    keyword_font = _load_keyword_font(size=max(8, round(42 * scale)))
     keyword_nodes = _init_keyword_nodes(
         script,
         keywords,
@@ -78,121 +313,628 @@ def render_video(script: str, audio_path: str) -> str:
         H,
         keyword_font,
         tracking,
+        scale=scale,
+        motion=motion,
+    )
+    for node in keyword_nodes:
+        text_sprite(node["text"], keyword_font, tracking)
+
+    caption_cues = []
+    caption_sprites = []
+    if captions:
+        caption_font = _load_keyword_font(size=max(8, round(CAPTION_FONT_SIZE * scale)))
+        # Line breaks are measured at the 1080 px layout, so every profile
+        # (and captions.ass) gets the same lines.
+        caption_cues = build_captions_from_script(
+            script, font=_load_keyword_font(size=CAPTION_FONT_SIZE)
+        )
+        caption_sprites = [caption_sprite(c, caption_font, scale) for c in caption_cues]
+
+    scene = _Scene(
+        width=W,
+        height=H,
+        fps=FPS,
+        total_frames=0,
+        base_bg=base_bg,
+        particles=particles,
+        connect_dist=connect_dist,
+        line_max_alpha=line_max_alpha,
+        line_width=max(1, round(2 * scale)),
+        glow_radius=1.2 * scale,
+        point_color=point_color,
+        line_color=line_color,
+        keyword_color=keyword_color,
+        keyword_font=keyword_font,
+        tracking=tracking,
+        keyword_nodes=keyword_nodes,
+        keyword_track=[],
+        captions=caption_cues,
+        caption_sprites=caption_sprites,
+    )
+    return RenderPrep(script=script, profile=profile, scene=scene)
+
+
+def _build_scene(
+    script: str,
+    duration: float,
+    profile: RenderProfile,
+    keywords: list[str] | None = None,
+    captions: bool = False,
+    prep: RenderPrep | None = None,
+) -> _Scene:
+    """Scene for a `duration`-second timeline (from `prep` when given)."""
+    if prep is None:
+        prep = prepare_render(script, profile, keywords=keywords, captions=captions)
+    template = prep.scene
+    total_frames = max(1, int(math.ceil(duration * template.fps)))
+    # Keyword nodes push each other apart, so their paths are coupled; the
+    # whole track is cheap to simulate once up front and then indexed per frame.
+    # The simulation moves the nodes, so it runs on a copy of the layout.
+    keyword_nodes = copy.deepcopy(template.keyword_nodes)
+    keyword_track = _simulate_keyword_track(
+        keyword_nodes,
+        total_frames,
+        template.fps,
+        template.width,
+        template.height,
+        scale=prep.profile.scale,
+        motion=prep.profile.motion,
+    )
+    return dataclasses.replace(
+        template,
+        total_frames=total_frames,
+        keyword_nodes=keyword_nodes,
+        keyword_track=keyword_track,
+        captions=fit_captions_to_duration(template.captions, duration),
+    )
+
+
+def _render_workers() -> int:
+    raw = os.getenv("GP_RENDER_WORKERS", "").strip()
+    if not raw:
+        return os.cpu_count() or 1
+    try:
+        workers = int(raw)
+    except ValueError as exc:
+        raise RuntimeError(f"GP_RENDER_WORKERS must be an integer, got: {raw!r}") from exc
+    return max(1, workers)
+
+
+class _PhaseTimer:
+    """Accumulates wall time per render phase into `totals`; no-op when None."""
+
+    __slots__ = ("totals", "last")
+
+    def __init__(self, totals: dict[str, float] | None) -> None:
+        self.totals = totals
+        self.last = time.perf_counter() if totals is not None else 0.0
+
+    def lap(self, phase: str) -> None:
+        if self.totals is None:
+            return
+        now = time.perf_counter()
+        self.totals[phase] = self.totals.get(phase, 0.0) + (now - self.last)
+        self.last = now
+
+
+def _render_frame(
+    scene: _Scene,
+    idx: int,
+    timings: dict[str, float] | None = None,
+    base: Image.Image | None = None,
+) -> Image.Image:
+    """
+    Render frame `idx`; pass `timings` to accumulate per-phase seconds.
+    `base` is the frame's particle layer when it comes from the frame store;
+    keywords are drawn onto it in place.
+    """
+    timer = _PhaseTimer(timings)
+    frame = base if base is not None else _render_particles(scene, idx, timer)
+    if scene.keyword_nodes:
+        _draw_keywords(scene, frame, idx, timer)
+    if scene.captions:
+        _draw_captions(scene, frame, idx)
+        timer.lap("captions")
+    return frame
+
+
+def _render_particles(scene: _Scene, idx: int, timer: _PhaseTimer) -> Image.Image:
+    """Background, connections, points and glow: the script-independent layer."""
+    W, H = scene.width, scene.height
+    field = scene.particles
+    positions = field.positions(idx)
+
+    frame = scene.base_bg.copy()
+    overlay = Image.new("RGBA", (W, H), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay, "RGBA")
+
+    # Connections
+    line_color = scene.line_color
+    edge_i, edge_j, edge_alpha = field.connections(
+        positions,
+        scene.connect_dist,
+        scene.line_max_alpha,
+        grid=CellGrid(positions, scene.connect_dist),
     )
+    coords = positions.tolist()
+    for i, j, alpha in zip(edge_i.tolist(), edge_j.tolist(), edge_alpha.tolist()):
+        draw.line(
+            (*coords[i], *coords[j]),
+            fill=(line_color[0], line_color[1], line_color[2], alpha),
+            width=scene.line_width,
+        )
+    timer.lap("connections")
 
-    with tempfile.TemporaryDirectory(prefix="geopilot_frames_") as frames_dir:
-        frames_path = Path(frames_dir)
-        for idx in range(total_frames):
-            frame = base_bg.copy()
-            overlay = Image.new("RGBA", (W, H), (0, 0, 0, 0))
-            draw = ImageDraw.Draw(overlay, "RGBA")
-
-            # Connections
-            for i in range(particle_count):
-                x1, y1, _, _, _ = particles[i]
-                for j in range(i + 1, particle_count):
-                    x2, y2, _, _, _ = particles[j]
-                    dx = x2 - x1
-                    dy = y2 - y1
-                    dist = math.hypot(dx, dy)
-                    if dist < connect_dist:
-                        alpha = int((1.0 - dist / connect_dist) * line_max_alpha)
-                        if alpha > 0:
-                            draw.line(
-                                (x1, y1, x2, y2),
-                                fill=(line_color[0], line_color[1], line_color[2], alpha),
-                                width=2,
-                            )
-
-            # Points
-            for i in range(particle_count):
-                x, y, vx, vy, r = particles[i]
-                draw.ellipse(
-                    (x - r, y - r, x + r, y + r),
-                    fill=point_color,
+    # Points
+    for (x, y), r in zip(coords, field.radii.tolist()):
+        draw.ellipse(
+            (x - r, y - r, x + r, y + r),
+            fill=scene.point_color,
+        )
+    timer.lap("points")
+
+    # Soft glow to slightly lift particles and edges
+    _composite_glow(frame, overlay, radius=scene.glow_radius)
+    timer.lap("glow")
+    return frame
+
+
+def _draw_keywords(scene: _Scene, frame: Image.Image, idx: int, timer: _PhaseTimer) -> None:
+    """Keyword semantic nodes (persistent, moving, opacity-scheduled)."""
+    field = scene.particles
+    # Keywords are drawn after the particle step, so anchors follow the
+    # particles' next position. Positions are closed-form, so this needs no
+    # per-frame table when the particle layer comes from the frame store.
+    states = scene.keyword_track[idx]
+    next_positions = field.positions(idx + 1)
+    centers = [
+        (x + node["w"] / 2, y + node["h"] / 2)
+        for node, (x, y, _, _) in zip(scene.keyword_nodes, states)
+    ]
+    anchors = field.nearest(
+        next_positions, centers, grid=CellGrid(next_positions, scene.connect_dist)
+    ).tolist()
+    next_coords = next_positions.tolist()
+    timer.lap("keyword_update")
+    text_draw = ImageDraw.Draw(frame, "RGBA")
+    keyword_color = scene.keyword_color
+    for node, (x, y, alpha, active), anchor in zip(scene.keyword_nodes, states, anchors):
+        if alpha <= 0:
+            continue
+        color = (keyword_color[0], keyword_color[1], keyword_color[2], alpha)
+        sprite = text_sprite(node["text"], scene.keyword_font, scene.tracking)
+        blit_sprite(text_draw, sprite, (int(x), int(y)), color)
+        if active:
+            ax, ay = next_coords[anchor]
+            line_alpha = int(alpha * 0.15)
+            if line_alpha > 0:
+                text_draw.line(
+                    (
+                        int(x + node["w"] / 2),
+                        int(y + node["h"] / 2),
+                        ax,
+                        ay,
+                    ),
+                    fill=(90, 200, 210, line_alpha),
+                    width=1,
                 )
+    timer.lap("keyword_draw")
 
-                # Update position with soft bounds
-                nx = x + vx
-                ny = y + vy
-                if nx < 0 or nx > W:
-                    vx = -vx
-                    nx = x + vx
-                if ny < 0 or ny > H:
-                    vy = -vy
-                    ny = y + vy
-                particles[i][0] = nx
-                particles[i][1] = ny
-                particles[i][2] = vx
-                particles[i][3] = vy
-
-            # Soft glow to slightly lift particles and edges
-            overlay = overlay.filter(ImageFilter.GaussianBlur(radius=1.2))
-            frame = Image.alpha_composite(frame, overlay)
-
-            # Keyword semantic nodes (persistent, moving, opacity-scheduled)
-            if keyword_nodes:
-                t = idx / FPS
-                text_draw = ImageDraw.Draw(frame, "RGBA")
-                _update_keyword_nodes(keyword_nodes, t, idx, W, H, particles)
-                for node in keyword_nodes:
-                    alpha = node["alpha"]
-                    if alpha <= 0:
-                        continue
-                    color = (keyword_color[0], keyword_color[1], keyword_color[2], alpha)
-                    _draw_text_with_tracking(
-                        text_draw,
-                        (int(node["x"]), int(node["y"])),
-                        node["text"],
-                        keyword_font,
-                        color,
-                        tracking,
-                    )
-                    if node["active"]:
-                        ax, ay = particles[node["anchor"]][0], particles[node["anchor"]][1]
-                        line_alpha = int(alpha * 0.15)
-                        if line_alpha > 0:
-                            text_draw.line(
-                                (
-                                    int(node["x"] + node["w"] / 2),
-                                    int(node["y"] + node["h"] / 2),
-                                    ax,
-                                    ay,
-                                ),
-                                fill=(90, 200, 210, line_alpha),
-                                width=1,
-                            )
-            frame_path = frames_path / f"frame_{idx:06d}.png"
-            frame.save(frame_path)
-
-        _encode_video(ffmpeg, frames_path, FPS, tmp_video)
-        _mux_audio(ffmpeg, tmp_video, audio_path, out_path)
 
-    if not out_path.exists() or out_path.stat().st_size == 0:
-        raise RuntimeError("video.mp4 was not created or is empty")
+def _draw_captions(scene: _Scene, frame: Image.Image, idx: int) -> None:
+    """Composite the caption(s) visible at frame `idx`, with their fades."""
+    t = idx / scene.fps
+    scale = scene.width / REFERENCE_WIDTH
+    bottom = scene.height - round(caption_margin_v() * scale)
+    for caption, sprite in zip(scene.captions, scene.caption_sprites):
+        opacity = caption_opacity(caption, t)
+        if opacity <= 0:
+            continue
+        if opacity < 1:
+            sprite = sprite.copy()
+            sprite.putalpha(sprite.getchannel("A").point(lambda a: int(a * opacity)))
+        # Lines fit between the side margins, so the box never clips.
+        x = (scene.width - sprite.width) // 2
+        y = bottom - sprite.height
+        frame.alpha_composite(sprite, dest=(x, max(0, y)))
 
-    return str(out_path)
+
+_GLOW_TILE = 32
+_GLOW_CELL = 8
+_GLOW_MARGIN = 8
 
 
-def _get_audio_duration(ffprobe: str, audio_path: str) -> float:
-    cmd = [
-        ffprobe,
-        "-v",
-        "error",
-        "-show_entries",
-        "format=duration",
-        "-of",
-        "default=nk=1:nw=1",
-        audio_path,
+def _composite_glow(frame: Image.Image, overlay: Image.Image, radius: float) -> None:
+    """
+    Blur `overlay` and alpha-composite it onto `frame` in place.
+
+    Same result as blurring and compositing the whole overlay, but only the
+    tiles that can receive glow are touched. Drawn pixels are found on a fine
+    _GLOW_CELL grid, grown by one cell (>= the blur's reach) and rolled up
+    into _GLOW_TILE tiles. Each horizontal run of tiles is blurred from a
+    crop padded by _GLOW_MARGIN, so the pixels kept are exactly those of a
+    full-frame blur. Most of a frame's ~2M overlay pixels are transparent,
+    so this skips most of the convolution work.
+    """
+    W, H = overlay.size
+    cell = _GLOW_CELL
+    tile = _GLOW_TILE
+    per_tile = tile // cell
+    rows = -(-H // tile)
+    cols = -(-W // tile)
+    alpha = np.asarray(overlay.getchannel("A"))
+    padded = np.zeros((rows * tile, cols * tile), dtype=bool)
+    padded[:H, :W] = alpha > 0
+    fine = padded.reshape(rows * per_tile, cell, cols * per_tile, cell).any(axis=(1, 3))
+    grown = fine.copy()
+    grown[1:, :] |= fine[:-1, :]
+    grown[:-1, :] |= fine[1:, :]
+    spread = grown.copy()
+    spread[:, 1:] |= grown[:, :-1]
+    spread[:, :-1] |= grown[:, 1:]
+    dirty = spread.reshape(rows, per_tile, cols, per_tile).any(axis=(1, 3))
+
+    blur = ImageFilter.GaussianBlur(radius=radius)
+    margin = _GLOW_MARGIN
+    for row in range(rows):
+        y0 = row * tile
+        y1 = min(y0 + tile, H)
+        col = 0
+        while col < cols:
+            if not dirty[row, col]:
+                col += 1
+                continue
+            run_start = col
+            while col < cols and dirty[row, col]:
+                col += 1
+            x0 = run_start * tile
+            x1 = min(col * tile, W)
+            cx0, cy0 = max(0, x0 - margin), max(0, y0 - margin)
+            cx1, cy1 = min(W, x1 + margin), min(H, y1 + margin)
+            blurred = overlay.crop((cx0, cy0, cx1, cy1)).filter(blur)
+            frame.alpha_composite(
+                blurred,
+                dest=(x0, y0),
+                source=(x0 - cx0, y0 - cy0, x1 - cx0, y1 - cy0),
+            )
+
+
+def _iter_frame_bytes(ffmpeg: str, scene: _Scene, workers: int):
+    """Yield (idx, rgba_bytes) in frame order, rendering serially or on a pool."""
+    if scene.particle_layer is not None:
+        # Only keywords left to draw: cheaper than shipping frames to a pool.
+        yield from _iter_layered_frames(ffmpeg, scene, 0, scene.total_frames)
+        return
+    if workers <= 1 or scene.total_frames < 2 * _POOL_CHUNK_FRAMES:
+        for idx in range(scene.total_frames):
+            yield idx, _render_frame(scene, idx).tobytes()
+        return
+
+    chunks = [
+        range(start, min(start + _POOL_CHUNK_FRAMES, scene.total_frames))
+        for start in range(0, scene.total_frames, _POOL_CHUNK_FRAMES)
     ]
-    p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    if p.returncode != 0:
-        err = p.stderr.decode("utf-8", errors="replace")
-        raise RuntimeError(f"ffprobe failed (exit {p.returncode}). stderr:\n{err}")
+    # Bound the chunks in flight so a slow encoder cannot make finished
+    # frames pile up in memory (each 1080x1920 RGBA frame is ~8 MB).
+    max_pending = workers * 2
+    with _pool_context().Pool(
+        workers, initializer=_init_pool_worker, initargs=(scene,)
+    ) as pool:
+        pending: deque = deque()
+        next_chunk = 0
+        while next_chunk < len(chunks) or pending:
+            while next_chunk < len(chunks) and len(pending) < max_pending:
+                frames = chunks[next_chunk]
+                pending.append(
+                    (frames, pool.apply_async(_render_chunk, (frames.start, frames.stop)))
+                )
+                next_chunk += 1
+            frames, result = pending.popleft()
+            for idx, data in zip(frames, result.get()):
+                yield idx, data
+
+
+_POOL_CHUNK_FRAMES = 4
+_POOL_SCENE: _Scene | None = None
+
+
+def _pool_context():
+    """
+    Start render workers from a forkserver (spawn where there is none), not
+    by forking this process. Renders run while other threads are live (the
+    batch LLM/TTS loop, upload workers, ffmpeg pipe readers), and a forked
+    child inherits whatever locks those threads hold, e.g. stdout or the
+    trace writer's. The server preloads this module, so workers start warm
+    and the scene arrives pickled through the initializer.
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    ctx = multiprocessing.get_context("forkserver")
+    ctx.set_forkserver_preload([__name__])
+    return ctx
+
+
+def _init_pool_worker(scene: _Scene) -> None:
+    global _POOL_SCENE
+    _POOL_SCENE = scene
+
+
+def _render_chunk(start: int, stop: int) -> list[bytes]:
+    return [_render_frame(_POOL_SCENE, idx).tobytes() for idx in range(start, stop)]
+
+
+def _run_scene_jobs(scene: _Scene, workers: int, label: str, job, jobs: list[tuple]) -> None:
+    """Run `job(*args)` for every args tuple on a scene pool (inline for <= 1)."""
+    if workers <= 1 or len(jobs) <= 1:
+        _init_pool_worker(scene)
+        for args in jobs:
+            print(f"[render_video] {label} {job(*args)} done")
+        return
+    with _pool_context().Pool(
+        min(workers, len(jobs)), initializer=_init_pool_worker, initargs=(scene,)
+    ) as pool:
+        for result in pool.imap_unordered(_call_scene_job, [(job, args) for args in jobs]):
+            print(f"[render_video] {label} {result} done")
+
+
+def _call_scene_job(call: tuple):
+    job, args = call
+    return job(*args)
+
+
+def _iter_layered_frames(ffmpeg: str, scene: _Scene, start: int, stop: int):
+    """Yield (idx, rgba_bytes) for [start, stop): stored particle layer + keywords."""
+    size = (scene.width, scene.height)
+    layer = scene.particle_layer.read(ffmpeg, start, stop)
+    for idx, data in zip(range(start, stop), layer):
+        base = Image.frombytes("RGBA", size, data)
+        yield idx, _render_frame(scene, idx, base=base).tobytes()
+
+
+# Bump when the particle layer's drawing code changes its output.
+_PARTICLE_LAYER_VERSION = 1
+_PARTICLE_LAYER_CHUNK_SECONDS = 10
+
+
+def _particle_layer_store(scene: _Scene) -> FrameStore:
+    """Frame store for the scene's particle layer, keyed by everything that draws it."""
+    field = scene.particles
+    params = {
+        "version": _PARTICLE_LAYER_VERSION,
+        "pillow": Image.__version__,
+        "size": [scene.width, scene.height, scene.fps],
+        "connect_dist": scene.connect_dist,
+        "line_max_alpha": scene.line_max_alpha,
+        "line_width": scene.line_width,
+        "glow_radius": scene.glow_radius,
+        "point_color": scene.point_color,
+        "line_color": scene.line_color,
+    }
+    h = hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8"))
+    for values in (field.x, field.y, field.vx, field.vy, field.radii):
+        h.update(values.tobytes())
+    h.update(scene.base_bg.tobytes())
+    return FrameStore.open(
+        "particles",
+        h.hexdigest(),
+        scene.width,
+        scene.height,
+        scene.fps,
+        chunk_frames=scene.fps * _PARTICLE_LAYER_CHUNK_SECONDS,
+    )
+
+
+def _ensure_particle_layer(ffmpeg: str, scene: _Scene, workers: int) -> None:
+    """Render whichever particle layer chunks this timeline needs but the store lacks."""
+    store = scene.particle_layer
+    missing = store.missing_chunks(scene.total_frames)
+    needed = -(-scene.total_frames // store.chunk_frames)
+    print(
+        f"[render_video] particle layer chunks={needed} "
+        f"cached={needed - len(missing)} store={store.root}"
+    )
+    _run_scene_jobs(
+        scene, workers, "particle chunk", _render_layer_chunk, [(ffmpeg, i) for i in missing]
+    )
+
+
+def _render_layer_chunk(ffmpeg: str, index: int) -> int:
+    scene = _POOL_SCENE
+    store = scene.particle_layer
+    partial = store.partial_path(index)
+    cmd = store.encode_command(ffmpeg, partial)
+    try:
+        with FfmpegProcess(cmd, f"particle chunk {index}", stdin=True) as encoder:
+            for idx in store.chunk_range(index):
+                frame = _render_particles(scene, idx, _PhaseTimer(None))
+                encoder.write(frame.tobytes())
+            encoder.finish()
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    store.commit(index, partial)
+    return index
+
+
+# Bump when the segment/checkpoint layout or frame output changes, so stale
+# work dirs from older code are never resumed.
+_SEGMENT_FORMAT_VERSION = 1
+
+
+def _segment_seconds() -> float:
+    raw = os.getenv("GP_SEGMENT_SECONDS", "").strip()
+    if not raw:
+        return 10.0
     try:
-        return float(p.stdout.decode("utf-8").strip())
+        seconds = float(raw)
     except ValueError as exc:
-        raise RuntimeError("Unable to parse ffprobe duration output") from exc
+        raise RuntimeError(f"GP_SEGMENT_SECONDS must be a number, got: {raw!r}") from exc
+    if seconds <= 0:
+        raise RuntimeError(f"GP_SEGMENT_SECONDS must be positive, got: {raw!r}")
+    return seconds
+
+
+def _segment_run_key(
+    script: str,
+    profile: RenderProfile,
+    scene: "_Scene",
+    settings: EncoderSettings,
+) -> str:
+    """Identity of a segmented render: same key, same segments."""
+    payload = {
+        "version": _SEGMENT_FORMAT_VERSION,
+        "script": script,
+        "keywords": [node["text"] for node in scene.keyword_nodes],
+        "profile": [profile.name, profile.width, profile.height, profile.fps],
+        "particles": len(scene.particles),
+        "total_frames": scene.total_frames,
+        "encoder": [
+            settings.preset,
+            settings.crf,
+            settings.bitrate,
+            settings.tune,
+            settings.threads,
+        ],
+        "segment_seconds": _segment_seconds(),
+        "captions": [
+            [c.start_s, c.end_s, c.line1, c.line2] for c in scene.captions
+        ],
+    }
+    raw = json.dumps(payload, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _plan_segments(scene: "_Scene") -> tuple[int, list[range]]:
+    """(gop, frame ranges): every segment is a whole number of GOPs."""
+    gop = max(1, scene.fps * 2)
+    gops_per_segment = max(1, round(_segment_seconds() * scene.fps / gop))
+    length = gop * gops_per_segment
+    segments = [
+        range(start, min(start + length, scene.total_frames))
+        for start in range(0, scene.total_frames, length)
+    ]
+    return gop, segments
+
+
+def _segment_state(scene: "_Scene", start: int) -> dict:
+    """Simulation state at a segment's first frame (checkpointed with it)."""
+    positions = scene.particles.positions(start)
+    state = {
+        "frame": start,
+        "particles": [[round(x, 6), round(y, 6)] for x, y in positions.tolist()],
+        "keywords": [list(entry) for entry in scene.keyword_track[start]]
+        if scene.keyword_nodes
+        else [],
+    }
+    raw = json.dumps(state, sort_keys=True).encode("utf-8")
+    state["hash"] = hashlib.sha256(raw).hexdigest()
+    return state
+
+
+def _segment_done(work_dir: Path, index: int, frames: range, state_hash: str) -> bool:
+    checkpoint = work_dir / f"seg_{index:05d}.json"
+    video = work_dir / f"seg_{index:05d}.mp4"
+    if not checkpoint.exists() or not video.exists() or video.stat().st_size == 0:
+        return False
+    try:
+        meta = json.loads(checkpoint.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    return (
+        meta.get("start") == frames.start
+        and meta.get("stop") == frames.stop
+        and meta.get("state", {}).get("hash") == state_hash
+    )
+
+
+def _render_segmented(
+    ffmpeg: str,
+    scene: "_Scene",
+    settings: EncoderSettings,
+    aac_path: Path,
+    out_path: Path,
+    workers: int,
+    run_key: str,
+) -> None:
+    """
+    Render the timeline as independent GOP-aligned segments, each encoded by
+    its own ffmpeg process (up to `workers` at once) and checkpointed in a
+    persistent work dir keyed by `run_key`. Segments whose checkpoint matches
+    are reused, so a rerun after a crash only redoes what is missing. The
+    segments are joined with the concat demuxer (stream copy) and muxed with
+    the cached AAC track in one final ffmpeg call.
+    """
+    work_dir = cache_dir("segments", run_key[:24])
+    gop, segments = _plan_segments(scene)
+
+    todo = []
+    for index, frames in enumerate(segments):
+        state = _segment_state(scene, frames.start)
+        if not _segment_done(work_dir, index, frames, state["hash"]):
+            todo.append((index, frames.start, frames.stop, state))
+    print(
+        f"[render_video] segments={len(segments)} gop={gop} "
+        f"reused={len(segments) - len(todo)} work_dir={work_dir}"
+    )
+
+    jobs = [(ffmpeg, str(work_dir), settings, gop, *job) for job in todo]
+    with span("render.segments", segments=len(jobs), workers=workers):
+        _run_scene_jobs(scene, workers, "segment", _render_segment, jobs)
+
+    list_path = work_dir / "segments.txt"
+    list_path.write_text(
+        "".join(f"file 'seg_{index:05d}.mp4'\n" for index in range(len(segments))),
+        encoding="utf-8",
+    )
+    run_ffmpeg(build_concat_command(ffmpeg, list_path, aac_path, out_path, settings), "concat")
+
+    if os.getenv("GP_KEEP_SEGMENTS") != "1":
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _render_segment(
+    ffmpeg: str,
+    work_dir: str,
+    settings: EncoderSettings,
+    gop: int,
+    index: int,
+    start: int,
+    stop: int,
+    state: dict,
+) -> int:
+    """Encode frames [start, stop) to seg_<index>.mp4, then write its checkpoint."""
+    scene = _POOL_SCENE
+    work = Path(work_dir)
+    video = work / f"seg_{index:05d}.mp4"
+    # Written under a temp name and renamed, so a killed encode never leaves a
+    # truncated segment behind; the checkpoint is written last.
+    tmp_video = work / f"seg_{index:05d}.partial.mp4"
+    cmd = build_encode_command(
+        ffmpeg,
+        rawvideo_input_args(scene.width, scene.height, scene.fps),
+        None,
+        tmp_video,
+        settings,
+        gop=gop,
+    )
+    if scene.particle_layer is not None:
+        frames = _iter_layered_frames(ffmpeg, scene, start, stop)
+    else:
+        frames = ((idx, _render_frame(scene, idx).tobytes()) for idx in range(start, stop))
+    with FfmpegProcess(cmd, f"segment {index} encode", stdin=True) as encoder:
+        for _, data in frames:
+            encoder.write(data)
+        encoder.finish()
+    os.replace(tmp_video, video)
+
+    checkpoint = work / f"seg_{index:05d}.json"
+    tmp_checkpoint = work / f"seg_{index:05d}.json.tmp"
+    tmp_checkpoint.write_text(
+        json.dumps({"index": index, "start": start, "stop": stop, "state": state}),
+        encoding="utf-8",
+    )
+    os.replace(tmp_checkpoint, checkpoint)
+    return index
 
 
 def _build_background(
@@ -201,18 +943,42 @@ def _build_background(
     top_rgb: tuple[int, int, int],
     bottom_rgb: tuple[int, int, int],
     grid_rgba: tuple[int, int, int, int],
+    grid_spacing: int = 120,
 ) -> Image.Image:
-    base = Image.new("RGBA", (width, height))
-    draw = ImageDraw.Draw(base, "RGBA")
+    params = {
+        "width": width,
+        "height": height,
+        "top": top_rgb,
+        "bottom": bottom_rgb,
+        "grid": grid_rgba,
+        "grid_spacing": grid_spacing,
+    }
+    return cached_layer(
+        "background",
+        params,
+        lambda: _draw_background(width, height, top_rgb, bottom_rgb, grid_rgba, grid_spacing),
+    )
 
-    for y in range(height):
-        t = y / (height - 1)
-        r = int(top_rgb[0] * (1 - t) + bottom_rgb[0] * t)
-        g = int(top_rgb[1] * (1 - t) + bottom_rgb[1] * t)
-        b = int(top_rgb[2] * (1 - t) + bottom_rgb[2] * t)
-        draw.line((0, y, width, y), fill=(r, g, b, 255))
 
-    grid_spacing = 120
+def _draw_background(
+    width: int,
+    height: int,
+    top_rgb: tuple[int, int, int],
+    bottom_rgb: tuple[int, int, int],
+    grid_rgba: tuple[int, int, int, int],
+    grid_spacing: int,
+) -> Image.Image:
+    # Vertical gradient as one array op (int() truncation, as per-row lines did).
+    t = np.arange(height, dtype=np.float64)[:, None] / (height - 1)
+    top = np.array(top_rgb, dtype=np.float64)[None, :]
+    bottom = np.array(bottom_rgb, dtype=np.float64)[None, :]
+    rows = (top * (1 - t) + bottom * t).astype(np.uint8)
+    plate = np.empty((height, width, 4), dtype=np.uint8)
+    plate[:, :, :3] = rows[:, None, :]
+    plate[:, :, 3] = 255
+    base = Image.fromarray(plate, "RGBA")
+
+    draw = ImageDraw.Draw(base, "RGBA")
     for x in range(0, width + 1, grid_spacing):
         draw.line((x, 0, x, height), fill=grid_rgba, width=1)
     for y in range(0, height + 1, grid_spacing):
@@ -236,21 +1002,19 @@ def _assign_keyword_positions(
     font: ImageFont.ImageFont,
     tracking: float,
     rng: Random,
+    scale: float = 1.0,
 ) -> dict[str, tuple[int, int]]:
     if not keywords:
         return {}
 
-    margin_x = 60
-    margin_y = 80
+    margin_x = round(60 * scale)
+    margin_y = round(80 * scale)
     max_attempts = 30
-    padding = 18
+    padding = round(18 * scale)
 
     mapping: dict[str, tuple[int, int]] = {}
     boxes: list[tuple[int, int, int, int]] = []
 
-    dummy_img = Image.new("RGBA", (width, height))
-    draw = ImageDraw.Draw(dummy_img, "RGBA")
-
     # Stratified placement across full frame (respect safe margins)
     max_keywords = min(10, len(keywords))
     cols = 4
@@ -261,7 +1025,7 @@ def _assign_keyword_positions(
     rng.shuffle(cells)
 
     for text, (c, r) in zip(keywords[:max_keywords], cells):
-        text_w, text_h = _measure_text(draw, text, font, tracking)
+        text_w, text_h = measure_text(text, font, tracking)
         placed = False
         cell_x0 = margin_x + int(c * cell_w)
         cell_y0 = margin_y + int(r * cell_h)
@@ -271,7 +1035,7 @@ def _assign_keyword_positions(
             x = rng.randint(cell_x0, max(cell_x0, cell_x1 - text_w))
             y = rng.randint(cell_y0, max(cell_y0, cell_y1 - text_h))
             x, y = _clamp_text_position(
-                draw, (x, y), text, font, tracking, width, height, margin_x, margin_y
+                (x, y), text, font, tracking, width, height, margin_x, margin_y
             )
             box = (x - padding, y - padding, x + text_w + padding, y + text_h + padding)
             if all(
@@ -300,25 +1064,28 @@ def _init_keyword_nodes(
     height: int,
     font: ImageFont.ImageFont,
     tracking: float,
+    scale: float = 1.0,
+    motion: float = 1.0,
 ) -> list[dict]:
     if not keywords:
         return []
 
     seed = int(hashlib.sha256(script.encode("utf-8")).hexdigest()[:8], 16)
     rng = Random(seed)
-    positions = _assign_keyword_positions(width, height, keywords, font, tracking, rng)
+    positions = _assign_keyword_positions(
+        width, height, keywords, font, tracking, rng, scale=scale
+    )
     if not positions:
         return []
 
-    dummy = ImageDraw.Draw(Image.new("RGBA", (width, height)))
     nodes: list[dict] = []
     for text in keywords[:10]:
         pos = positions.get(text)
         if pos is None:
             continue
-        w, h = _measure_text(dummy, text, font, tracking)
-        vx = rng.uniform(-0.6, 0.6)
-        vy = rng.uniform(-0.3, 0.3)
+        w, h = measure_text(text, font, tracking)
+        vx = rng.uniform(-0.6, 0.6) * motion
+        vy = rng.uniform(-0.3, 0.3) * motion
         base_opacity = rng.uniform(0.14, 0.18)
         peak_opacity = rng.uniform(0.88, 0.92)
         nodes.append(
@@ -337,25 +1104,56 @@ def _init_keyword_nodes(
                 "phase": rng.uniform(0.0, 2.0),
                 "hold": rng.uniform(2.5, 4.0),
                 "gap": rng.uniform(0.8, 1.6),
-                "anchor": None,
             }
         )
     return nodes
 
 
+def _simulate_keyword_track(
+    nodes: list[dict],
+    total_frames: int,
+    fps: int,
+    width: int,
+    height: int,
+    scale: float = 1.0,
+    motion: float = 1.0,
+) -> list[list[tuple[float, float, int, bool]]]:
+    """Per-frame (x, y, alpha, active) for every node, as drawn on that frame."""
+    # Overlap pushes run 3x per second (every 10 frames at 30 fps).
+    push_every = max(1, round(10 * fps / 30))
+    track = []
+    for idx in range(total_frames):
+        _update_keyword_nodes(
+            nodes,
+            idx / fps,
+            idx,
+            width,
+            height,
+            scale=scale,
+            motion=motion,
+            push_every=push_every,
+        )
+        track.append([(n["x"], n["y"], n["alpha"], n["active"]) for n in nodes])
+    return track
+
+
 def _update_keyword_nodes(
     nodes: list[dict],
     t: float,
     frame_idx: int,
     width: int,
     height: int,
-    particles: list[list[float]],
+    scale: float = 1.0,
+    motion: float = 1.0,
+    push_every: int = 10,
 ) -> None:
     if not nodes:
         return
 
-    margin_x = 60
-    margin_y = 80
+    margin_x = round(60 * scale)
+    margin_y = round(80 * scale)
+    min_vx = 0.15 * motion
+    min_vy = 0.08 * motion
     for node in nodes:
         fade = 0.6
         cycle = fade * 2 + node["hold"] + node["gap"]
@@ -387,10 +1185,10 @@ def _update_keyword_nodes(
         node["x"] += node["vx"]
         node["y"] += node["vy"]
 
-        if abs(node["vx"]) < 0.15:
-            node["vx"] = math.copysign(0.15, node["vx"] if node["vx"] != 0 else 1.0)
-        if abs(node["vy"]) < 0.08:
-            node["vy"] = math.copysign(0.08, node["vy"] if node["vy"] != 0 else 1.0)
+        if abs(node["vx"]) < min_vx:
+            node["vx"] = math.copysign(min_vx, node["vx"] if node["vx"] != 0 else 1.0)
+        if abs(node["vy"]) < min_vy:
+            node["vy"] = math.copysign(min_vy, node["vy"] if node["vy"] != 0 else 1.0)
 
         min_x = margin_x
         max_x = width - margin_x - node["w"]
@@ -405,21 +1203,17 @@ def _update_keyword_nodes(
         elif node["y"] > max_y:
             node["y"] = min_y
 
-        node["anchor"] = _nearest_particle_index(
-            node["x"] + node["w"] / 2, node["y"] + node["h"] / 2, particles
-        )
-
-    if frame_idx % 10 == 0:
+    if frame_idx % push_every == 0:
         for i in range(len(nodes)):
             a = nodes[i]
             for j in range(i + 1, len(nodes)):
                 b = nodes[j]
-                if _boxes_overlap(a, b, pad=6):
+                if _boxes_overlap(a, b, pad=6 * scale):
                     dx = (a["x"] + a["w"] / 2) - (b["x"] + b["w"] / 2)
                     dy = (a["y"] + a["h"] / 2) - (b["y"] + b["h"] / 2)
                     dist = math.hypot(dx, dy) or 1.0
-                    push = 0.15
-                    cap = 1.0
+                    push = 0.15 * scale
+                    cap = 1.0 * scale
                     ax = max(-cap, min(cap, (dx / dist) * push))
                     ay = max(-cap, min(cap, (dy / dist) * push))
                     bx = max(-cap, min(cap, (dx / dist) * push))
@@ -430,7 +1224,7 @@ def _update_keyword_nodes(
                     b["y"] -= by
 
 
-def _boxes_overlap(a: dict, b: dict, pad: int = 0) -> bool:
+def _boxes_overlap(a: dict, b: dict, pad: float = 0) -> bool:
     ax1, ay1 = a["x"] - pad, a["y"] - pad
     ax2, ay2 = a["x"] + a["w"] + pad, a["y"] + a["h"] + pad
     bx1, by1 = b["x"] - pad, b["y"] - pad
@@ -438,21 +1232,6 @@ def _boxes_overlap(a: dict, b: dict, pad: int = 0) -> bool:
     return not (ax2 <= bx1 or ax1 >= bx2 or ay2 <= by1 or ay1 >= by2)
 
 
-def _nearest_particle_index(x: float, y: float, particles: list[list[float]]) -> int | None:
-    if not particles:
-        return None
-    best_idx = 0
-    best_dist = float("inf")
-    for i, p in enumerate(particles):
-        dx = p[0] - x
-        dy = p[1] - y
-        dist = dx * dx + dy * dy
-        if dist < best_dist:
-            best_dist = dist
-            best_idx = i
-    return best_idx
-
-
 def _load_keyword_font(size: int) -> ImageFont.ImageFont:
     env_path = os.getenv("GEOPILOT_FONT", "")
     default_path = Path("assets/fonts/Inter-Regular.ttf")
@@ -460,36 +1239,24 @@ def _load_keyword_font(size: int) -> ImageFont.ImageFont:
 
     for path in candidates:
         if path and Path(path).exists():
-            try:
-                return ImageFont.truetype(path, size=size)
-            except Exception as exc:
-                raise RuntimeError(f"Failed to load font: {path}") from exc
+            return _truetype_font(str(Path(path).resolve()), size)
 
     raise RuntimeError(
         "No usable font found. Set GEOPILOT_FONT or add assets/fonts/Inter-Regular.ttf"
     )
 
 
-def _draw_text_with_tracking(
-    draw: ImageDraw.ImageDraw,
-    position: tuple[int, int],
-    text: str,
-    font: ImageFont.ImageFont,
-    fill: tuple[int, int, int, int],
-    tracking: float,
-) -> None:
-    x, y = position
-    for ch in text:
-        draw.text((x, y), ch, font=font, fill=fill)
-        try:
-            advance = font.getlength(ch)
-        except AttributeError:
-            advance = font.getsize(ch)[0]
-        x += advance + tracking
+@functools.lru_cache(maxsize=None)
+def _truetype_font(path: str, size: int) -> ImageFont.ImageFont:
+    # One FreeType face per (file, size) per process; batch renders reuse it
+    # and the sprite caches key on the same font.
+    try:
+        return ImageFont.truetype(path, size=size)
+    except Exception as exc:
+        raise RuntimeError(f"Failed to load font: {path}") from exc
 
 
 def _clamp_text_position(
-    draw: ImageDraw.ImageDraw,
     position: tuple[int, int],
     text: str,
     font: ImageFont.ImageFont,
@@ -500,78 +1267,7 @@ def _clamp_text_position(
     margin_y: int = 80,
 ) -> tuple[int, int]:
     x, y = position
-    text_w, text_h = _measure_text(draw, text, font, tracking)
+    text_w, text_h = measure_text(text, font, tracking)
     x = max(margin_x, min(x, width - margin_x - text_w))
     y = max(margin_y, min(y, height - margin_y - text_h))
     return int(x), int(y)
-
-
-def _measure_text(
-    draw: ImageDraw.ImageDraw,
-    text: str,
-    font: ImageFont.ImageFont,
-    tracking: float,
-) -> tuple[int, int]:
-    if not text:
-        return 0, 0
-    total_w = 0.0
-    max_h = 0.0
-    for ch in text:
-        try:
-            bbox = draw.textbbox((0, 0), ch, font=font)
-            ch_w = bbox[2] - bbox[0]
-            ch_h = bbox[3] - bbox[1]
-        except Exception:
-            ch_w, ch_h = font.getsize(ch)
-        total_w += ch_w + tracking
-        max_h = max(max_h, ch_h)
-    total_w = max(0.0, total_w - tracking)
-    return int(math.ceil(total_w)), int(math.ceil(max_h))
-
-def _encode_video(ffmpeg: str, frames_dir: Path, fps: int, out_path: Path) -> None:
-    cmd = [
-        ffmpeg,
-        "-y",
-        "-hide_banner",
-        "-loglevel",
-        "error",
-        "-framerate",
-        str(fps),
-        "-i",
-        str(frames_dir / "frame_%06d.png"),
-        "-c:v",
-        "libx264",
-        "-pix_fmt",
-        "yuv420p",
-        str(out_path),
-    ]
-    p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    if p.returncode != 0:
-        err = p.stderr.decode("utf-8", errors="replace")
-        raise RuntimeError(f"ffmpeg encode failed (exit {p.returncode}). stderr:\n{err}")
-
-
-def _mux_audio(ffmpeg: str, video_path: Path, audio_path: str, out_path: Path) -> None:
-    cmd = [
-        ffmpeg,
-        "-y",
-        "-hide_banner",
-        "-loglevel",
-        "error",
-        "-i",
-        str(video_path),
-        "-i",
-        audio_path,
-        "-c:v",
-        "copy",
-        "-c:a",
-        "aac",
-        "-b:a",
-        "192k",
-        "-shortest",
-        str(out_path),
-    ]
-    p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    if p.returncode != 0:
-        err = p.stderr.decode("utf-8", errors="replace")
-        raise RuntimeError(f"ffmpeg mux failed (exit {p.returncode}). stderr:\n{err}")
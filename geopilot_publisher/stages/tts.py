@@ -1,4 +1,182 @@
-from geopilot_publisher.services.openai_tts_client import tts_to_mp3
+"""
+Chunked voice synthesis.
 
-def synthesize_voice(script: str) -> str:
-    return tts_to_mp3(script, "artifacts/voice.mp3")
\ No newline at end of file
+The script is split at paragraph boundaries (long paragraphs further at
+sentence boundaries) and each chunk is synthesized to raw PCM on its own
+request, concurrently, so TTS wall time is roughly that of the slowest
+chunk rather than the whole script. Chunk audio goes through the response
+cache keyed by (text, model, voice, format): editing one sentence only
+re-synthesizes the chunk that contains it. The chunks are joined with a
+fixed silence between them and encoded once to MP3.
+
+StreamingVoice handles text that is still being generated: it is fed the
+script as it streams in and sends every complete sentence to TTS as its
+own chunk straight away, so voice synthesis overlaps script generation.
+
+Tuning (env):
+  GP_TTS_CONCURRENCY   chunk requests in flight (default 6)
+  GP_TTS_CHUNK_CHARS   longest chunk before a paragraph is split (default 600)
+  GP_TTS_GAP_MS        silence between chunks in ms (default 350)
+"""
+import asyncio
+import os
+import re
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+from geopilot_publisher.services.openai_tts_client import (
+    PCM_SAMPLE_RATE,
+    PCM_SAMPLE_WIDTH,
+    tts_to_pcm,
+    tts_to_pcm_async,
+)
+from geopilot_publisher.utils.ffmpeg import build_pcm_to_mp3_command, run_ffmpeg
+
+TTS_MODEL = "gpt-4o-mini-tts"
+TTS_VOICE = "marin"
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+# A sentence end or a paragraph break (e.g. after a title line).
+_CHUNK_BOUNDARY = re.compile(r"\n\s*\n|(?<=[.!?…])\s+")
+
+
+def synthesize_voice(script: str, out_path: str = "artifacts/voice.mp3") -> str:
+    chunks = split_script(script)
+    workers = min(len(chunks), max(1, _env_int("GP_TTS_CONCURRENCY", 6)))
+    with ThreadPoolExecutor(workers, thread_name_prefix="gp-tts") as pool:
+        audio = list(pool.map(lambda text: tts_to_pcm(text, TTS_MODEL, TTS_VOICE), chunks))
+    return _join_chunks(chunks, audio, out_path)
+
+
+async def synthesize_voice_async(script: str, out_path: str = "artifacts/voice.mp3") -> str:
+    chunks = split_script(script)
+    limit = asyncio.Semaphore(max(1, _env_int("GP_TTS_CONCURRENCY", 6)))
+
+    async def synthesize(text: str) -> bytes:
+        async with limit:
+            return await tts_to_pcm_async(text, TTS_MODEL, TTS_VOICE)
+
+    audio = await asyncio.gather(*(synthesize(text) for text in chunks))
+    return await asyncio.to_thread(_join_chunks, chunks, audio, out_path)
+
+
+class StreamingVoice:
+    """
+    Sentence-level TTS for a script that is still streaming in. feed() the
+    text deltas as they arrive; each complete sentence goes to TTS at once
+    (GP_TTS_CONCURRENCY requests in flight) and finish() joins the audio in
+    script order. Sentences are the chunks split_script(text, max_chars=0)
+    would produce. Non-streamed runs chunk by paragraph (GP_TTS_CHUNK_CHARS),
+    so the two paths only share cached audio for one-sentence paragraphs,
+    and the streamed track has a gap after every sentence.
+    """
+
+    def __init__(self, out_path: str = "artifacts/voice.mp3") -> None:
+        self.out_path = out_path
+        self._buffer = ""
+        self._chunks: list[str] = []
+        self._audio: list[Future] = []
+        self._started = time.perf_counter()
+        self._first_chunk_at: float | None = None
+        self._pool = ThreadPoolExecutor(
+            max(1, _env_int("GP_TTS_CONCURRENCY", 6)), thread_name_prefix="gp-tts"
+        )
+
+    def feed(self, text: str) -> None:
+        self._buffer += text
+        while True:
+            match = _CHUNK_BOUNDARY.search(self._buffer)
+            # Whitespace at the end may still grow into a paragraph break.
+            if match is None or match.end() == len(self._buffer):
+                return
+            self._submit(self._buffer[: match.start()])
+            self._buffer = self._buffer[match.end() :]
+
+    def finish(self) -> str:
+        """Wait for the outstanding sentences and write the joined voice track."""
+        try:
+            if self._buffer.strip():
+                for sentence in split_script(self._buffer, max_chars=0):
+                    self._submit(sentence)
+            self._buffer = ""
+            if not self._chunks:
+                raise RuntimeError("Script is empty; nothing to synthesize")
+            audio = [future.result() for future in self._audio]
+        finally:
+            self.close()
+        print(
+            f"[tts] streamed sentences={len(self._chunks)} "
+            f"first sentence sent after {self._first_chunk_at:.2f}s"
+        )
+        return _join_chunks(self._chunks, audio, self.out_path)
+
+    def close(self) -> None:
+        """Drop sentences not yet sent (e.g. when generation failed)."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, text: str) -> None:
+        text = text.strip()
+        if not text:
+            return
+        if self._first_chunk_at is None:
+            self._first_chunk_at = time.perf_counter() - self._started
+        self._chunks.append(text)
+        self._audio.append(self._pool.submit(tts_to_pcm, text, TTS_MODEL, TTS_VOICE))
+
+
+def split_script(script: str, max_chars: int | None = None) -> list[str]:
+    """
+    TTS chunks in reading order: one per paragraph, with paragraphs longer
+    than `max_chars` packed into runs of whole sentences.
+    """
+    if max_chars is None:
+        max_chars = _env_int("GP_TTS_CHUNK_CHARS", 600)
+    chunks: list[str] = []
+    for paragraph in re.split(r"\n\s*\n", script.strip()):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            chunks.append(paragraph)
+            continue
+        current = ""
+        for sentence in _SENTENCE_END.split(paragraph):
+            if current and len(current) + 1 + len(sentence) > max_chars:
+                chunks.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}" if current else sentence
+        if current:
+            chunks.append(current)
+    if not chunks:
+        raise RuntimeError("Script is empty; nothing to synthesize")
+    return chunks
+
+
+def _join_chunks(chunks: list[str], audio: list[bytes], out_path: str) -> str:
+    gap_ms = _env_int("GP_TTS_GAP_MS", 350)
+    silence = bytes(PCM_SAMPLE_RATE * gap_ms // 1000 * PCM_SAMPLE_WIDTH)
+    for text, pcm in zip(chunks, audio):
+        if not pcm:
+            raise RuntimeError(f"TTS returned no audio for chunk: {text[:60]!r}")
+    # Keep whole samples so joined chunks stay aligned.
+    pcm = silence.join(pcm[: len(pcm) - len(pcm) % PCM_SAMPLE_WIDTH] for pcm in audio)
+
+    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+    ffmpeg = os.getenv("FFMPEG_BIN", "ffmpeg")
+    cmd = build_pcm_to_mp3_command(ffmpeg, "pipe:0", out_path, PCM_SAMPLE_RATE)
+    run_ffmpeg(cmd, "voice encode", input=pcm)
+
+    print(f"[tts] chunks={len(chunks)} gap={gap_ms}ms -> {out_path}")
+    return out_path
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return max(0, int(raw))
+    except ValueError as exc:
+        raise RuntimeError(f"{name} must be an integer, got: {raw!r}") from exc
@@ -2,71 +2,57 @@ import hashlib
 import os
 import re
 from pathlib import Path
-
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaFileUpload
-
-
-YOUTUBE_UPLOAD_SCOPE = "https://www.googleapis.com/auth/youtube.upload"
-TOKEN_URI = "https://oauth2.googleapis.com/token"
-
-
-def _require_env(name: str) -> str:
-    val = os.getenv(name)
-    if not val:
-        raise RuntimeError(f"Missing required env var: {name}")
-    return val
-
-
-def _get_youtube_client():
-    client_id = _require_env("YT_CLIENT_ID")
-    client_secret = _require_env("YT_CLIENT_SECRET")
-    refresh_token = _require_env("YT_REFRESH_TOKEN")
-
-    creds = Credentials(
-        token=None,
-        refresh_token=refresh_token,
-        token_uri=TOKEN_URI,
-        client_id=client_id,
-        client_secret=client_secret,
-        scopes=[YOUTUBE_UPLOAD_SCOPE],
-    )
-
-    # IMPORTANT: refresh explicitly so we fail here (with a clear error) if auth is wrong
-    creds.refresh(Request())
-
-    # cache_discovery=False avoids some CI edge cases
-    return build("youtube", "v3", credentials=creds, cache_discovery=False)
-
-
-def upload_video(video_path: str) -> str:
+from typing import Callable
+
+from geopilot_publisher.services.youtube_client import (
+    YouTubeClient,
+    get_youtube_client,
+    upload_resumable,
+)
+from geopilot_publisher.utils.probe import probe_media
+
+
+def upload_video(
+    video_path: str,
+    script_path: str | Path | None = None,
+    keywords: list[str] | None = None,
+    youtube: YouTubeClient | None = None,
+    before_upload: Callable[[], None] | None = None,
+) -> str:
     """
     Upload the MP4 to YouTube and return the video URL.
     Default privacy is 'unlisted' (safe).
+    Title/description come from `script_path` (default artifacts/script.txt)
+    and `keywords` (default content/ or artifacts/ keywords.txt).
+    Pass an authorized `youtube` client (get_youtube_client()) to reuse one
+    built ahead of time, e.g. while the video was rendering.
+    The upload is resumable: an interrupted run picks up the saved session
+    (<video>.upload.json) on the next call for the same file.
+    `before_upload` runs once the video and metadata are validated, right
+    before a new upload session is opened (quota accounting hooks in here);
+    resuming a saved session does not call it.
     """
     path = Path(video_path)
-    script_path = Path("artifacts") / "script.txt"
+    script_path = Path(script_path) if script_path else Path("artifacts") / "script.txt"
 
     if not path.exists():
         raise RuntimeError(f"Video file does not exist: {path}")
     if not script_path.exists():
-        raise RuntimeError("Missing artifacts/script.txt for upload")
+        raise RuntimeError(f"Missing {script_path.as_posix()} for upload")
 
     size = path.stat().st_size
     if size <= 0:
         raise RuntimeError(f"Video file is empty: {path}")
     if path.suffix.lower() != ".mp4":
         raise RuntimeError(f"Unexpected video extension for upload: {path.suffix}")
+    _check_video_media(path)
 
     print(f"[upload_youtube] uploading file: {path} ({size} bytes)")
     print("[upload_youtube] privacy=unlisted (video won't appear on public channel page)")
     print("[upload_youtube] find it in YouTube Studio → Content → Unlisted")
 
-    script_text = _read_text(Path("artifacts") / "script.txt")
-    keywords = _load_keywords_preferred()
+    script_text = _read_text(script_path)
+    keywords = keywords[:10] if keywords is not None else _load_keywords_preferred()
     title = _build_title(script_text, keywords)
     description = _build_description(script_text, keywords)
     tags = _build_tags(script_text, keywords)
@@ -76,7 +62,8 @@ def upload_video(video_path: str) -> str:
     print(f"[upload_youtube] description: {description[:200]}{'...' if len(description) > 200 else ''}")
     print(f"[upload_youtube] tags: {len(tags)}")
 
-    youtube = _get_youtube_client()
+    if youtube is None:
+        youtube = get_youtube_client()
 
     body = {
         "snippet": {
@@ -91,40 +78,70 @@ def upload_video(video_path: str) -> str:
         },
     }
 
-    media = MediaFileUpload(str(path), mimetype="video/mp4", resumable=True)
+    response = upload_resumable(youtube, path, body, on_initiate=before_upload)
+
+    # The only success condition: response contains id
+    video_id = response.get("id")
+    if not video_id:
+        raise RuntimeError(f"Upload finished but response had no video id: {response}")
+
+    url = f"https://www.youtube.com/watch?v={video_id}"
+    print(f"✅ Uploaded: {url}")
+    return url
 
-    request = youtube.videos().insert(
-        part="snippet,status",
-        body=body,
-        media_body=media,
-    )
 
-    try:
-        response = None
-        while response is None:
-            status, response = request.next_chunk()
-            if status:
-                pct = int(status.progress() * 100)
-                print(f"[upload_youtube] progress: {pct}%")
-
-        # The only success condition: response contains id
-        video_id = response.get("id")
-        if not video_id:
-            raise RuntimeError(f"Upload finished but response had no video id: {response}")
-
-        url = f"https://www.youtube.com/watch?v={video_id}"
-        print(f"✅ Uploaded: {url}")
-        return url
-
-    except HttpError as e:
-        # This prints the real YouTube API error message
-        err_text = ""
+def _check_video_media(path: Path) -> None:
+    """
+    Probe the MP4 before spending an upload on it: it must have a duration,
+    a video track and an audio track, and fit the Shorts format. The format
+    limits come from GP_UPLOAD_ASPECT (default "9:16") and
+    GP_UPLOAD_MAX_SECONDS (default 180); an empty value or "off" disables
+    either one.
+    """
+    info = probe_media(path)
+    if info.duration <= 0:
+        raise RuntimeError(f"Video has no duration: {path}")
+    if not info.has_video or not info.width or not info.height:
+        raise RuntimeError(f"Video file has no video track: {path}")
+    if not info.has_audio:
+        raise RuntimeError(f"Video file has no audio track: {path}")
+
+    max_seconds = _upload_limit("GP_UPLOAD_MAX_SECONDS", "180")
+    if max_seconds is not None:
+        try:
+            limit = float(max_seconds)
+        except ValueError:
+            raise RuntimeError(
+                f"GP_UPLOAD_MAX_SECONDS must be a number, got: {max_seconds!r}"
+            ) from None
+        if info.duration > limit:
+            raise RuntimeError(
+                f"Video is {info.duration:.1f}s long; GP_UPLOAD_MAX_SECONDS allows {limit:g}s"
+            )
+    aspect = _upload_limit("GP_UPLOAD_ASPECT", "9:16")
+    if aspect is not None:
         try:
-            err_text = e.content.decode("utf-8", errors="replace") if hasattr(e, "content") else str(e)
-        except Exception:
-            err_text = str(e)
+            num, den = (float(v) for v in aspect.split(":"))
+        except ValueError:
+            num = den = 0.0
+        if not (num > 0 and den > 0):
+            raise RuntimeError(f"GP_UPLOAD_ASPECT must look like 9:16, got: {aspect!r}")
+        if abs(info.width / info.height - num / den) > 0.01:
+            raise RuntimeError(
+                f"Video is {info.width}x{info.height}; GP_UPLOAD_ASPECT expects {aspect}"
+            )
+    print(
+        f"[upload_youtube] probe: {info.width}x{info.height} {info.video_codec} "
+        f"{info.duration:.2f}s audio={info.audio_codec}"
+    )
+
 
-        raise RuntimeError(f"YouTube API upload failed:\n{err_text}") from e
+def _upload_limit(name: str, default: str) -> str | None:
+    """The env value of a format limit, or None when it is turned off."""
+    value = os.getenv(name, default).strip()
+    if not value or value.lower() == "off":
+        return None
+    return value
 
 
 def _read_text(path: Path) -> str:
@@ -1,9 +1,27 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from functools import partial
+import math
 from pathlib import Path
 import re
-from typing import List, Tuple
+from typing import Callable, List, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+
+# Caption style, shared by the .ass writer and the burned-in render layer.
+# Pixel values are for the 1080x1920 layout.
+FONT_SIZE = 54
+MARGIN_H = 80
+# Widest caption line that stays inside MarginL/MarginR.
+TEXT_WIDTH = 1080 - 2 * MARGIN_H
+TEXT_COLOR = (255, 255, 255, 255)
+# With BorderStyle=3 libass fills the box with OutlineColour &H00101010.
+BOX_COLOR = (16, 16, 16, 255)
+BOX_PAD = 14
+FADE_IN_MS = 120
+FADE_OUT_MS = 160
 
 
 @dataclass
@@ -43,35 +61,54 @@ def _split_phrases(text: str) -> List[str]:
     return phrases
 
 
-def _wrap_two_lines(phrase: str, max_chars: int = 34) -> Tuple[str, str]:
+def _wrap_two_lines(
+    phrase: str,
+    max_chars: int = 34,
+    fits: Callable[[str], bool] | None = None,
+) -> Tuple[str, str] | None:
     """
     Wrap into at most two lines with a roughly balanced break.
+    `max_chars` is best effort; `fits` (e.g. a pixel width check) is not:
+    returns None if no one- or two-line layout satisfies it.
     """
+    fits = fits or (lambda line: True)
     phrase = _clean(phrase)
-    if len(phrase) <= max_chars:
-        return phrase, ""
-
     words = phrase.split()
-    if len(words) <= 3:
+    if (len(phrase) <= max_chars or len(words) <= 3) and fits(phrase):
         return phrase, ""
-
-    # Find a split point near the middle that keeps both lines <= max_chars (best effort)
-    best_i = None
-    best_score = 10**9
-    for i in range(2, len(words) - 1):
-        l1 = " ".join(words[:i])
-        l2 = " ".join(words[i:])
-        score = abs(len(l1) - len(l2))
-        if len(l1) <= max_chars and len(l2) <= max_chars and score < best_score:
-            best_score = score
-            best_i = i
-
-    if best_i is None:
+    if len(words) <= 1:
+        return phrase, ""  # nothing to break; caption_sprite shrinks it
+
+    # Avoid single-word lines unless the phrase is that short.
+    splits = range(2, len(words) - 1) if len(words) > 3 else range(1, len(words))
+    candidates = [(" ".join(words[:i]), " ".join(words[i:]), i) for i in splits]
+    candidates = [c for c in candidates if fits(c[0]) and fits(c[1])]
+    if not candidates:
+        return None
+
+    # Split point near the middle that keeps both lines <= max_chars
+    within = [c for c in candidates if len(c[0]) <= max_chars and len(c[1]) <= max_chars]
+    if within:
+        l1, l2, _ = min(within, key=lambda c: abs(len(c[0]) - len(c[1])))
+    else:
         # fallback: split by word count
         mid = len(words) // 2
-        return " ".join(words[:mid]), " ".join(words[mid:])
+        l1, l2, _ = min(candidates, key=lambda c: abs(c[2] - mid))
+    return l1, l2
 
-    return " ".join(words[:best_i]), " ".join(words[best_i:])
+
+def _fit_phrase(
+    phrase: str, max_chars: int, fits: Callable[[str], bool] | None
+) -> List[Tuple[str, str]]:
+    """Line pairs for `phrase`, split into several captions if two lines cannot hold it."""
+    wrapped = _wrap_two_lines(phrase, max_chars=max_chars, fits=fits)
+    if wrapped is not None:
+        return [wrapped]
+    words = phrase.split()
+    mid = len(words) // 2
+    return _fit_phrase(" ".join(words[:mid]), max_chars, fits) + _fit_phrase(
+        " ".join(words[mid:]), max_chars, fits
+    )
 
 
 def build_captions_from_script(
@@ -81,12 +118,17 @@ def build_captions_from_script(
     min_segment_s: float = 1.2,
     max_segment_s: float = 2.6,
     max_chars_per_line: int = 34,
+    font: ImageFont.ImageFont | None = None,
+    max_width: float | None = None,
 ) -> List[Caption]:
     """
     Make captions that are:
     - 1–3 seconds each
     - max two lines
     - NOT single-word spam
+    With `font`, every line is at most `max_width` px wide in it (default
+    TEXT_WIDTH, for a font at the 1080 px layout's FONT_SIZE); phrases that
+    need more than two lines become consecutive captions.
     """
     phrases = _split_phrases(script)
 
@@ -94,21 +136,88 @@ def build_captions_from_script(
     if not phrases:
         return []
 
+    fits = None
+    if font is not None:
+        limit = TEXT_WIDTH if max_width is None else max_width
+        fits = partial(_fits_width, font, limit)
+
     captions: List[Caption] = []
     t = 0.0
 
     for phrase in phrases:
-        wc = max(1, len(phrase.split()))
-        dur = wc / max(0.1, words_per_second)
-        dur = max(min_segment_s, min(max_segment_s, dur))
+        for l1, l2 in _fit_phrase(phrase, max_chars_per_line, fits):
+            wc = max(1, len(f"{l1} {l2}".split()))
+            dur = wc / max(0.1, words_per_second)
+            dur = max(min_segment_s, min(max_segment_s, dur))
 
-        l1, l2 = _wrap_two_lines(phrase, max_chars=max_chars_per_line)
-        captions.append(Caption(start_s=t, end_s=t + dur, line1=l1, line2=l2))
-        t += dur
+            captions.append(Caption(start_s=t, end_s=t + dur, line1=l1, line2=l2))
+            t += dur
 
     return captions
 
 
+def _fits_width(font: ImageFont.ImageFont, limit: float, line: str) -> bool:
+    return font.getlength(line) <= limit
+
+
+def fit_captions_to_duration(captions: List[Caption], duration_s: float) -> List[Caption]:
+    """
+    Rescale caption timing so the last caption ends at `duration_s`.
+    build_captions_from_script estimates timing from word counts; the real
+    voice track (probed duration) is the one to follow.
+    """
+    if not captions or duration_s <= 0:
+        return list(captions)
+    end = captions[-1].end_s
+    if end <= 0:
+        return list(captions)
+    k = duration_s / end
+    return [replace(c, start_s=c.start_s * k, end_s=c.end_s * k) for c in captions]
+
+
+def caption_margin_v(panel_height: int = 768) -> int:
+    # ASS "MarginV" is distance from bottom when Alignment=2 (bottom-center)
+    return int(panel_height * 0.28)  # about 28% up from panel bottom
+
+
+def caption_opacity(caption: Caption, t: float) -> float:
+    """0..1 opacity at time `t`, following the ASS \\fad(in, out) ramps."""
+    if t < caption.start_s or t >= caption.end_s:
+        return 0.0
+    fade_in = (t - caption.start_s) / (FADE_IN_MS / 1000)
+    fade_out = (caption.end_s - t) / (FADE_OUT_MS / 1000)
+    return max(0.0, min(1.0, fade_in, fade_out))
+
+
+def caption_sprite(caption: Caption, font: ImageFont.ImageFont, scale: float = 1.0) -> Image.Image:
+    """
+    Both caption lines, centred on an opaque box. The renderer rasterizes
+    each caption once per render and reuses the image for every frame the
+    caption is visible.
+    Lines are expected to fit TEXT_WIDTH * scale (build_captions_from_script
+    with a font); an unbreakable line that does not is scaled down to fit.
+    """
+    lines = [line for line in (caption.line1, caption.line2) if line]
+    ascent, descent = font.getmetrics()
+    line_h = ascent + descent
+    widths = [math.ceil(font.getlength(line)) for line in lines]
+    pad = max(1, round(BOX_PAD * scale))
+    sprite = Image.new(
+        "RGBA",
+        (max(widths, default=0) + 2 * pad, line_h * len(lines) + 2 * pad),
+        BOX_COLOR,
+    )
+    draw = ImageDraw.Draw(sprite)
+    for k, (line, w) in enumerate(zip(lines, widths)):
+        draw.text(((sprite.width - w) // 2, pad + k * line_h), line, font=font, fill=TEXT_COLOR)
+    limit = TEXT_WIDTH * scale
+    if max(widths, default=0) > limit:
+        k = limit / max(widths)
+        size = (max(1, round(sprite.width * k)), max(1, round(sprite.height * k)))
+        sprite = sprite.resize(size, Image.LANCZOS)
+    return sprite
+
+
 def _ass_time(seconds: float) -> str:
     # ASS time format: H:MM:SS.cs (centiseconds)
     if seconds < 0:
@@ -137,8 +246,7 @@ def write_ass(
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
     # Place captions comfortably inside the panel (not hugging bottom)
-    # ASS "MarginV" is distance from bottom when Alignment=2 (bottom-center)
-    margin_v = int(panel_height * 0.28)  # about 28% up from panel bottom
+    margin_v = caption_margin_v(panel_height)
 
     header = f"""[Script Info]
 ScriptType: v4.00+
@@ -149,7 +257,7 @@ ScaledBorderAndShadow: yes
 
 [V4+ Styles]
 Format: Name, Fontname, Fontsize, PrimaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
-Style: Caption,Inter,54,&H00FFFFFF,&H00101010,&H64000000,0,0,0,0,100,100,0,0,3,2,0,2,80,80,{margin_v},1
+Style: Caption,Inter,{FONT_SIZE},&H00FFFFFF,&H00101010,&H64000000,0,0,0,0,100,100,0,0,3,2,0,2,{MARGIN_H},{MARGIN_H},{margin_v},1
 
 [Events]
 Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
@@ -157,8 +265,8 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
     lines = [header]
 
     # Gentle fade in/out (in ms) using ASS \fad
-    fad_in = 120
-    fad_out = 160
+    fad_in = FADE_IN_MS
+    fad_out = FADE_OUT_MS
 
     for c in captions:
         start = _ass_time(c.start_s)
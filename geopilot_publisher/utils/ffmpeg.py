@@ -1 +1,577 @@
-# TODO: ffmpeg command builders
+"""
+ffmpeg command builders.
+
+The renderer encodes video and muxes audio in a single ffmpeg invocation:
+frames come in on one input (raw RGBA over stdin, or a PNG sequence in the
+debug path) and the voice track on another, already AAC-encoded and cached
+by content hash so the audio is stream-copied rather than re-transcoded.
+Segmented renders encode video-only GOP-aligned segments and join them
+losslessly with the concat demuxer in the final mux.
+
+Commands run through FfmpegProcess: progress (frame, fps, speed, out_time)
+is parsed from `-progress pipe:1` and logged, stderr is drained as it is
+written and only its tail kept for error messages, and a watchdog stops
+encoders that hang. Each process is traced as an "ffmpeg.<label>" span.
+
+Tuning (env):
+  GP_FFMPEG_PROGRESS_SECONDS  progress log interval (default 10, 0 = off)
+  GP_FFMPEG_STALL_TIMEOUT     kill ffmpeg after this many seconds without
+                              progress while we wait on it (default 300)
+  GP_FFMPEG_TIMEOUT           wall-clock limit per ffmpeg run (default none)
+"""
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import os
+import re
+import subprocess
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from geopilot_publisher.utils.logging import start_span
+from geopilot_publisher.utils.paths import cache_dir
+
+
+@dataclass(frozen=True)
+class EncoderSettings:
+    preset: str = "medium"
+    crf: int | None = None
+    bitrate: str | None = None
+    tune: str | None = None
+    threads: int | None = None
+    faststart: bool = True
+    audio_bitrate: str = "192k"
+
+    @classmethod
+    def from_env(cls, preset: str = "medium") -> "EncoderSettings":
+        """
+        Defaults (preset from the render profile) overridden by env:
+        GP_X264_PRESET, GP_X264_CRF, GP_VIDEO_BITRATE (e.g. 8M; wins over CRF),
+        GP_X264_TUNE, GP_FFMPEG_THREADS, GP_FASTSTART (default 1),
+        GP_AUDIO_BITRATE.
+        """
+        return cls(
+            preset=os.getenv("GP_X264_PRESET") or preset,
+            crf=_env_int("GP_X264_CRF"),
+            bitrate=os.getenv("GP_VIDEO_BITRATE") or None,
+            tune=os.getenv("GP_X264_TUNE") or None,
+            threads=_env_int("GP_FFMPEG_THREADS"),
+            faststart=os.getenv("GP_FASTSTART", "1") != "0",
+            audio_bitrate=os.getenv("GP_AUDIO_BITRATE") or "192k",
+        )
+
+    def video_args(self, gop: int | None = None) -> list[str]:
+        args = ["-c:v", "libx264", "-preset", self.preset]
+        if self.bitrate:
+            args += ["-b:v", self.bitrate]
+        elif self.crf is not None:
+            args += ["-crf", str(self.crf)]
+        if self.tune:
+            args += ["-tune", self.tune]
+        if self.threads is not None:
+            args += ["-threads", str(self.threads)]
+        if gop is not None:
+            # Fixed GOPs (no scene-cut keyframes) so segments split on GOPs.
+            args += ["-g", str(gop), "-keyint_min", str(gop), "-sc_threshold", "0"]
+        args += ["-pix_fmt", "yuv420p"]
+        return args
+
+    def container_args(self) -> list[str]:
+        return ["-movflags", "+faststart"] if self.faststart else []
+
+
+def rawvideo_input_args(width: int, height: int, fps: int) -> list[str]:
+    return [
+        "-f",
+        "rawvideo",
+        "-pix_fmt",
+        "rgba",
+        "-s",
+        f"{width}x{height}",
+        "-framerate",
+        str(fps),
+        "-i",
+        "pipe:0",
+    ]
+
+
+def image_sequence_input_args(pattern: Path, fps: int) -> list[str]:
+    return ["-framerate", str(fps), "-i", str(pattern)]
+
+
+def build_encode_command(
+    ffmpeg: str,
+    video_input: list[str],
+    audio_path: str | Path | None,
+    out_path: str | Path,
+    settings: EncoderSettings,
+    audio_copy: bool = False,
+    gop: int | None = None,
+) -> list[str]:
+    """
+    One ffmpeg call that encodes the video input and muxes `audio_path`.
+    With `audio_copy` the audio is stream-copied (pass a cached AAC file);
+    with no `audio_path` the output is video-only (segment encodes).
+    """
+    cmd = [ffmpeg, "-y", "-hide_banner", "-loglevel", "error", *video_input]
+    if audio_path is None:
+        return [*cmd, *settings.video_args(gop), str(out_path)]
+
+    audio_args = (
+        ["-c:a", "copy"] if audio_copy else ["-c:a", "aac", "-b:a", settings.audio_bitrate]
+    )
+    return [
+        *cmd,
+        "-i",
+        str(audio_path),
+        "-map",
+        "0:v:0",
+        "-map",
+        "1:a:0",
+        *settings.video_args(gop),
+        *audio_args,
+        *settings.container_args(),
+        "-shortest",
+        str(out_path),
+    ]
+
+
+def build_lossless_encode_command(
+    ffmpeg: str,
+    video_input: list[str],
+    out_path: str | Path,
+) -> list[str]:
+    """Encode RGBA frames to an intermediate that decodes back bit-exactly."""
+    # QuickTime RLE keeps the alpha channel and decodes faster than FFV1.
+    return [
+        ffmpeg,
+        "-y",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        *video_input,
+        "-c:v",
+        "qtrle",
+        "-pix_fmt",
+        "argb",
+        "-f",
+        "mov",
+        str(out_path),
+    ]
+
+
+def build_rawvideo_decode_command(ffmpeg: str, in_path: str | Path) -> list[str]:
+    """Decode `in_path` to raw RGBA frames on stdout."""
+    return [
+        ffmpeg,
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-i",
+        str(in_path),
+        "-f",
+        "rawvideo",
+        "-pix_fmt",
+        "rgba",
+        "pipe:1",
+    ]
+
+
+def build_concat_command(
+    ffmpeg: str,
+    list_path: str | Path,
+    audio_path: str | Path,
+    out_path: str | Path,
+    settings: EncoderSettings,
+) -> list[str]:
+    """Join encoded segments listed in `list_path` (no re-encode) and mux audio."""
+    return [
+        ffmpeg,
+        "-y",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-f",
+        "concat",
+        "-safe",
+        "0",
+        "-i",
+        str(list_path),
+        "-i",
+        str(audio_path),
+        "-map",
+        "0:v:0",
+        "-map",
+        "1:a:0",
+        "-c:v",
+        "copy",
+        "-c:a",
+        "copy",
+        *settings.container_args(),
+        "-shortest",
+        str(out_path),
+    ]
+
+
+def build_pcm_to_mp3_command(
+    ffmpeg: str,
+    pcm_path: str | Path,
+    out_path: str | Path,
+    sample_rate: int,
+    bitrate: str = "192k",
+) -> list[str]:
+    """Encode raw s16le mono PCM to MP3."""
+    return [
+        ffmpeg,
+        "-y",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-f",
+        "s16le",
+        "-ar",
+        str(sample_rate),
+        "-ac",
+        "1",
+        "-i",
+        str(pcm_path),
+        "-c:a",
+        "libmp3lame",
+        "-b:a",
+        bitrate,
+        str(out_path),
+    ]
+
+
+# Enough stderr to show the error without holding a chatty log in memory.
+STDERR_TAIL_BYTES = 64 * 1024
+
+
+@dataclass
+class FfmpegProgress:
+    """The latest `-progress` report of a running ffmpeg."""
+
+    frame: int = 0
+    fps: float = 0.0
+    out_time: float = 0.0
+    speed: float | None = None
+    total_size: int = 0
+    done: bool = False
+
+
+class FfmpegProcess:
+    """
+    One ffmpeg process, used as a context manager (leaving it kills ffmpeg
+    if it is still running).
+
+    With `stdin=True` it is a persistent encoder fed by write() and closed
+    by finish(); with `stdout=True` its output is read with read() (stdout
+    then carries data, so there are no progress reports). Otherwise ffmpeg
+    reports progress to `on_progress` (default: a log line every
+    GP_FFMPEG_PROGRESS_SECONDS). A watchdog terminates ffmpeg when a
+    write/read/wait sees no progress for `stall_timeout` seconds or the run
+    exceeds `timeout`; time spent producing frames between writes does not
+    count as a stall.
+    """
+
+    def __init__(
+        self,
+        cmd: list[str],
+        label: str = "run",
+        *,
+        stdin: bool = False,
+        stdout: bool = False,
+        on_progress: Callable[[FfmpegProgress], None] | None = None,
+        timeout: float | None = None,
+        stall_timeout: float | None = None,
+    ) -> None:
+        self.label = label
+        self.progress = FfmpegProgress()
+        self._on_progress = on_progress or _progress_logger(label)
+        self._timeout = timeout if timeout is not None else _env_float("GP_FFMPEG_TIMEOUT", 0.0)
+        self._stall = (
+            stall_timeout
+            if stall_timeout is not None
+            else _env_float("GP_FFMPEG_STALL_TIMEOUT", 300.0)
+        )
+        self._stderr = bytearray()
+        self._lock = threading.Lock()
+        self._busy = 0
+        self._failure: str | None = None
+        self._closed = threading.Event()
+        self._started = self._activity = time.monotonic()
+
+        if not stdout:
+            cmd = [cmd[0], "-progress", "pipe:1", "-nostats", *cmd[1:]]
+        # "segment 3 encode" -> ffmpeg.segment_encode: one summary row per kind.
+        kind = re.sub(r"\s*\d+", "", label).strip().replace(" ", "_")
+        self._span = start_span(f"ffmpeg.{kind}", label=label)
+        try:
+            self.proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE if stdin else subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+        except OSError as exc:
+            self._span.end(exc)
+            raise RuntimeError(f"Failed to start ffmpeg: {cmd[0]}") from exc
+
+        self._readers = [_daemon_thread(self._drain_stderr)]
+        if not stdout:
+            self._readers.append(_daemon_thread(self._read_progress))
+        if self._timeout > 0 or self._stall > 0:
+            _daemon_thread(self._watchdog)
+
+    def __enter__(self) -> "FfmpegProcess":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write(self, data: bytes) -> None:
+        try:
+            with self._waiting():
+                self.proc.stdin.write(data)
+        except BrokenPipeError:
+            self.proc.stdin = None
+            self.proc.wait()
+            raise self._error() from None
+        self._activity = time.monotonic()
+
+    def read(self, size: int) -> bytes:
+        """Exactly `size` bytes of output; raises if ffmpeg ends first."""
+        with self._waiting():
+            data = self.proc.stdout.read(size)
+        if len(data) != size:
+            self.proc.wait()
+            raise self._error("ended early")
+        self._activity = time.monotonic()
+        return data
+
+    def finish(self) -> FfmpegProgress:
+        """Close stdin, wait for ffmpeg to exit and raise if it failed."""
+        try:
+            if self.proc.stdin is not None:
+                with contextlib.suppress(BrokenPipeError):
+                    self.proc.stdin.close()
+                self.proc.stdin = None
+            with self._waiting():
+                self.proc.wait()
+            for thread in self._readers:
+                thread.join()
+            if self.proc.returncode != 0 or self._failure:
+                raise self._error()
+        finally:
+            self.close()
+        if self.progress.frame:
+            elapsed = time.monotonic() - self._started
+            print(
+                f"[ffmpeg] {self.label}: done frames={self.progress.frame} "
+                f"out_time={self.progress.out_time:.2f}s in {elapsed:.2f}s "
+                f"({self.progress.frame / max(elapsed, 1e-9):.1f} fps)"
+            )
+        return self.progress
+
+    def close(self) -> None:
+        """Kill ffmpeg if it is still running and release its pipes."""
+        self._closed.set()
+        if self.proc.poll() is None:
+            self.proc.kill()
+            self.proc.wait()
+        for pipe in (self.proc.stdin, self.proc.stdout):
+            if pipe is not None:
+                with contextlib.suppress(OSError):
+                    pipe.close()
+        self.proc.stdin = None
+        self._span["frames"] = self.progress.frame
+        if self._failure or self.proc.returncode != 0:
+            self._span.end(self._failure or f"exit {self.proc.returncode}")
+        else:
+            self._span.end()
+
+    def stderr_tail(self) -> str:
+        with self._lock:
+            return self._stderr.decode("utf-8", errors="replace")
+
+    @contextlib.contextmanager
+    def _waiting(self):
+        # Only time spent blocked on ffmpeg counts towards the stall timeout.
+        with self._lock:
+            if not self._busy:
+                self._activity = time.monotonic()
+            self._busy += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._busy -= 1
+
+    def _error(self, what: str = "failed") -> RuntimeError:
+        reason = self._failure or f"{what} (exit {self.proc.returncode})"
+        return RuntimeError(f"ffmpeg {self.label} {reason}. stderr:\n{self.stderr_tail()}")
+
+    def _drain_stderr(self) -> None:
+        for chunk in iter(lambda: self.proc.stderr.read1(8192), b""):
+            with self._lock:
+                self._stderr += chunk
+                del self._stderr[:-STDERR_TAIL_BYTES]
+        self.proc.stderr.close()
+
+    def _read_progress(self) -> None:
+        fields: dict[str, str] = {}
+        for raw in self.proc.stdout:
+            key, _, value = raw.decode("utf-8", errors="replace").strip().partition("=")
+            if key != "progress":
+                fields[key] = value
+                continue
+            self.progress = FfmpegProgress(
+                frame=_parse_int(fields.get("frame")),
+                fps=_parse_float(fields.get("fps")) or 0.0,
+                out_time=_parse_int(fields.get("out_time_us")) / 1_000_000,
+                speed=_parse_float(fields.get("speed", "").rstrip("x")),
+                total_size=_parse_int(fields.get("total_size")),
+                done=value == "end",
+            )
+            self._activity = time.monotonic()
+            self._on_progress(self.progress)
+            fields = {}
+
+    def _watchdog(self) -> None:
+        while not self._closed.wait(0.5) and self.proc.poll() is None:
+            now = time.monotonic()
+            if self._timeout > 0 and now - self._started > self._timeout:
+                self._failure = f"timed out after {self._timeout:g}s"
+            elif self._stall > 0 and self._busy and now - self._activity > self._stall:
+                self._failure = f"stalled for {self._stall:g}s without progress"
+            else:
+                continue
+            print(f"[ffmpeg] {self.label}: {self._failure}; terminating")
+            self.proc.terminate()
+            try:
+                self.proc.wait(5)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+            return
+
+
+def run_ffmpeg(
+    cmd: list[str],
+    label: str = "run",
+    input: bytes | None = None,
+    timeout: float | None = None,
+) -> FfmpegProgress:
+    """Run a one-shot ffmpeg command (optionally fed `input` on stdin)."""
+    with FfmpegProcess(cmd, label, stdin=input is not None, timeout=timeout) as proc:
+        if input is not None:
+            proc.write(input)
+        return proc.finish()
+
+
+def _progress_logger(label: str) -> Callable[[FfmpegProgress], None]:
+    interval = _env_float("GP_FFMPEG_PROGRESS_SECONDS", 10.0)
+    last = time.monotonic()
+
+    def log(progress: FfmpegProgress) -> None:
+        nonlocal last
+        now = time.monotonic()
+        if interval <= 0 or progress.done or now - last < interval:
+            return
+        last = now
+        speed = f"{progress.speed:.2f}x" if progress.speed is not None else "n/a"
+        print(
+            f"[ffmpeg] {label}: frame={progress.frame} fps={progress.fps:.1f} "
+            f"speed={speed} out_time={progress.out_time:.2f}s"
+        )
+
+    return log
+
+
+def _daemon_thread(target: Callable[[], None]) -> threading.Thread:
+    thread = threading.Thread(target=target, name="gp-ffmpeg", daemon=True)
+    thread.start()
+    return thread
+
+
+def _parse_int(raw: str | None) -> int:
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        return 0  # "N/A" before the first frame
+
+
+def _parse_float(raw: str | None) -> float | None:
+    try:
+        return float(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+def cached_aac(ffmpeg: str, audio_path: str | Path, bitrate: str = "192k") -> Path:
+    """
+    AAC (.m4a) encoding of `audio_path`, cached under <cache>/audio by the
+    source file's content hash. Re-renders of the same voice track (e.g.
+    GP_REUSE_SCRIPT=1) skip the transcode and stream-copy the result.
+    """
+    digest = _file_sha256(Path(audio_path))
+    out = cache_dir("audio") / f"{digest[:24]}-aac-{bitrate}.m4a"
+    if out.exists() and out.stat().st_size > 0:
+        return out
+
+    fd, tmp = tempfile.mkstemp(prefix=out.stem, suffix=".m4a", dir=out.parent)
+    os.close(fd)
+    cmd = [
+        ffmpeg,
+        "-y",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-i",
+        str(audio_path),
+        "-vn",
+        "-c:a",
+        "aac",
+        "-b:a",
+        bitrate,
+        tmp,
+    ]
+    try:
+        run_ffmpeg(cmd, "audio encode")
+        os.replace(tmp, out)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+    return out
+
+
+def _file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return float(raw)
+    except ValueError as exc:
+        raise RuntimeError(f"{name} must be a number, got: {raw!r}") from exc
+
+
+def _env_int(name: str) -> int | None:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return None
+    try:
+        return int(raw)
+    except ValueError as exc:
+        raise RuntimeError(f"{name} must be an integer, got: {raw!r}") from exc
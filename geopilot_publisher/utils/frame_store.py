@@ -0,0 +1,101 @@
+"""
+Chunked on-disk store of RGBA frame sequences.
+
+Frames are kept as fixed-length chunks of lossless video under one cache
+directory per store key, so decoding a chunk gives back the exact bytes
+that were encoded. Chunks are written atomically and can be filled in any
+order: a store grows on demand to cover the longest timeline asked of it
+and is shared by every render (and worker process) with the same key.
+"""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+from geopilot_publisher.utils.ffmpeg import (
+    FfmpegProcess,
+    build_lossless_encode_command,
+    build_rawvideo_decode_command,
+    rawvideo_input_args,
+)
+from geopilot_publisher.utils.paths import cache_dir
+
+
+@dataclass(frozen=True)
+class FrameStore:
+    root: Path
+    width: int
+    height: int
+    fps: int
+    chunk_frames: int
+
+    @classmethod
+    def open(
+        cls,
+        name: str,
+        key: str,
+        width: int,
+        height: int,
+        fps: int,
+        chunk_frames: int,
+    ) -> "FrameStore":
+        root = cache_dir("frames", f"{name}-{key[:16]}")
+        return cls(root, width, height, fps, max(1, chunk_frames))
+
+    @property
+    def frame_size(self) -> int:
+        return self.width * self.height * 4
+
+    def chunk_path(self, index: int) -> Path:
+        return self.root / f"chunk_{index:05d}.mov"
+
+    def chunk_range(self, index: int) -> range:
+        """Frames held by chunk `index` (every chunk is full length)."""
+        start = index * self.chunk_frames
+        return range(start, start + self.chunk_frames)
+
+    def missing_chunks(self, total_frames: int) -> list[int]:
+        """Chunks still needed to cover frames [0, total_frames)."""
+        count = -(-total_frames // self.chunk_frames)
+        return [
+            index
+            for index in range(count)
+            if not self.chunk_path(index).exists() or self.chunk_path(index).stat().st_size == 0
+        ]
+
+    def encode_command(self, ffmpeg: str, out_path: Path) -> list[str]:
+        """ffmpeg command that reads raw RGBA frames on stdin into `out_path`."""
+        return build_lossless_encode_command(
+            ffmpeg, rawvideo_input_args(self.width, self.height, self.fps), out_path
+        )
+
+    def partial_path(self, index: int) -> Path:
+        # Per-process name: concurrent renders may fill the same chunk.
+        return self.root / f"chunk_{index:05d}.{os.getpid()}.partial.mov"
+
+    def commit(self, index: int, partial: Path) -> None:
+        os.replace(partial, self.chunk_path(index))
+
+    def read(self, ffmpeg: str, start: int, stop: int) -> Iterator[bytes]:
+        """Yield raw RGBA bytes for frames [start, stop); chunks must exist."""
+        size = self.frame_size
+        idx = start
+        while idx < stop:
+            index = idx // self.chunk_frames
+            frames = self.chunk_range(index)
+            path = self.chunk_path(index)
+            if not path.exists():
+                raise RuntimeError(f"Frame store chunk missing: {path}")
+            cmd = build_rawvideo_decode_command(ffmpeg, path)
+            # Leaving early (the caller stopped mid-chunk) kills the decoder.
+            with FfmpegProcess(cmd, f"decode {path.name}", stdout=True) as decoder:
+                for chunk_idx in frames:
+                    if chunk_idx >= stop:
+                        break
+                    data = decoder.read(size)
+                    if chunk_idx >= idx:
+                        yield data
+            idx = min(frames.stop, stop)
+
@@ -0,0 +1,70 @@
+"""
+Memory + disk cache for static render layers (background plates etc.).
+
+A layer is identified by a name and the parameters it is built from; the
+hash of both names the cached PNG under <cache>/layers/. Lookups go memory
+-> disk -> build, and builds are written atomically so parallel workers and
+concurrent batch items can race on the same layer safely.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Callable
+
+from PIL import Image
+
+from geopilot_publisher.utils.paths import cache_dir
+
+# Bump when a layer builder changes its output for the same parameters.
+LAYER_CACHE_VERSION = 1
+
+_MEMORY: dict[str, Image.Image] = {}
+
+
+def layer_key(name: str, params: dict) -> str:
+    payload = json.dumps(
+        {"name": name, "params": params, "version": LAYER_CACHE_VERSION},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cached_layer(name: str, params: dict, build: Callable[[], Image.Image]) -> Image.Image:
+    """
+    Return the layer for (name, params), building it with `build()` on a miss.
+    Callers get the shared instance and must copy before drawing on it.
+    """
+    key = layer_key(name, params)
+    image = _MEMORY.get(key)
+    if image is not None:
+        return image
+
+    path = cache_dir("layers") / f"{name}-{key[:16]}.png"
+    if path.exists():
+        try:
+            with Image.open(path) as im:
+                image = im.convert("RGBA") if im.mode != "RGBA" else im.copy()
+        except OSError:
+            image = None  # truncated or corrupt: rebuild below
+
+    if image is None:
+        image = build()
+        _write_atomic(image, path)
+
+    _MEMORY[key] = image
+    return image
+
+
+def _write_atomic(image: Image.Image, path) -> None:
+    fd, tmp = tempfile.mkstemp(prefix=path.stem, suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            image.save(f, format="PNG")
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
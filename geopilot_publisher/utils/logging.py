@@ -1 +1,308 @@
-# TODO: structured logging helpers
+"""
+Structured tracing for pipeline runs.
+
+Code marks units of work with span(): pipeline stages, API calls (chat,
+speech), the render frame loop, every ffmpeg process, upload chunks. Each
+finished span is appended as one JSON line to artifacts/trace.jsonl with
+its wall time, CPU time of the calling thread, CPU time of reaped child
+processes (ffmpeg), peak RSS of this process and of its children, and the
+bytes this process read/wrote (including pipes and sockets) while it was
+open. Records carry a run id shared with worker processes, so one file can
+hold many runs and still be split apart.
+
+CPU, RSS and I/O come from process-wide counters: for spans that overlap
+(concurrent stages, coroutines on one event loop) they include the other
+work too. Peak RSS is the high-water mark so far, not the span's own peak.
+
+print_trace_summary() prints a per-span-name table for the current run and
+export_chrome_trace() writes it as Chrome trace events (chrome://tracing,
+Perfetto). For older runs:
+
+  python -m geopilot_publisher.utils.logging [trace.jsonl] [--run ID] [--out FILE]
+
+Tuning (env):
+  GP_TRACE           0 disables tracing (default 1)
+  GP_TRACE_PATH      trace file (default artifacts/trace.jsonl)
+  GP_TRACE_RUN_ID    run id for the records (default: start time and pid)
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import contextvars
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows: no rusage
+    resource = None
+
+_LOCK = threading.Lock()
+_IDS = itertools.count(1)
+_CURRENT: contextvars.ContextVar[str | None] = contextvars.ContextVar("gp_span", default=None)
+
+
+class Span:
+    """An open span; extra fields set with span[key] = value end up in its record."""
+
+    def __init__(self, name: str, attrs: dict) -> None:
+        self.name = name
+        self.attrs = attrs
+        self.id = f"{os.getpid()}:{next(_IDS)}"
+        self.parent = _CURRENT.get()
+        self._token = None
+        self._ended = False
+        self._ts = time.time()
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+        self._child_cpu = _child_cpu()
+        self._io = _io_counters()
+
+    def __setitem__(self, key: str, value) -> None:
+        self.attrs[key] = value
+
+    def end(self, error: BaseException | str | None = None) -> None:
+        if self._ended:
+            return
+        self._ended = True
+        if self._token is not None:
+            with contextlib.suppress(ValueError):  # ended in another context
+                _CURRENT.reset(self._token)
+        if not _enabled():
+            return
+        io = _io_counters()
+        peak, child_peak = _peak_rss_mb()
+        record = {
+            "run": run_id(),
+            "id": self.id,
+            "parent": self.parent,
+            "name": self.name,
+            "pid": os.getpid(),
+            "tid": threading.get_native_id(),
+            "thread": threading.current_thread().name,
+            "ts": round(self._ts, 6),
+            "wall_s": round(time.perf_counter() - self._wall, 6),
+            "cpu_s": round(time.thread_time() - self._cpu, 6),
+            "child_cpu_s": round(_child_cpu() - self._child_cpu, 6),
+            "peak_rss_mb": peak,
+            "child_peak_rss_mb": child_peak,
+            "read_bytes": io[0] - self._io[0] if io and self._io else None,
+            "write_bytes": io[1] - self._io[1] if io and self._io else None,
+            "ok": error is None,
+        }
+        if error is not None:
+            record["error"] = (
+                error if isinstance(error, str) else f"{type(error).__name__}: {error}"
+            )[:500]
+        if self.attrs:
+            record["attrs"] = self.attrs
+        _write(record)
+
+
+def start_span(name: str, **attrs) -> Span:
+    """
+    Open a span that is ended explicitly with .end(), for work that does not
+    fit in one block (e.g. a process that outlives the call that started it).
+    """
+    return Span(name, attrs)
+
+
+@contextlib.contextmanager
+def span(name: str, **attrs):
+    """Trace the enclosed block; spans opened inside it record it as parent."""
+    current = Span(name, attrs)
+    current._token = _CURRENT.set(current.id)
+    try:
+        yield current
+    except BaseException as exc:
+        current.end(exc)
+        raise
+    current.end()
+
+
+def run_id() -> str:
+    run = os.getenv("GP_TRACE_RUN_ID")
+    if not run:
+        # Exported so worker processes (forked or spawned) log under the same run.
+        run = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+        os.environ["GP_TRACE_RUN_ID"] = run
+    return run
+
+
+def trace_path() -> Path:
+    return Path(os.getenv("GP_TRACE_PATH") or Path("artifacts") / "trace.jsonl")
+
+
+def load_trace(path: str | Path | None = None, run: str | None = None) -> list[dict]:
+    """Span records from the trace file, optionally only those of one run."""
+    path = Path(path) if path is not None else trace_path()
+    records = []
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return []
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue  # torn line from a killed process
+        if run is None or record.get("run") == run:
+            records.append(record)
+    return records
+
+
+def print_trace_summary(label: str = "trace", records: list[dict] | None = None) -> None:
+    """Per span name: count, wall/CPU totals, peak RSS and I/O for the current run."""
+    if records is None:
+        if not _enabled():
+            return
+        records = load_trace(run=run_id())
+    if not records:
+        return
+    groups: dict[str, list[dict]] = {}
+    for record in sorted(records, key=lambda r: r["ts"]):
+        groups.setdefault(record["name"], []).append(record)
+    width = max(16, *(len(name) for name in groups))
+    print(
+        f"[{label}] {'span':<{width}} {'n':>4} {'wall_s':>9} {'max_s':>8} {'cpu_s':>8} "
+        f"{'child_cpu_s':>11} {'peak_mb':>8} {'read_mb':>8} {'write_mb':>8} {'err':>4}"
+    )
+    for name, group in groups.items():
+        peak = max(
+            max(r.get("peak_rss_mb") or 0, r.get("child_peak_rss_mb") or 0) for r in group
+        )
+        print(
+            f"[{label}] {name:<{width}} {len(group):>4} "
+            f"{sum(r['wall_s'] for r in group):>9.2f} "
+            f"{max(r['wall_s'] for r in group):>8.2f} "
+            f"{sum(r['cpu_s'] for r in group):>8.2f} "
+            f"{sum(r['child_cpu_s'] for r in group):>11.2f} "
+            f"{peak:>8.0f} "
+            f"{sum(r.get('read_bytes') or 0 for r in group) / 1048576:>8.1f} "
+            f"{sum(r.get('write_bytes') or 0 for r in group) / 1048576:>8.1f} "
+            f"{sum(1 for r in group if not r['ok']):>4}"
+        )
+
+
+def export_chrome_trace(
+    out_path: str | Path | None = None,
+    records: list[dict] | None = None,
+) -> Path | None:
+    """
+    Write spans (default: the current run) as Chrome trace events, next to
+    the trace file unless `out_path` is given. Returns the path written.
+    """
+    if records is None:
+        if not _enabled():
+            return None
+        records = load_trace(run=run_id())
+    if not records:
+        return None
+    out_path = Path(out_path) if out_path is not None else trace_path().with_suffix(".chrome.json")
+    events = []
+    threads = {}
+    for record in records:
+        args = {
+            key: record.get(key)
+            for key in (
+                "cpu_s",
+                "child_cpu_s",
+                "peak_rss_mb",
+                "child_peak_rss_mb",
+                "read_bytes",
+                "write_bytes",
+                "error",
+            )
+            if record.get(key) is not None
+        }
+        args.update(record.get("attrs") or {})
+        events.append(
+            {
+                "name": record["name"],
+                "cat": record["name"].split(".", 1)[0],
+                "ph": "X",
+                "ts": int(record["ts"] * 1e6),
+                "dur": max(1, int(record["wall_s"] * 1e6)),
+                "pid": record["pid"],
+                "tid": record["tid"],
+                "args": args,
+            }
+        )
+        threads[(record["pid"], record["tid"])] = record.get("thread", "")
+    for (pid, tid), name in threads.items():
+        events.append(
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+        )
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(json.dumps({"traceEvents": events}), encoding="utf-8")
+    print(f"[trace] chrome trace: {out_path} ({len(records)} spans)")
+    return out_path
+
+
+def _enabled() -> bool:
+    return os.getenv("GP_TRACE", "1") != "0"
+
+
+def _write(record: dict) -> None:
+    path = trace_path()
+    line = json.dumps(record, default=str) + "\n"
+    with _LOCK:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # One write per line on an O_APPEND file: worker processes can share it.
+        with path.open("a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def _child_cpu() -> float:
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _peak_rss_mb() -> tuple[float | None, float | None]:
+    if resource is None:
+        return None, None
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    scale = 1048576 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return round(own, 1), round(children, 1)
+
+
+def _io_counters() -> tuple[int, int] | None:
+    """(rchar, wchar) of this process: all bytes read/written, not only disk I/O."""
+    try:
+        text = Path("/proc/self/io").read_text()
+    except OSError:
+        return None
+    fields = dict(line.split(": ", 1) for line in text.splitlines() if ": " in line)
+    return int(fields.get("rchar", 0)), int(fields.get("wchar", 0))
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Summarize a trace and export it for chrome://tracing.")
+    p.add_argument("trace", nargs="?", default=None, help="trace JSONL (default GP_TRACE_PATH)")
+    p.add_argument("--run", default=None, help="only this run id (default: the latest run)")
+    p.add_argument("--out", default=None, help="Chrome trace output (default <trace>.chrome.json)")
+    args = p.parse_args()
+
+    path = Path(args.trace) if args.trace else trace_path()
+    records = load_trace(path)
+    run = args.run or (max(records, key=lambda r: r["ts"])["run"] if records else None)
+    records = [r for r in records if r.get("run") == run]
+    if not records:
+        raise SystemExit(f"No spans found in {path}" + (f" for run {args.run}" if args.run else ""))
+    print(f"[trace] run={run} spans={len(records)}")
+    print_trace_summary(records=records)
+    export_chrome_trace(args.out or path.with_suffix(".chrome.json"), records=records)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Array-backed particle engine for the network background.
+
+Positions, velocities and radii live in NumPy arrays; the soft-bounce
+update, the connection pass and the nearest-anchor lookup are batched
+array operations instead of per-particle Python loops. Neighbour search
+goes through a uniform cell grid (CellGrid), so the connection pass is
+O(n * neighbours) rather than O(n^2) and particle counts in the thousands
+stay cheap.
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from random import Random
+
+try:
+    import numpy as np
+except Exception as exc:  # pragma: no cover - dependency guard
+    raise RuntimeError(
+        "NumPy is required for the particle engine. "
+        "Install it with: pip install numpy"
+    ) from exc
+
+
+@dataclass
+class ParticleField:
+    x: np.ndarray
+    y: np.ndarray
+    vx: np.ndarray
+    vy: np.ndarray
+    radii: np.ndarray
+    width: float
+    height: float
+
+    def __post_init__(self) -> None:
+        self._track_x = _bounce_tracks(self.x, self.vx, self.width)
+        self._track_y = _bounce_tracks(self.y, self.vy, self.height)
+
+    @classmethod
+    def random(
+        cls,
+        count: int,
+        width: float,
+        height: float,
+        speed: tuple[float, float],
+        radius: tuple[float, float],
+        seed: int = 42,
+    ) -> "ParticleField":
+        """`count` particles with uniform positions, headings, speeds and radii."""
+        rng = Random(seed)
+        rows = []
+        for _ in range(count):
+            x = rng.uniform(0, width)
+            y = rng.uniform(0, height)
+            v = rng.uniform(*speed)
+            angle = rng.uniform(0, math.tau)
+            r = rng.uniform(*radius)
+            rows.append([x, y, math.cos(angle) * v, math.sin(angle) * v, r])
+        return cls.from_rows(rows, width=width, height=height)
+
+    @classmethod
+    def from_rows(cls, rows: list[list[float]], width: float, height: float) -> "ParticleField":
+        """Build from [x, y, vx, vy, r] rows."""
+        arr = np.asarray(rows, dtype=np.float64).reshape(-1, 5)
+        return cls(*arr.T.copy(), width=width, height=height)
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def positions(self, frame_idx: int) -> np.ndarray:
+        """(n, 2) positions after `frame_idx` soft-bounce steps."""
+        return np.stack(
+            (
+                _bounce_positions(self._track_x, frame_idx),
+                _bounce_positions(self._track_y, frame_idx),
+            ),
+            axis=1,
+        )
+
+    def connections(
+        self,
+        positions: np.ndarray,
+        connect_dist: float,
+        max_alpha: int,
+        grid: "CellGrid | None" = None,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Edges (i, j, alpha) for every pair closer than `connect_dist`, with
+        alpha fading linearly to 0 at the cut-off. Pairs are ordered i < j,
+        row-major, so drawing order matches a nested i/j loop.
+        Pass the frame's `grid` to reuse it; one is built otherwise.
+        """
+        if grid is None:
+            grid = CellGrid(positions, connect_dist)
+        i, j = grid.candidate_pairs()
+        return _edges_from_pairs(positions, i, j, connect_dist, max_alpha)
+
+    @staticmethod
+    def nearest(
+        positions: np.ndarray,
+        points,
+        grid: "CellGrid | None" = None,
+    ) -> np.ndarray:
+        """Index of the nearest particle for each (x, y) row of `points`."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if len(positions) == 0 or len(points) == 0:
+            return np.zeros(len(points), dtype=np.int64)
+        if grid is None:
+            return _nearest_all(positions, points)
+        return grid.nearest(points)
+
+
+class CellGrid:
+    """
+    Uniform-grid neighbour index over one frame's particle positions.
+
+    Particles are bucketed into square cells of `cell_size` (>= the largest
+    query radius) and sorted by cell, so every cell is a contiguous slice.
+    Rebuilding it is a sort over n keys, cheap enough to do every frame.
+    """
+
+    # Half of the 3x3 neighbourhood: each unordered pair of adjacent cells is
+    # visited exactly once.
+    _HALF_STENCIL = ((0, 0), (1, 0), (-1, 1), (0, 1), (1, 1))
+
+    def __init__(self, positions: np.ndarray, cell_size: float) -> None:
+        if cell_size <= 0:
+            raise ValueError(f"cell_size must be positive, got {cell_size}")
+        self.positions = positions
+        self.cell_size = float(cell_size)
+        cells = np.floor(positions / self.cell_size).astype(np.int64)
+        cells = np.maximum(cells, 0)
+        self.nx = int(cells[:, 0].max()) + 1 if len(cells) else 1
+        self.ny = int(cells[:, 1].max()) + 1 if len(cells) else 1
+        keys = cells[:, 0] * self.ny + cells[:, 1]
+        self.order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[self.order]
+        all_keys = np.arange(self.nx * self.ny)
+        self.starts = np.searchsorted(sorted_keys, all_keys, side="left")
+        self.ends = np.searchsorted(sorted_keys, all_keys, side="right")
+        self.cx = cells[self.order, 0]
+        self.cy = cells[self.order, 1]
+
+    def candidate_pairs(self) -> tuple[np.ndarray, np.ndarray]:
+        """All (i, j), i < j, of particles in the same or adjacent cells."""
+        chunks_i = []
+        chunks_j = []
+        for dx, dy in self._HALF_STENCIL:
+            ncx = self.cx + dx
+            ncy = self.cy + dy
+            src = np.nonzero((ncx >= 0) & (ncx < self.nx) & (ncy >= 0) & (ncy < self.ny))[0]
+            key = ncx[src] * self.ny + ncy[src]
+            ends = self.ends[key]
+            if dx == 0 and dy == 0:
+                # Same cell: only partners after this one in sorted order.
+                starts = src + 1
+            else:
+                starts = self.starts[key]
+            counts = np.maximum(ends - starts, 0)
+            src_sorted, partner_sorted = _expand_ranges(src, starts, counts)
+            chunks_i.append(self.order[src_sorted])
+            chunks_j.append(self.order[partner_sorted])
+        i = np.concatenate(chunks_i)
+        j = np.concatenate(chunks_j)
+        return np.minimum(i, j), np.maximum(i, j)
+
+    def nearest(self, points: np.ndarray) -> np.ndarray:
+        """
+        Nearest particle per point, searching the point's 3x3 cell block.
+        Anything outside the block is at least one cell away, so a hit
+        within `cell_size` is exact; other points fall back to a full scan.
+        """
+        result = np.empty(len(points), dtype=np.int64)
+        cells = np.floor(points / self.cell_size).astype(np.int64)
+        for k, (px, py) in enumerate(points):
+            cx, cy = cells[k]
+            x0, x1 = max(cx - 1, 0), min(cx + 1, self.nx - 1)
+            y0, y1 = max(cy - 1, 0), min(cy + 1, self.ny - 1)
+            if x0 <= x1 and y0 <= y1:
+                # Cells of one grid column are adjacent in sorted order.
+                block = [
+                    self.order[self.starts[gx * self.ny + y0] : self.ends[gx * self.ny + y1]]
+                    for gx in range(x0, x1 + 1)
+                ]
+                # Sorted so ties resolve to the lowest index, like a full scan.
+                candidates = np.sort(np.concatenate(block))
+            else:
+                candidates = np.empty(0, dtype=np.int64)
+            if len(candidates):
+                d = self.positions[candidates] - (px, py)
+                dist = d[:, 0] * d[:, 0] + d[:, 1] * d[:, 1]
+                best = int(np.argmin(dist))
+                if dist[best] <= self.cell_size * self.cell_size:
+                    result[k] = candidates[best]
+                    continue
+            result[k] = _nearest_all(self.positions, points[k : k + 1])[0]
+        return result
+
+
+def all_pairs_connections(
+    positions: np.ndarray,
+    connect_dist: float,
+    max_alpha: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Reference O(n^2) connection pass (same output as the grid path)."""
+    i, j = np.triu_indices(len(positions), k=1)
+    return _edges_from_pairs(positions, i, j, connect_dist, max_alpha)
+
+
+def _edges_from_pairs(
+    positions: np.ndarray,
+    i: np.ndarray,
+    j: np.ndarray,
+    connect_dist: float,
+    max_alpha: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    d = positions[j] - positions[i]
+    dist = np.hypot(d[:, 0], d[:, 1])
+    alpha = ((1.0 - dist / connect_dist) * max_alpha).astype(np.int64)
+    keep = np.nonzero((dist < connect_dist) & (alpha > 0))[0]
+    # Row-major (i, j) order, independent of how candidates were generated.
+    keep = keep[np.argsort(i[keep] * len(positions) + j[keep], kind="stable")]
+    return i[keep], j[keep], alpha[keep]
+
+
+def _expand_ranges(
+    src: np.ndarray, starts: np.ndarray, counts: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Flatten [starts[k], starts[k] + counts[k]) ranges, tagging each with src[k]."""
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(src, counts), np.repeat(starts, counts) + offsets
+
+
+def _nearest_all(positions: np.ndarray, points: np.ndarray) -> np.ndarray:
+    d = positions[None, :, :] - points[:, None, :]
+    dist = d[:, :, 0] * d[:, :, 0] + d[:, :, 1] * d[:, :, 1]
+    return np.argmin(dist, axis=1)
+
+
+def _bounce_tracks(pos: np.ndarray, vel: np.ndarray, limit: float) -> tuple:
+    """
+    Closed form of the per-frame soft-bounce update along one axis.
+
+    The update (step by vel; if that leaves [0, limit], flip vel and step the
+    other way) keeps a particle on the lattice pos + k*|vel|, walking k back
+    and forth between the first and last in-bounds lattice index. Returns
+    (pos, step, lo, span, phase) arrays for _bounce_positions.
+    """
+    pos = np.asarray(pos, dtype=np.float64)
+    step = np.abs(np.asarray(vel, dtype=np.float64))
+    moving = step > 0.0
+    safe_step = np.where(moving, step, 1.0)
+    lo = np.ceil(-pos / safe_step).astype(np.int64)
+    hi = np.floor((limit - pos) / safe_step).astype(np.int64)
+    span = np.where(moving, hi - lo, 0)
+    frozen = span <= 0
+    span = np.where(frozen, 0, span)
+    lo = np.where(frozen, 0, lo)
+    step = np.where(frozen, 0.0, step)
+    # phase in [0, 2*span): rising while <= span, falling after.
+    period = np.maximum(2 * span, 1)
+    phase = np.where(np.asarray(vel) > 0, -lo, (2 * span + lo) % period)
+    return pos, step, lo, span, phase
+
+
+def _bounce_positions(track: tuple, frame_idx: int) -> np.ndarray:
+    pos, step, lo, span, phase = track
+    u = (phase + frame_idx) % np.maximum(2 * span, 1)
+    k = np.where(u <= span, lo + u, lo + 2 * span - u)
+    return pos + k * step
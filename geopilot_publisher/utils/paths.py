@@ -1 +1,23 @@
-# TODO: artifacts path helpers
+"""
+Artifact and cache locations.
+
+Artifacts are per-run outputs (CI uploads the whole directory); the cache
+holds reusable intermediates that survive across runs and can be shared by
+batch items and worker processes. GP_CACHE_DIR moves the cache, e.g. onto a
+persistent CI cache volume.
+"""
+import os
+from pathlib import Path
+
+
+def artifacts_dir() -> Path:
+    path = Path("artifacts")
+    path.mkdir(exist_ok=True)
+    return path
+
+
+def cache_dir(*parts: str) -> Path:
+    root = Path(os.getenv("GP_CACHE_DIR", "") or Path(".cache") / "geopilot")
+    path = root.joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
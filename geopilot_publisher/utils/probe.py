@@ -0,0 +1,347 @@
+"""
+In-process media probing for the files the pipeline produces.
+
+MP3 (the voice track) is read from its frame headers: the Xing/Info or
+VBRI tag gives the exact frame count when present, otherwise every frame
+header is walked. MP4 (the rendered video) is read from the moov box:
+mvhd for the duration, and per track tkhd/mdhd/hdlr/stsd/stsz for the
+codec, resolution, sample rate and frame count. Neither spawns a process;
+anything these parsers don't understand falls back to ffprobe.
+"""
+from __future__ import annotations
+
+import json
+import os
+import struct
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass(frozen=True)
+class MediaInfo:
+    duration: float
+    format: str
+    audio_codec: str | None = None
+    sample_rate: int | None = None
+    video_codec: str | None = None
+    width: int | None = None
+    height: int | None = None
+    # Video samples for MP4, audio frames for MP3.
+    frame_count: int | None = None
+
+    @property
+    def has_audio(self) -> bool:
+        return self.audio_codec is not None
+
+    @property
+    def has_video(self) -> bool:
+        return self.video_codec is not None
+
+
+def probe_media(path: str | Path, ffprobe: str | None = None) -> MediaInfo:
+    """
+    Probe `path` in-process; if the file is not an MP3/MP4 these parsers
+    handle, fall back to `ffprobe` (default FFPROBE_BIN, then `ffprobe`).
+    """
+    path = Path(path)
+    try:
+        return probe_media_native(path)
+    except RuntimeError as exc:
+        ffprobe = ffprobe or os.getenv("FFPROBE_BIN", "ffprobe")
+        print(f"[probe] {path.name}: {exc}; falling back to {ffprobe}")
+        return _ffprobe_media(ffprobe, path)
+
+
+def probe_media_native(path: str | Path) -> MediaInfo:
+    path = Path(path)
+    with path.open("rb") as f:
+        head = f.read(12)
+    try:
+        if len(head) >= 8 and head[4:8] == b"ftyp":
+            return _probe_mp4(path)
+        if head[:3] == b"ID3" or (len(head) >= 2 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+            return _probe_mp3(path)
+    except struct.error as exc:
+        raise RuntimeError(f"truncated header: {exc}") from None
+    raise RuntimeError("not an MP3 or MP4 file")
+
+
+def media_duration(path: str | Path, ffprobe: str | None = None) -> float:
+    return probe_media(path, ffprobe).duration
+
+
+# -- MP3 ---------------------------------------------------------------------
+
+_MP3_BITRATES = {
+    # (MPEG-1?, layer) -> kbps by index 1..14
+    (True, 1): (32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+@dataclass(frozen=True)
+class _Mp3Frame:
+    mpeg1: bool
+    layer: int
+    bitrate: int
+    sample_rate: int
+    samples: int
+    length: int
+    mono: bool
+
+
+def _parse_mp3_header(data: bytes, pos: int) -> _Mp3Frame | None:
+    if pos + 4 > len(data):
+        return None
+    b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+    if data[pos] != 0xFF or b1 & 0xE0 != 0xE0:
+        return None
+    version = (b1 >> 3) & 3
+    layer = 4 - ((b1 >> 1) & 3)
+    bitrate_idx = b2 >> 4
+    rate_idx = (b2 >> 2) & 3
+    if version == 1 or layer == 4 or bitrate_idx in (0, 15) or rate_idx == 3:
+        return None  # reserved / free-format: not a frame we can size
+    mpeg1 = version == 3
+    bitrate = _MP3_BITRATES[(mpeg1, layer)][bitrate_idx - 1] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_idx]
+    padding = (b2 >> 1) & 1
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 1152 if mpeg1 or layer == 2 else 576
+        length = samples // 8 * bitrate // sample_rate + padding
+    return _Mp3Frame(mpeg1, layer, bitrate, sample_rate, samples, length, b3 >> 6 == 3)
+
+
+def _probe_mp3(path: Path) -> MediaInfo:
+    data = path.read_bytes()
+    pos = 0
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        pos = 10 + size + (10 if data[5] & 0x10 else 0)
+    end = len(data) - (128 if data[-128:-125] == b"TAG" else 0)
+
+    # Resync to the first frame whose successor is also a valid header.
+    while pos < end:
+        first = _parse_mp3_header(data, pos)
+        if first is not None and (
+            pos + first.length >= end or _parse_mp3_header(data, pos + first.length) is not None
+        ):
+            break
+        pos += 1
+    else:
+        raise RuntimeError("no MP3 frames found")
+
+    frames = _mp3_tag_frames(data, pos, first)
+    if frames is None:
+        frames = 0
+        while pos < end:
+            frame = _parse_mp3_header(data, pos)
+            if frame is None or frame.length <= 0:
+                break
+            frames += 1
+            pos += frame.length
+    if frames <= 0:
+        raise RuntimeError("no MP3 frames found")
+    return MediaInfo(
+        duration=frames * first.samples / first.sample_rate,
+        format="mp3",
+        audio_codec="mp3",
+        sample_rate=first.sample_rate,
+        frame_count=frames,
+    )
+
+
+def _mp3_tag_frames(data: bytes, pos: int, frame: _Mp3Frame) -> int | None:
+    """Audio frame count from a Xing/Info or VBRI header frame, if present."""
+    if frame.mpeg1:
+        side_info = 17 if frame.mono else 32
+    else:
+        side_info = 9 if frame.mono else 17
+    xing = pos + 4 + side_info
+    # A tag clipped short of its frame count is ignored; the frames are walked.
+    if data[xing : xing + 4] in (b"Xing", b"Info") and len(data) >= xing + 8:
+        (flags,) = struct.unpack_from(">I", data, xing + 4)
+        if flags & 1 and len(data) >= xing + 12:
+            (frames,) = struct.unpack_from(">I", data, xing + 8)
+            return frames
+    vbri = pos + 4 + 32
+    if data[vbri : vbri + 4] == b"VBRI" and len(data) >= vbri + 18:
+        (frames,) = struct.unpack_from(">I", data, vbri + 14)
+        return frames
+    return None
+
+
+# -- MP4 ---------------------------------------------------------------------
+
+_MP4_CODECS = {"avc1": "h264", "avc3": "h264", "hvc1": "hevc", "hev1": "hevc", "mp4a": "aac"}
+
+
+def _iter_boxes(f, start: int, end: int):
+    """(type, payload offset, payload end) for each box in [start, end)."""
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, kind = struct.unpack(">I4s", header)
+        payload = pos + 8
+        if size == 1:
+            (size,) = struct.unpack(">Q", f.read(8))
+            payload += 8
+        elif size == 0:
+            size = end - pos
+        if size < payload - pos:
+            raise RuntimeError(f"corrupt MP4 box at offset {pos}")
+        yield kind.decode("latin-1"), payload, min(pos + size, end)
+        pos += size
+
+
+def _find_box(f, start: int, end: int, kind: str) -> tuple[int, int] | None:
+    for box, payload, box_end in _iter_boxes(f, start, end):
+        if box == kind:
+            return payload, box_end
+    return None
+
+
+def _read_at(f, offset: int, size: int) -> bytes:
+    f.seek(offset)
+    data = f.read(size)
+    if len(data) != size:
+        raise RuntimeError("truncated MP4 box")
+    return data
+
+
+def _probe_mp4(path: Path) -> MediaInfo:
+    with path.open("rb") as f:
+        moov = _find_box(f, 0, path.stat().st_size, "moov")
+        if moov is None:
+            raise RuntimeError("MP4 has no moov box")
+        mvhd = _find_box(f, *moov, "mvhd")
+        if mvhd is None:
+            raise RuntimeError("MP4 has no mvhd box")
+        timescale, duration = _mp4_time(f, mvhd[0], _read_at(f, mvhd[0], 1)[0])
+        if timescale <= 0:
+            raise RuntimeError("MP4 mvhd timescale is zero")
+
+        fields: dict = {}
+        for box, payload, box_end in _iter_boxes(f, *moov):
+            if box == "trak":
+                # First track of each kind wins, like ffprobe's default streams.
+                for key, value in _probe_mp4_track(f, payload, box_end).items():
+                    fields.setdefault(key, value)
+    return MediaInfo(duration=duration / timescale, format="mp4", **fields)
+
+
+def _mp4_time(f, payload: int, version: int) -> tuple[int, int]:
+    """(timescale, duration) from an mvhd/mdhd payload."""
+    if version == 1:
+        return struct.unpack(">IQ", _read_at(f, payload + 20, 12))
+    return struct.unpack(">II", _read_at(f, payload + 12, 8))
+
+
+def _probe_mp4_track(f, start: int, end: int) -> dict:
+    """MediaInfo fields for an audio or video trak; {} for other tracks."""
+    mdia = _find_box(f, start, end, "mdia")
+    if mdia is None:
+        return {}
+    hdlr = _find_box(f, *mdia, "hdlr")
+    if hdlr is None:
+        return {}
+    handler = _read_at(f, hdlr[0] + 8, 4).decode("latin-1")
+    if handler not in ("vide", "soun"):
+        return {}
+
+    stbl = None
+    minf = _find_box(f, *mdia, "minf")
+    if minf is not None:
+        stbl = _find_box(f, *minf, "stbl")
+    fourcc = None
+    sample_rate = None
+    frames = None
+    if stbl is not None:
+        stsd = _find_box(f, *stbl, "stsd")
+        if stsd is not None and stsd[1] - stsd[0] >= 16:
+            # version/flags, entry count, then the first entry's box header.
+            fourcc = _read_at(f, stsd[0] + 12, 4).decode("latin-1")
+            if handler == "soun" and stsd[1] - stsd[0] >= 16 + 28:
+                (rate,) = struct.unpack(">I", _read_at(f, stsd[0] + 16 + 24, 4))
+                sample_rate = rate >> 16
+        stsz = _find_box(f, *stbl, "stsz")
+        if stsz is not None:
+            (frames,) = struct.unpack(">I", _read_at(f, stsz[0] + 8, 4))
+    codec = _MP4_CODECS.get(fourcc, fourcc) if fourcc else "unknown"
+
+    if handler == "soun":
+        if sample_rate is None:
+            mdhd = _find_box(f, *mdia, "mdhd")
+            if mdhd is not None:
+                sample_rate, _ = _mp4_time(f, mdhd[0], _read_at(f, mdhd[0], 1)[0])
+        return {"audio_codec": codec, "sample_rate": sample_rate}
+
+    tkhd = _find_box(f, start, end, "tkhd")
+    width = height = None
+    if tkhd is not None:
+        # 16.16 fixed-point width/height close the tkhd box.
+        width, height = (v >> 16 for v in struct.unpack(">II", _read_at(f, tkhd[1] - 8, 8)))
+    return {"video_codec": codec, "width": width, "height": height, "frame_count": frames}
+
+
+# -- ffprobe fallback --------------------------------------------------------
+
+
+def _ffprobe_media(ffprobe: str, path: Path) -> MediaInfo:
+    cmd = [
+        ffprobe,
+        "-v",
+        "error",
+        "-show_entries",
+        "format=duration,format_name:stream=codec_type,codec_name,sample_rate,width,height,nb_frames",
+        "-of",
+        "json",
+        str(path),
+    ]
+    try:
+        p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as exc:
+        raise RuntimeError(f"Failed to start ffprobe: {ffprobe}") from exc
+    if p.returncode != 0:
+        err = p.stderr.decode("utf-8", errors="replace")
+        raise RuntimeError(f"ffprobe failed (exit {p.returncode}). stderr:\n{err}")
+    try:
+        data = json.loads(p.stdout.decode("utf-8"))
+        duration = float(data["format"]["duration"])
+    except (ValueError, KeyError, TypeError) as exc:
+        raise RuntimeError("Unable to parse ffprobe output") from exc
+
+    fields: dict = {}
+    for stream in data.get("streams", []):
+        if stream.get("codec_type") == "audio" and "audio_codec" not in fields:
+            fields["audio_codec"] = stream.get("codec_name")
+            fields["sample_rate"] = _int_or_none(stream.get("sample_rate"))
+        elif stream.get("codec_type") == "video" and "video_codec" not in fields:
+            fields["video_codec"] = stream.get("codec_name")
+            fields["width"] = _int_or_none(stream.get("width"))
+            fields["height"] = _int_or_none(stream.get("height"))
+            fields["frame_count"] = _int_or_none(stream.get("nb_frames"))
+    return MediaInfo(
+        duration=duration,
+        format=str(data["format"].get("format_name", "unknown")),
+        **fields,
+    )
+
+
+def _int_or_none(value) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
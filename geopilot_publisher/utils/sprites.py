@@ -0,0 +1,139 @@
+"""
+Process-wide cache of pre-rasterized text sprites.
+
+A sprite is a string drawn once with per-character tracking into alpha
+masks. Per frame it is blitted with the caller's colour and opacity in one
+bitmap draw instead of one FreeType draw call per glyph. Glyphs whose boxes
+overlap (kerned pairs like "ff" or "Tj" at small sizes) go into separate
+masks drawn one after another, because blending the union of two glyphs
+once is not the same as blending each of them over the other. Sprites and
+measurements are keyed by (font file, size, text, tracking), so renders of
+different videos in the same process share them.
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+
+from PIL import Image, ImageDraw, ImageFont
+
+
+@dataclass(frozen=True)
+class TextSprite:
+    # (mask, top-left of the mask relative to the text origin passed to
+    # draw.text) per run of glyphs with disjoint boxes, in drawing order.
+    # Almost always a single run.
+    runs: tuple[tuple[Image.Image, tuple[int, int]], ...]
+
+
+_SPRITES: dict[tuple, TextSprite] = {}
+_MEASURES: dict[tuple, tuple[int, int]] = {}
+_MEASURE_DRAW = ImageDraw.Draw(Image.new("L", (1, 1)))
+
+
+def font_key(font: ImageFont.ImageFont) -> tuple:
+    path = getattr(font, "path", None)
+    if path is None:
+        return ("id", id(font))
+    return (str(path), getattr(font, "size", 0), getattr(font, "index", 0))
+
+
+def measure_text(text: str, font: ImageFont.ImageFont, tracking: float) -> tuple[int, int]:
+    """(width, height) of `text` drawn with `tracking` px between glyph boxes."""
+    key = (font_key(font), text, tracking)
+    cached = _MEASURES.get(key)
+    if cached is not None:
+        return cached
+    if not text:
+        return 0, 0
+    total_w = 0.0
+    max_h = 0.0
+    for ch in text:
+        try:
+            bbox = _MEASURE_DRAW.textbbox((0, 0), ch, font=font)
+            ch_w = bbox[2] - bbox[0]
+            ch_h = bbox[3] - bbox[1]
+        except Exception:
+            ch_w, ch_h = font.getsize(ch)
+        total_w += ch_w + tracking
+        max_h = max(max_h, ch_h)
+    total_w = max(0.0, total_w - tracking)
+    result = int(math.ceil(total_w)), int(math.ceil(max_h))
+    _MEASURES[key] = result
+    return result
+
+
+def text_sprite(text: str, font: ImageFont.ImageFont, tracking: float) -> TextSprite:
+    """Rasterize `text` (advancing glyph by glyph, plus `tracking`) once."""
+    key = (font_key(font), text, tracking)
+    sprite = _SPRITES.get(key)
+    if sprite is not None:
+        return sprite
+
+    # Pen positions exactly as a per-glyph draw.text loop would use them.
+    pens = []
+    x = 0.0
+    for ch in text:
+        pens.append(x)
+        x += _advance(font, ch) + tracking
+
+    glyphs = [
+        (pen, ch, _MEASURE_DRAW.textbbox((pen, 0), ch, font=font))
+        for pen, ch in zip(pens, text)
+    ]
+    # A glyph that overlaps one already in the current run starts a new run;
+    # runs are drawn in order, so the blend order matches glyph order.
+    groups: list[list[tuple]] = [[]]
+    for glyph in glyphs:
+        if any(_overlaps(glyph[2], other[2]) for other in groups[-1]):
+            groups.append([])
+        groups[-1].append(glyph)
+
+    sprite = TextSprite(runs=tuple(_rasterize(group, font) for group in groups))
+    _SPRITES[key] = sprite
+    return sprite
+
+
+def blit_sprite(
+    draw: ImageDraw.ImageDraw,
+    sprite: TextSprite,
+    position: tuple[int, int],
+    fill: tuple[int, int, int, int],
+) -> None:
+    """
+    Draw `sprite` at integer `position` with `fill`; the fill's alpha
+    multiplies the mask. Uses the same bitmap blend as draw.text, so the
+    result matches drawing the glyphs one by one.
+    """
+    if fill[3] <= 0:
+        return
+    for mask, (dx, dy) in sprite.runs:
+        draw.bitmap((position[0] + dx, position[1] + dy), mask, fill=fill)
+
+
+def _rasterize(
+    glyphs: list[tuple], font: ImageFont.ImageFont
+) -> tuple[Image.Image, tuple[int, int]]:
+    boxes = [box for _, _, box in glyphs] or [(0, 0, 0, 0)]
+    left = math.floor(min(b[0] for b in boxes))
+    top = math.floor(min(b[1] for b in boxes))
+    right = math.ceil(max(b[2] for b in boxes))
+    bottom = math.ceil(max(b[3] for b in boxes))
+
+    mask = Image.new("L", (max(1, right - left), max(1, bottom - top)), 0)
+    draw = ImageDraw.Draw(mask)
+    for pen, ch, _ in glyphs:
+        # Integer shift keeps each glyph's sub-pixel phase unchanged.
+        draw.text((pen - left, -top), ch, font=font, fill=255)
+    return mask, (left, top)
+
+
+def _overlaps(a: tuple, b: tuple) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def _advance(font: ImageFont.ImageFont, ch: str) -> float:
+    try:
+        return font.getlength(ch)
+    except AttributeError:
+        return font.getsize(ch)[0]
@@ -0,0 +1,8 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache_and_trace(tmp_path, monkeypatch):
+    # Keep caches and trace records out of the working tree.
+    monkeypatch.setenv("GP_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("GP_TRACE_PATH", str(tmp_path / "trace.jsonl"))
@@ -0,0 +1,207 @@
+"""
+Local stand-ins for the external APIs, served from a background thread.
+
+OpenAIStandIn answers chat completions (plain and streamed) and speech, and
+records which client connection (peer port) carried each request, so tests
+can check connection reuse. Point the client at it with OPENAI_BASE_URL.
+
+YouTubeStandIn speaks the resumable upload protocol (initiate, chunk PUTs,
+"bytes */N" offset queries) and can be told to fail the next chunks: answer
+with an HTTP status, keep only half a chunk, drop the connection mid-chunk,
+or forget every session. Point the client at it with GP_YOUTUBE_UPLOAD_URL.
+"""
+from __future__ import annotations
+
+import json
+import socket
+import threading
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _StandIn:
+    handler: type[BaseHTTPRequestHandler]
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.requests: list[tuple[str, int]] = []  # (path, client port)
+        handler = type("Handler", (self.handler,), {"standin": self})
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def record(self, path: str, port: int) -> None:
+        with self.lock:
+            self.requests.append((path, port))
+
+    def connections(self) -> set[int]:
+        """Distinct client connections seen so far."""
+        with self.lock:
+            return {port for _, port in self.requests}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    standin: _StandIn
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def reply(self, code: int, body: bytes = b"", headers: dict | None = None) -> None:
+        self.send_response(code)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _OpenAIHandler(_Handler):
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        self.standin.record(self.path, self.client_address[1])
+        if self.path.endswith("/chat/completions"):
+            text = "A script. Two lines."
+            if body.get("stream"):
+                self.reply(200, _sse(body["model"], text), {"Content-Type": "text/event-stream"})
+                return
+            completion = {
+                "id": "chatcmpl-standin",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": text},
+                    }
+                ],
+            }
+            self.reply(200, json.dumps(completion).encode(), {"Content-Type": "application/json"})
+        elif self.path.endswith("/audio/speech"):
+            # 10 ms of 24 kHz 16-bit silence, whatever the format.
+            self.reply(200, b"\0" * 480, {"Content-Type": "application/octet-stream"})
+        else:
+            self.reply(404, b"{}", {"Content-Type": "application/json"})
+
+
+class OpenAIStandIn(_StandIn):
+    handler = _OpenAIHandler
+
+
+def _sse(model: str, text: str) -> bytes:
+    events = []
+    for i, word in enumerate(text.split(" ")):
+        delta = {"content": word if i == 0 else " " + word}
+        chunk = {
+            "id": "chatcmpl-standin",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+        }
+        events.append(f"data: {json.dumps(chunk)}\n\n")
+    events.append("data: [DONE]\n\n")
+    return "".join(events).encode()
+
+
+class _YouTubeHandler(_Handler):
+    standin: YouTubeStandIn
+
+    def do_POST(self) -> None:
+        meta = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        self.standin.record(self.path, self.client_address[1])
+        if "uploadType=resumable" not in self.path:
+            self.reply(400, b'{"error": "resumable uploads only"}')
+            return
+        sid = self.standin.open_session(int(self.headers["X-Upload-Content-Length"]), meta)
+        self.reply(200, headers={"Location": f"{self.standin.url}/session/{sid}"})
+
+    def do_PUT(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        content_range = self.headers.get("Content-Range", "")
+        self.standin.record(self.path, self.client_address[1])
+        self.standin.puts.append(content_range)
+        session = self.standin.sessions.get(self.path.rsplit("/", 1)[-1])
+        query = content_range.startswith("bytes */")
+        fault = None if query else self.standin.next_fault()
+
+        if fault == "drop":
+            # Half the chunk arrives, then the connection goes away.
+            data = self.rfile.read(length // 2)
+            if session is not None:
+                session["data"] += data
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return
+        body = self.rfile.read(length)
+        if isinstance(fault, int):
+            self.reply(fault, b'{"error": "stand-in fault"}')
+            return
+        if session is None:
+            self.reply(404, b'{"error": "no such upload session"}')
+            return
+        if not query:
+            start = int(content_range.split(" ", 1)[1].split("-", 1)[0])
+            if start != len(session["data"]):
+                self.reply(400, b'{"error": "chunk does not start at the server offset"}')
+                return
+            session["data"] += body[: len(body) // 2] if fault == "partial" else body
+
+        data = session["data"]
+        if len(data) == session["size"]:
+            resource = {"id": "vid_" + session["id"][:8], "snippet": session["meta"].get("snippet")}
+            self.standin.videos[resource["id"]] = bytes(data)
+            self.reply(201, json.dumps(resource).encode(), {"Content-Type": "application/json"})
+        else:
+            self.reply(308, headers={"Range": f"bytes=0-{len(data) - 1}"} if data else {})
+
+
+class YouTubeStandIn(_StandIn):
+    handler = _YouTubeHandler
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.sessions: dict[str, dict] = {}
+        self.videos: dict[str, bytes] = {}  # video id -> uploaded bytes
+        self.initiated = 0
+        self.puts: list[str] = []  # Content-Range of every PUT
+        self.faults: deque = deque()
+
+    @property
+    def upload_url(self) -> str:
+        return self.url + "/upload/youtube/v3/videos"
+
+    def open_session(self, size: int, meta: dict) -> str:
+        sid = uuid.uuid4().hex
+        with self.lock:
+            self.initiated += 1
+            self.sessions[sid] = {"id": sid, "size": size, "data": bytearray(), "meta": meta}
+        return sid
+
+    def fail_next(self, fault: int | str, times: int = 1) -> None:
+        """Fail the next chunk PUTs: an HTTP status, "partial" or "drop"."""
+        self.faults.extend([fault] * times)
+
+    def next_fault(self) -> int | str | None:
+        try:
+            return self.faults.popleft()
+        except IndexError:
+            return None
+
+    def expire_sessions(self) -> None:
+        self.sessions.clear()
@@ -0,0 +1,86 @@
+"""Caption layout: lines fit the safe area and the burned-in box matches the .ass style."""
+import re
+from pathlib import Path
+
+import pytest
+from PIL import ImageFont
+
+from geopilot_publisher.models.render_profile import PROFILES, REFERENCE_WIDTH
+from geopilot_publisher.utils.captions import (
+    BOX_COLOR,
+    BOX_PAD,
+    FONT_SIZE,
+    MARGIN_H,
+    TEXT_WIDTH,
+    Caption,
+    _wrap_two_lines,
+    build_captions_from_script,
+    caption_sprite,
+    write_ass,
+)
+
+ROOT = Path(__file__).resolve().parents[1]
+FONT_PATH = ROOT / "assets" / "fonts" / "Inter-Regular.ttf"
+SCRIPT = (ROOT / "content" / "script.txt").read_text(encoding="utf-8")
+
+
+def _font(size: int = FONT_SIZE) -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(str(FONT_PATH), size=size)
+
+
+def test_lines_fit_between_margins():
+    font = _font()
+    captions = build_captions_from_script(SCRIPT, font=font)
+    assert captions
+    for caption in captions:
+        for line in (caption.line1, caption.line2):
+            assert font.getlength(line) <= REFERENCE_WIDTH - 2 * MARGIN_H, line
+
+
+def test_fitting_keeps_every_word_in_order():
+    captions = build_captions_from_script(SCRIPT, font=_font())
+    words = " ".join(f"{c.line1} {c.line2}" for c in captions).split()
+    assert words == SCRIPT.split()
+    for prev, cur in zip(captions, captions[1:]):
+        assert cur.start_s == pytest.approx(prev.end_s)
+
+
+def test_without_font_wrapping_is_unchanged():
+    # Character-count wrapping, as before pixel fitting existed.
+    assert _wrap_two_lines("short line") == ("short line", "")
+    assert _wrap_two_lines("one two three four five six seven eight nine ten") == (
+        "one two three four five",
+        "six seven eight nine ten",
+    )
+
+
+@pytest.mark.parametrize("profile", sorted(PROFILES))
+def test_sprites_stay_centred_inside_frame(profile):
+    p = PROFILES[profile]
+    scale = p.scale
+    font = _font(max(8, round(FONT_SIZE * scale)))
+    for caption in build_captions_from_script(SCRIPT, font=_font()):
+        sprite = caption_sprite(caption, font, scale)
+        x = (p.width - sprite.width) // 2
+        assert x >= round((MARGIN_H - 14) * scale) - 1
+        assert x + sprite.width <= p.width
+
+
+def test_box_colour_matches_ass_outline_colour(tmp_path):
+    # BorderStyle=3: libass fills the box with OutlineColour (&HAABBGGRR).
+    captions = build_captions_from_script(SCRIPT, font=_font())
+    ass = Path(write_ass(captions, tmp_path / "captions.ass")).read_text(encoding="utf-8")
+    fields = re.search(r"^Style: (.*)$", ass, re.M).group(1).split(",")
+    assert fields[14] == "3"
+    outline = int(fields[4][2:], 16)
+    a, b, g, r = (outline >> 24) & 255, (outline >> 16) & 255, (outline >> 8) & 255, outline & 255
+    assert BOX_COLOR == (r, g, b, 255 - a)
+
+    sprite = caption_sprite(captions[0], _font(), 1.0)
+    assert sprite.getpixel((0, 0)) == BOX_COLOR
+
+
+def test_unbreakable_line_is_scaled_to_fit():
+    word = "Supercalifragilisticexpialidocious" * 2
+    sprite = caption_sprite(Caption(0, 1, word), _font(), 1.0)
+    assert sprite.width <= TEXT_WIDTH + 2 * BOX_PAD
@@ -0,0 +1,87 @@
+"""Stage graph executor on a diamond: a -> (b, c) -> d."""
+import threading
+import time
+
+import pytest
+
+from geopilot_publisher.pipeline.dag import Stage, StageTiming, critical_path, run_stages
+
+
+def _diamond(log, b=None, c=None):
+    lock = threading.Lock()
+
+    def stage(name, fn=None):
+        def run(**deps):
+            with lock:
+                log.append(("start", name, sorted(deps)))
+            value = fn() if fn else name
+            with lock:
+                log.append(("end", name))
+            return value
+
+        return run
+
+    return [
+        Stage("d", stage("d"), needs=("b", "c")),
+        Stage("b", stage("b", b), needs=("a",)),
+        Stage("c", stage("c", c), needs=("a",)),
+        Stage("a", stage("a")),
+    ]
+
+
+def test_dependencies_finish_before_dependants_start():
+    log = []
+    results = run_stages(_diamond(log, b=lambda: time.sleep(0.05) or "b"))
+    assert results == {"a": "a", "b": "b", "c": "c", "d": "d"}
+    order = [(kind, name) for kind, name, *_ in log]
+    for dep, stage in [("a", "b"), ("a", "c"), ("b", "d"), ("c", "d")]:
+        assert order.index(("end", dep)) < order.index(("start", stage))
+    # Results arrive as keyword arguments named after the dependencies.
+    assert ("start", "d", ["b", "c"]) in log
+
+
+def test_failure_stops_dependants_and_reraises():
+    log = []
+
+    def fail():
+        raise ValueError("c broke")
+
+    with pytest.raises(ValueError, match="c broke"):
+        run_stages(_diamond(log, b=lambda: time.sleep(0.05) or "b", c=fail))
+    started = {name for kind, name, *_ in log if kind == "start"}
+    assert started == {"a", "b", "c"}
+    # b was already running and is allowed to finish.
+    assert ("end", "b") in log
+
+
+def test_critical_path_follows_the_longest_chain():
+    stages = {s.name: s for s in _diamond([])}
+    timings = {
+        "a": StageTiming(0.0, 1.0),
+        "b": StageTiming(1.0, 5.0),
+        "c": StageTiming(1.0, 2.0),
+        "d": StageTiming(5.0, 6.0),
+    }
+    assert critical_path(stages, timings) == ["a", "b", "d"]
+    timings["c"] = StageTiming(1.0, 5.5)
+    timings["d"] = StageTiming(5.5, 6.5)
+    assert critical_path(stages, timings) == ["a", "c", "d"]
+    assert critical_path(stages, {}) == []
+
+
+def test_run_reports_the_slow_branch(capsys):
+    run_stages(_diamond([], b=lambda: time.sleep(0.2) or "b"), label="t")
+    assert "critical path=a -> b -> d" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize(
+    "stages,message",
+    [
+        ([Stage("a", dict), Stage("a", dict)], "Duplicate stage name"),
+        ([Stage("a", dict, needs=("x",))], "unknown stage: x"),
+        ([Stage("a", dict, needs=("b",)), Stage("b", dict, needs=("a",))], "cycle"),
+    ],
+)
+def test_invalid_graphs_are_rejected(stages, message):
+    with pytest.raises(RuntimeError, match=message):
+        run_stages(stages)
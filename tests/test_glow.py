@@ -0,0 +1,62 @@
+"""Tiled glow compositing against the full-frame blur it replaces."""
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFilter
+
+from geopilot_publisher.models.render_profile import PROFILES
+from geopilot_publisher.stages.render_video import _GLOW_TILE, _composite_glow
+
+# The tiled path blurs crops padded past the kernel's reach, so it must match
+# the full-frame result exactly.
+MAX_PIXEL_DIFF = 0
+
+
+def _overlay(width: int, height: int) -> Image.Image:
+    """Points and lines on tile edges, the frame border and its corners."""
+    overlay = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    color = (120, 200, 220, 255)
+    edges = [0, _GLOW_TILE - 1, _GLOW_TILE, 3 * _GLOW_TILE - 1, 3 * _GLOW_TILE]
+    xs = edges + [width - 1 - e for e in edges]
+    ys = edges + [height // 2, height - 1 - _GLOW_TILE, height - 1]
+    for x in xs:
+        for y in ys:
+            draw.ellipse((x - 3, y - 3, x + 3, y + 3), fill=color)
+    # Lines crossing tile rows and columns, one along the left border.
+    draw.line((0, 0, width - 1, height - 1), fill=(90, 200, 210, 170), width=2)
+    draw.line((width - 1, _GLOW_TILE, _GLOW_TILE, height - 1), fill=(90, 200, 210, 90), width=2)
+    draw.line((0, height // 3, 0, 2 * height // 3), fill=(90, 200, 210, 170), width=1)
+    return overlay
+
+
+def _frame(width: int, height: int) -> Image.Image:
+    rng = np.random.default_rng(7)
+    rgb = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    alpha = np.full((height, width, 1), 255, dtype=np.uint8)
+    return Image.fromarray(np.concatenate([rgb, alpha], axis=2), "RGBA")
+
+
+@pytest.mark.parametrize("profile", sorted(PROFILES))
+def test_tiled_glow_matches_full_frame_blur(profile):
+    p = PROFILES[profile]
+    # Odd sizes leave partial tiles on the right and bottom edges.
+    width, height = p.width + 7, p.height // 2 + 13
+    radius = 1.2 * p.scale
+    overlay = _overlay(width, height)
+
+    expected = _frame(width, height)
+    expected.alpha_composite(overlay.filter(ImageFilter.GaussianBlur(radius=radius)))
+    actual = _frame(width, height)
+    _composite_glow(actual, overlay, radius=radius)
+
+    diff = np.abs(
+        np.asarray(actual, dtype=np.int16) - np.asarray(expected, dtype=np.int16)
+    ).max()
+    assert diff <= MAX_PIXEL_DIFF
+
+
+def test_empty_overlay_leaves_frame_untouched():
+    frame = _frame(96, 160)
+    before = frame.tobytes()
+    _composite_glow(frame, Image.new("RGBA", frame.size, (0, 0, 0, 0)), radius=1.2)
+    assert frame.tobytes() == before
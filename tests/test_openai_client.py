@@ -0,0 +1,100 @@
+"""Pooled OpenAI clients against a local stand-in: one pool, reused connections."""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from geopilot_publisher.services import openai_client
+from geopilot_publisher.services.openai_client import (
+    aclose_async_clients,
+    create_chat_completion,
+    create_chat_completion_async,
+    get_async_client,
+    get_client,
+    stream_chat_completion,
+)
+from geopilot_publisher.services.openai_tts_client import speech, speech_async
+from tests.standins import OpenAIStandIn
+
+REQUEST = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "hi"}]}
+
+
+@pytest.fixture
+def standin(monkeypatch):
+    with OpenAIStandIn() as server:
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-standin")
+        monkeypatch.setenv("OPENAI_BASE_URL", server.url + "/v1")
+        # Every call must reach the server.
+        monkeypatch.setenv("GP_RESPONSE_CACHE", "0")
+        openai_client.reset_clients()
+        yield server
+        openai_client.reset_clients()
+
+
+def test_sync_calls_share_one_client_and_connection(standin):
+    assert get_client() is get_client()
+    for _ in range(5):
+        create_chat_completion(REQUEST)
+    stream_chat_completion(REQUEST, lambda text: None)
+    speech("Hello.", "gpt-4o-mini-tts", "marin", "pcm")
+    assert len(standin.requests) == 7
+    assert len(standin.connections()) == 1
+
+
+def test_threads_share_the_pool(standin, monkeypatch):
+    monkeypatch.setenv("GP_OPENAI_MAX_CONNECTIONS", "4")
+    monkeypatch.setenv("GP_OPENAI_MAX_KEEPALIVE", "4")
+    openai_client.reset_clients()
+    # No more threads than connections: when requests queue on a full pool,
+    # httpcore now and then closes a connection under a reader and the SDK
+    # retries on a new one, which makes the connection count flaky.
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda _: create_chat_completion(REQUEST), range(16)))
+        clients = set(pool.map(lambda _: id(get_client()), range(8)))
+    assert len(clients) == 1
+    opened = standin.connections()
+    assert 1 <= len(opened) <= 4
+    # Idle keep-alive connections are reused, not replaced.
+    for _ in range(4):
+        create_chat_completion(REQUEST)
+    assert standin.connections() == opened
+
+
+def test_changed_settings_get_their_own_client(standin, monkeypatch):
+    first = get_client()
+    monkeypatch.setenv("GP_OPENAI_TIMEOUT", "30")
+    assert get_client() is not first
+
+
+def test_async_client_per_event_loop(standin):
+    async def run() -> set[int]:
+        client = get_async_client()
+        assert get_async_client() is client
+        before = standin.connections()
+        for _ in range(3):
+            await create_chat_completion_async(REQUEST)
+        await speech_async("Hello.", "gpt-4o-mini-tts", "marin", "pcm")
+        await asyncio.gather(*(create_chat_completion_async(REQUEST) for _ in range(3)))
+        await create_chat_completion_async(REQUEST)
+        opened = standin.connections() - before
+        await aclose_async_clients()
+        return opened
+
+    first = asyncio.run(run())
+    assert 1 <= len(first) <= 3
+    # A new loop gets its own client and connections: the old ones were
+    # bound to the closed loop and closed with it.
+    second = asyncio.run(run())
+    assert second and not (second & first)
+    assert len(openai_client._ASYNC_CLIENTS) == 0
+
+
+def test_sequential_async_calls_reuse_one_connection(standin):
+    async def run() -> None:
+        for _ in range(5):
+            await create_chat_completion_async(REQUEST)
+        await aclose_async_clients()
+
+    asyncio.run(run())
+    assert len(standin.requests) == 5
+    assert len(standin.connections()) == 1
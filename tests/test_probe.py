@@ -0,0 +1,186 @@
+"""In-process MP3/MP4 probing on hand-built files, and against ffprobe on real ones."""
+import os
+import shutil
+import struct
+import subprocess
+
+import pytest
+
+from geopilot_publisher.utils.probe import _ffprobe_media, probe_media, probe_media_native
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, stereo, no padding: 417-byte frames.
+MP3_HEADER = bytes([0xFF, 0xFB, 0x90, 0x00])
+MP3_FRAME = 417
+MP3_FRAME_SECONDS = 1152 / 44100
+SIDE_INFO = 32  # MPEG-1 stereo
+
+
+def _mp3_frame(tag: bytes = b"") -> bytes:
+    payload = bytes(SIDE_INFO) + tag
+    return MP3_HEADER + payload + bytes(MP3_FRAME - 4 - len(payload))
+
+
+def _write(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return path
+
+
+def test_mp3_cbr_frames_are_walked(tmp_path):
+    path = _write(tmp_path, "cbr.mp3", _mp3_frame() * 10)
+    info = probe_media_native(path)
+    assert (info.format, info.audio_codec, info.sample_rate) == ("mp3", "mp3", 44100)
+    assert info.frame_count == 10
+    assert info.duration == pytest.approx(10 * MP3_FRAME_SECONDS)
+    assert not info.has_video
+
+
+def test_mp3_id3_tag_is_skipped(tmp_path):
+    id3 = b"ID3\x04\x00\x00" + bytes([0, 0, 0, 20]) + bytes(20)
+    info = probe_media_native(_write(tmp_path, "id3.mp3", id3 + _mp3_frame() * 3))
+    assert info.frame_count == 3
+
+
+def test_mp3_xing_tag_gives_the_frame_count(tmp_path):
+    # The tag frame's count wins over the frames actually present.
+    xing = b"Xing" + struct.pack(">II", 1, 250)
+    info = probe_media_native(_write(tmp_path, "xing.mp3", _mp3_frame(xing) + _mp3_frame() * 2))
+    assert info.frame_count == 250
+    assert info.duration == pytest.approx(250 * MP3_FRAME_SECONDS)
+
+
+def test_mp3_xing_without_frame_flag_walks_frames(tmp_path):
+    xing = b"Info" + struct.pack(">I", 0)
+    info = probe_media_native(_write(tmp_path, "info.mp3", _mp3_frame(xing) + _mp3_frame() * 4))
+    assert info.frame_count == 5
+
+
+def test_mp3_vbri_tag_gives_the_frame_count(tmp_path):
+    vbri = b"VBRI" + struct.pack(">HHHII", 1, 0, 0, 0, 77)
+    info = probe_media_native(_write(tmp_path, "vbri.mp3", _mp3_frame(vbri) + _mp3_frame()))
+    assert info.frame_count == 77
+
+
+@pytest.mark.parametrize("tag", [b"Xing", b"Xing\0\0", b"Xing\0\0\0\x01\0", b"VBRI\0\x01"])
+def test_mp3_truncated_tag_is_not_fatal(tmp_path, tag):
+    path = _write(tmp_path, "clipped.mp3", MP3_HEADER + bytes(SIDE_INFO) + tag)
+    info = probe_media(path, ffprobe="/nonexistent/ffprobe")
+    assert info.frame_count == 1
+
+
+def test_not_media_is_a_runtime_error(tmp_path):
+    with pytest.raises(RuntimeError, match="not an MP3 or MP4"):
+        probe_media_native(_write(tmp_path, "notes.txt", b"plain text, no frames"))
+    with pytest.raises(RuntimeError, match="no MP3 frames"):
+        probe_media_native(_write(tmp_path, "junk.mp3", b"\xff\xfb" + bytes(64)))
+
+
+# -- MP4 ---------------------------------------------------------------------
+
+
+def _box(kind: bytes, payload: bytes, large: bool = False) -> bytes:
+    if large:
+        return struct.pack(">I4sQ", 1, kind, 16 + len(payload)) + payload
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def _full(payload: bytes) -> bytes:
+    return bytes(4) + payload  # version 0, flags 0
+
+
+def _trak(handler: bytes, fourcc: bytes, entry: bytes, samples: int, size=(0, 0)) -> bytes:
+    tkhd = _full(bytes(72) + struct.pack(">II", size[0] << 16, size[1] << 16))
+    hdlr = _full(bytes(4) + handler + bytes(12) + b"stand-in\0")
+    stsd = _full(struct.pack(">I", 1) + _box(fourcc, entry))
+    stsz = _full(struct.pack(">II", 0, samples))
+    stbl = _box(b"stbl", _box(b"stsd", stsd) + _box(b"stsz", stsz))
+    mdhd = _full(struct.pack(">IIII", 0, 0, 90000, 0) + bytes(4))
+    mdia = _box(b"mdia", _box(b"mdhd", mdhd) + _box(b"hdlr", hdlr) + _box(b"minf", stbl))
+    return _box(b"trak", _box(b"tkhd", tkhd) + mdia)
+
+
+def _video_trak(width=1080, height=1920, frames=75) -> bytes:
+    return _trak(b"vide", b"avc1", bytes(70), frames, (width, height))
+
+
+def _audio_trak(rate=44100) -> bytes:
+    entry = bytes(16) + struct.pack(">HHHHI", 2, 16, 0, 0, rate << 16)
+    return _trak(b"soun", b"mp4a", entry, 120)
+
+
+def _mp4(*traks: bytes, large_moov: bool = False, timescale=1000, duration=2500) -> bytes:
+    mvhd = _full(struct.pack(">IIII", 0, 0, timescale, duration) + bytes(80))
+    moov = _box(b"moov", _box(b"mvhd", mvhd) + b"".join(traks), large=large_moov)
+    ftyp = _box(b"ftyp", b"isom" + bytes(4) + b"isomavc1")
+    return ftyp + _box(b"free", bytes(16)) + moov + _box(b"mdat", bytes(32))
+
+
+def test_mp4_tracks(tmp_path):
+    info = probe_media_native(_write(tmp_path, "v.mp4", _mp4(_video_trak(), _audio_trak())))
+    assert info.format == "mp4"
+    assert info.duration == pytest.approx(2.5)
+    assert (info.video_codec, info.width, info.height, info.frame_count) == ("h264", 1080, 1920, 75)
+    assert (info.audio_codec, info.sample_rate) == ("aac", 44100)
+
+
+def test_mp4_64bit_box_size(tmp_path):
+    info = probe_media_native(
+        _write(tmp_path, "large.mp4", _mp4(_audio_trak(), _video_trak(), large_moov=True))
+    )
+    assert (info.width, info.height, info.audio_codec) == (1080, 1920, "aac")
+
+
+def test_mp4_without_audio(tmp_path):
+    info = probe_media_native(_write(tmp_path, "silent.mp4", _mp4(_video_trak(720, 1280, 30))))
+    assert info.has_video and not info.has_audio
+    assert info.sample_rate is None
+
+
+def test_mp4_first_track_of_each_kind_wins(tmp_path):
+    data = _mp4(_video_trak(1080, 1920), _video_trak(640, 360), _audio_trak(48000))
+    info = probe_media_native(_write(tmp_path, "two.mp4", data))
+    assert (info.width, info.height, info.sample_rate) == (1080, 1920, 48000)
+
+
+def test_mp4_broken_boxes_are_runtime_errors(tmp_path):
+    ftyp = _box(b"ftyp", b"isom" + bytes(4))
+    with pytest.raises(RuntimeError, match="no moov"):
+        probe_media_native(_write(tmp_path, "nomoov.mp4", ftyp + _box(b"mdat", bytes(8))))
+    # A 64-bit size whose largesize field is cut off.
+    clipped = ftyp + struct.pack(">I4s", 1, b"moov") + b"\0\0"
+    with pytest.raises(RuntimeError):
+        probe_media_native(_write(tmp_path, "clipped.mp4", clipped))
+
+
+FFMPEG = os.getenv("FFMPEG_BIN", "ffmpeg")
+FFPROBE = os.getenv("FFPROBE_BIN", "ffprobe")
+
+
+@pytest.mark.skipif(
+    shutil.which(FFMPEG) is None or shutil.which(FFPROBE) is None, reason="needs ffmpeg"
+)
+@pytest.mark.parametrize(
+    "name,args",
+    [
+        ("av.mp4", ["-f", "lavfi", "-i", "sine=d=1", "-c:v", "libx264", "-c:a", "aac"]),
+        ("v.mp4", ["-c:v", "libx264"]),
+        ("a.mp3", ["-f", "lavfi", "-i", "sine=d=1.3", "-c:a", "libmp3lame"]),
+    ],
+)
+def test_native_probe_agrees_with_ffprobe(tmp_path, name, args):
+    path = tmp_path / name
+    source = ["-f", "lavfi", "-i", "testsrc2=s=108x192:r=30:d=1"]
+    if name.endswith(".mp3"):
+        source = []
+    subprocess.run(
+        [FFMPEG, "-v", "error", "-y", *source, *args, "-shortest", str(path)], check=True
+    )
+    native = probe_media_native(path)
+    reference = _ffprobe_media(FFPROBE, path)
+    assert native.duration == pytest.approx(reference.duration, abs=0.03)
+    assert (native.width, native.height) == (reference.width, reference.height)
+    assert native.audio_codec == reference.audio_codec
+    assert native.video_codec == reference.video_codec
+    assert native.sample_rate == reference.sample_rate
+    if native.has_video:
+        assert native.frame_count == reference.frame_count
@@ -0,0 +1,147 @@
+"""Response cache against the OpenAI stand-in: hits, sampling bypass and LRU eviction."""
+import asyncio
+import os
+
+import pytest
+
+from geopilot_publisher.services import openai_client
+from geopilot_publisher.services.openai_client import (
+    aclose_async_clients,
+    create_chat_completion,
+    create_chat_completion_async,
+)
+from geopilot_publisher.services.openai_tts_client import speech, speech_async
+from geopilot_publisher.services.response_cache import (
+    _evict,
+    cache_stats,
+    cached_response,
+    is_sampled,
+    reset_cache_stats,
+)
+from geopilot_publisher.utils.paths import cache_dir
+from tests.standins import OpenAIStandIn
+
+GREEDY = {
+    "model": "gpt-4o-mini",
+    "temperature": 0,
+    "messages": [{"role": "user", "content": "hi"}],
+}
+KIB = 1024
+
+
+@pytest.fixture
+def standin(monkeypatch):
+    with OpenAIStandIn() as server:
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-standin")
+        monkeypatch.setenv("OPENAI_BASE_URL", server.url + "/v1")
+        monkeypatch.delenv("GP_RESPONSE_CACHE", raising=False)
+        monkeypatch.delenv("GP_CACHE_SAMPLED", raising=False)
+        openai_client.reset_clients()
+        reset_cache_stats()
+        yield server
+        openai_client.reset_clients()
+
+
+def test_hit_returns_the_stored_response_without_a_call(standin):
+    first = create_chat_completion(GREEDY)
+    second = create_chat_completion(GREEDY)
+    assert second == first
+    assert len(standin.requests) == 1
+    assert cache_stats()["chat.completions"] == {"misses": 1, "hits": 1}
+
+    assert speech("Hello.", "gpt-4o-mini-tts", "marin", "pcm") == speech(
+        "Hello.", "gpt-4o-mini-tts", "marin", "pcm"
+    )
+    assert len(standin.requests) == 2
+
+
+def test_async_calls_share_the_cache(standin):
+    async def run():
+        completion = await create_chat_completion_async(GREEDY)
+        audio = await speech_async("Hello.", "gpt-4o-mini-tts", "marin", "pcm")
+        await aclose_async_clients()
+        return completion, audio
+
+    completion, audio = asyncio.run(run())
+    assert create_chat_completion(GREEDY) == completion
+    assert speech("Hello.", "gpt-4o-mini-tts", "marin", "pcm") == audio
+    assert len(standin.requests) == 2
+
+
+def test_changed_request_is_a_miss(standin):
+    create_chat_completion(GREEDY)
+    create_chat_completion({**GREEDY, "model": "gpt-4o"})
+    assert len(standin.requests) == 2
+
+
+def test_default_temperature_counts_as_sampled():
+    assert is_sampled({"model": "gpt-4o-mini"})
+    assert is_sampled({"temperature": 0.7})
+    assert not is_sampled({"temperature": 0})
+    assert not is_sampled({"temperature": "0.0"})
+
+
+def test_sampled_calls_bypass_the_cache(standin):
+    sampled = {k: v for k, v in GREEDY.items() if k != "temperature"}
+    for _ in range(2):
+        create_chat_completion(sampled)
+    assert len(standin.requests) == 2
+    assert cache_stats()["chat.completions"] == {"bypassed": 2}
+
+
+def test_sampled_calls_are_cached_on_request(standin, monkeypatch):
+    monkeypatch.setenv("GP_CACHE_SAMPLED", "1")
+    sampled = {**GREEDY, "temperature": 0.9}
+    assert create_chat_completion(sampled) == create_chat_completion(sampled)
+    assert len(standin.requests) == 1
+
+
+def test_cache_can_be_turned_off(standin, monkeypatch):
+    monkeypatch.setenv("GP_RESPONSE_CACHE", "0")
+    create_chat_completion(GREEDY)
+    create_chat_completion(GREEDY)
+    assert len(standin.requests) == 2
+    assert cache_stats() == {}
+
+
+def _fill(monkeypatch, sizes):
+    """Store one response per size (KiB), oldest first; returns their paths."""
+    monkeypatch.setenv("GP_RESPONSE_CACHE_MB", "1024")  # no eviction while filling
+    reset_cache_stats()
+    paths = []
+    for i, size in enumerate(sizes):
+        cached_response("test", {"i": i}, lambda: os.urandom(size * KIB))
+        (path,) = set(cache_dir("responses").glob("*/*")) - set(paths)
+        os.utime(path, (1_000_000 + i, 1_000_000 + i))
+        paths.append(path)
+    return paths
+
+
+def _cached():
+    return set(cache_dir("responses").glob("*/*"))
+
+
+def test_evict_drops_least_recently_used_down_to_the_cap(monkeypatch):
+    paths = _fill(monkeypatch, [400, 400, 400, 400])
+    monkeypatch.setenv("GP_RESPONSE_CACHE_MB", "1")
+    _evict()
+    assert _cached() == set(paths[2:])
+    assert cache_stats()["test"]["evicted"] == 2
+
+
+def test_hit_refreshes_recency(monkeypatch):
+    paths = _fill(monkeypatch, [400, 400, 400])
+    calls = []
+    cached_response("test", {"i": 0}, lambda: calls.append(1) or b"fresh")
+    assert calls == []
+    monkeypatch.setenv("GP_RESPONSE_CACHE_MB", "1")
+    _evict()
+    # The oldest entry was just read, so the next-oldest goes instead.
+    assert _cached() == {paths[0], paths[2]}
+
+
+def test_newest_entry_survives_even_over_the_cap(monkeypatch):
+    paths = _fill(monkeypatch, [300, 1500])
+    monkeypatch.setenv("GP_RESPONSE_CACHE_MB", "1")
+    _evict()
+    assert _cached() == {paths[1]}
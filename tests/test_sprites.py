@@ -0,0 +1,44 @@
+"""Text sprites against drawing the same text glyph by glyph."""
+from pathlib import Path
+
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+from geopilot_publisher.utils.sprites import blit_sprite, text_sprite
+
+FONT_PATH = Path(__file__).resolve().parents[1] / "assets" / "fonts" / "Inter-Regular.ttf"
+
+
+def _draw_per_glyph(draw, position, text, font, fill, tracking):
+    # The renderer's draw loop before sprites.
+    x, y = position
+    for ch in text:
+        draw.text((x, y), ch, font=font, fill=fill)
+        x += font.getlength(ch) + tracking
+
+
+def _render(text, size, tracking, fill, use_sprite):
+    font = ImageFont.truetype(str(FONT_PATH), size=size)
+    frame = Image.new("RGBA", (size * len(text) + 40, size * 3), (9, 24, 58, 255))
+    draw = ImageDraw.Draw(frame, "RGBA")
+    if use_sprite:
+        blit_sprite(draw, text_sprite(text, font, tracking), (7, 5), fill)
+    else:
+        _draw_per_glyph(draw, (7, 5), text, font, fill, tracking)
+    return frame.tobytes()
+
+
+@pytest.mark.parametrize(
+    "text,size,tracking",
+    [
+        ("HISTORICAL PATTERNS", 42, 2.0),  # final profile
+        ("MODEL CONFIDENCE", 21, 1.0),  # preview profile
+        ("Waffle fjord", 14, 2 / 3),  # draft: "ff" and "fj" glyph boxes overlap
+        ("Waffle fjord", 14, 0.0),
+        ("AVATAR Tj ffi", 14, -1.0),
+    ],
+)
+@pytest.mark.parametrize("alpha", [255, 190, 77])
+def test_sprite_matches_per_glyph_drawing(text, size, tracking, alpha):
+    fill = (220, 240, 255, alpha)
+    assert _render(text, size, tracking, fill, True) == _render(text, size, tracking, fill, False)
@@ -0,0 +1,73 @@
+"""Pre-upload media checks: tracks always, Shorts format limits by default."""
+import pytest
+
+from geopilot_publisher.stages import upload_youtube
+from geopilot_publisher.utils.probe import MediaInfo
+
+SHORT = MediaInfo(
+    duration=42.0,
+    format="mp4",
+    audio_codec="aac",
+    sample_rate=48000,
+    video_codec="h264",
+    width=1080,
+    height=1920,
+    frame_count=1260,
+)
+
+
+def _check(monkeypatch, info=SHORT, **fields):
+    info = MediaInfo(**{**info.__dict__, **fields})
+    monkeypatch.setattr(upload_youtube, "probe_media", lambda path: info)
+    upload_youtube._check_video_media("video.mp4")
+
+
+def test_short_passes_the_defaults(monkeypatch):
+    monkeypatch.delenv("GP_UPLOAD_ASPECT", raising=False)
+    monkeypatch.delenv("GP_UPLOAD_MAX_SECONDS", raising=False)
+    _check(monkeypatch)
+
+
+@pytest.mark.parametrize(
+    "fields,message",
+    [
+        ({"duration": 0.0}, "no duration"),
+        ({"video_codec": None}, "no video track"),
+        ({"audio_codec": None}, "no audio track"),
+        ({"width": 1920, "height": 1080}, "expects 9:16"),
+        ({"duration": 181.0}, "allows 180s"),
+    ],
+)
+def test_defaults_reject(monkeypatch, fields, message):
+    monkeypatch.delenv("GP_UPLOAD_ASPECT", raising=False)
+    monkeypatch.delenv("GP_UPLOAD_MAX_SECONDS", raising=False)
+    with pytest.raises(RuntimeError, match=message):
+        _check(monkeypatch, **fields)
+
+
+@pytest.mark.parametrize("off", ["", "off", "OFF"])
+def test_format_limits_can_be_turned_off(monkeypatch, off):
+    monkeypatch.setenv("GP_UPLOAD_ASPECT", off)
+    monkeypatch.setenv("GP_UPLOAD_MAX_SECONDS", off)
+    _check(monkeypatch, width=1920, height=1080, duration=600.0)
+
+
+def test_custom_limits(monkeypatch):
+    monkeypatch.setenv("GP_UPLOAD_ASPECT", "16:9")
+    monkeypatch.setenv("GP_UPLOAD_MAX_SECONDS", "60")
+    _check(monkeypatch, width=1920, height=1080, duration=59.0)
+    with pytest.raises(RuntimeError, match="allows 60s"):
+        _check(monkeypatch, width=1920, height=1080, duration=61.0)
+
+
+@pytest.mark.parametrize("aspect", ["9:0", "0:16", "-9:16", "9x16", "9:16:1", "nan:16"])
+def test_malformed_aspect(monkeypatch, aspect):
+    monkeypatch.setenv("GP_UPLOAD_ASPECT", aspect)
+    with pytest.raises(RuntimeError, match="must look like 9:16"):
+        _check(monkeypatch)
+
+
+def test_malformed_max_seconds(monkeypatch):
+    monkeypatch.setenv("GP_UPLOAD_MAX_SECONDS", "three minutes")
+    with pytest.raises(RuntimeError, match="must be a number"):
+        _check(monkeypatch)
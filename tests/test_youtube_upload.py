@@ -0,0 +1,186 @@
+"""Resumable uploads against a local stand-in: offsets, retries, resume and quota."""
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+from google.oauth2.credentials import Credentials
+
+from geopilot_publisher.pipeline.uploads import QuotaLedger, UploadScheduler
+from geopilot_publisher.services import youtube_client
+from geopilot_publisher.services.youtube_client import (
+    CHUNK_ALIGN,
+    YouTubeClient,
+    upload_resumable,
+)
+from tests.standins import YouTubeStandIn
+
+BODY = {"snippet": {"title": "Stand-in"}, "status": {"privacyStatus": "unlisted"}}
+SIZE = 4 * CHUNK_ALIGN + 12345  # a short last chunk
+
+
+@pytest.fixture
+def standin(monkeypatch):
+    with YouTubeStandIn() as server:
+        monkeypatch.setenv("GP_YOUTUBE_UPLOAD_URL", server.upload_url)
+        monkeypatch.setenv("GP_UPLOAD_CHUNK_MB", "0.25")
+        # Tiny target: chunks stay at the 256 KiB minimum.
+        monkeypatch.setenv("GP_UPLOAD_CHUNK_SECONDS", "0.000001")
+        yield server
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    """Backoff upper bounds, one per retry; the retries themselves do not wait."""
+    bounds = []
+
+    def uniform(lo, hi):
+        bounds.append(hi)
+        return 0.0
+
+    monkeypatch.setattr(youtube_client.random, "uniform", uniform)
+    return bounds
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(os.urandom(SIZE))
+    return path
+
+
+def _client() -> YouTubeClient:
+    return YouTubeClient(Credentials(token="stand-in"))
+
+
+def _state(video):
+    return video.with_name(video.name + ".upload.json")
+
+
+def test_upload_in_chunks(standin, video):
+    resource = upload_resumable(_client(), video, BODY)
+    assert standin.videos[resource["id"]] == video.read_bytes()
+    assert resource["snippet"] == BODY["snippet"]
+    assert standin.initiated == 1
+    assert len(standin.puts) == 5
+    assert not _state(video).exists()
+
+
+def test_partial_acknowledgement_continues_from_the_range_offset(standin, video):
+    standin.fail_next("partial")
+    resource = upload_resumable(_client(), video, BODY)
+    assert standin.videos[resource["id"]] == video.read_bytes()
+    # The server kept half of the first chunk; the next one starts there.
+    half = CHUNK_ALIGN // 2
+    assert standin.puts[:2] == [
+        f"bytes 0-{CHUNK_ALIGN - 1}/{SIZE}",
+        f"bytes {half}-{half + CHUNK_ALIGN - 1}/{SIZE}",
+    ]
+
+
+def test_dropped_connection_is_retried_from_the_server_offset(standin, video, delays):
+    standin.fail_next("drop")
+    resource = upload_resumable(_client(), video, BODY)
+    assert standin.videos[resource["id"]] == video.read_bytes()
+    assert standin.initiated == 1
+    # After the drop the client asks what arrived before sending more.
+    assert standin.puts[1] == f"bytes */{SIZE}"
+    assert standin.puts[2].startswith(f"bytes {CHUNK_ALIGN // 2}-")
+    assert delays == [2.0]
+
+
+def test_server_errors_back_off_then_give_up(standin, video, delays, monkeypatch):
+    standin.fail_next(503, times=3)
+    resource = upload_resumable(_client(), video, BODY)
+    assert standin.videos[resource["id"]] == video.read_bytes()
+    assert delays == [2.0, 4.0, 8.0]
+
+    monkeypatch.setenv("GP_UPLOAD_MAX_RETRIES", "2")
+    standin.fail_next(500, times=3)
+    with pytest.raises(RuntimeError, match="after 2 retries: HTTP 500"):
+        upload_resumable(_client(), video, BODY)
+
+
+def test_client_errors_are_not_retried(standin, video, delays):
+    standin.fail_next(403)
+    with pytest.raises(RuntimeError, match="stand-in fault"):
+        upload_resumable(_client(), video, BODY)
+    assert delays == []
+
+
+def test_saved_session_is_resumed_without_a_new_insert(standin, video, delays, monkeypatch):
+    inserts = []
+    monkeypatch.setenv("GP_UPLOAD_MAX_RETRIES", "0")
+    # Two chunks go through, then the process "dies" on the third.
+    standin.fail_next(None, times=2)
+    standin.fail_next("drop")
+    with pytest.raises(RuntimeError, match="connection error"):
+        upload_resumable(_client(), video, BODY, on_initiate=lambda: inserts.append(1))
+    saved = json.loads(_state(video).read_text(encoding="utf-8"))
+    assert saved["offset"] == 2 * CHUNK_ALIGN
+
+    resource = upload_resumable(_client(), video, BODY, on_initiate=lambda: inserts.append(1))
+    assert standin.videos[resource["id"]] == video.read_bytes()
+    assert standin.initiated == 1
+    assert inserts == [1]
+    assert not _state(video).exists()
+
+
+def test_expired_session_starts_over(standin, video, delays, monkeypatch):
+    monkeypatch.setenv("GP_UPLOAD_MAX_RETRIES", "0")
+    standin.fail_next(None)
+    standin.fail_next("drop")
+    with pytest.raises(RuntimeError):
+        upload_resumable(_client(), video, BODY)
+    standin.expire_sessions()
+
+    inserts = []
+    resource = upload_resumable(_client(), video, BODY, on_initiate=lambda: inserts.append(1))
+    assert standin.videos[resource["id"]] == video.read_bytes()
+    # The saved session answers 404, so a new one is opened (and charged).
+    assert standin.initiated == 2
+    assert inserts == [1]
+
+
+def test_changed_metadata_does_not_reuse_the_session(standin, video, delays, monkeypatch):
+    monkeypatch.setenv("GP_UPLOAD_MAX_RETRIES", "0")
+    standin.fail_next("drop")
+    with pytest.raises(RuntimeError):
+        upload_resumable(_client(), video, BODY)
+    other = {**BODY, "snippet": {"title": "Another title"}}
+    resource = upload_resumable(_client(), video, other)
+    assert resource["snippet"] == other["snippet"]
+    assert standin.initiated == 2
+
+
+FFMPEG = os.getenv("FFMPEG_BIN", "ffmpeg")
+
+
+@pytest.mark.skipif(shutil.which(FFMPEG) is None, reason="needs ffmpeg")
+def test_scheduler_charges_quota_once_per_insert(standin, delays, tmp_path, monkeypatch):
+    video = tmp_path / "short.mp4"
+    subprocess.run(
+        [
+            FFMPEG, "-v", "error", "-y",
+            "-f", "lavfi", "-i", "testsrc2=s=108x192:r=30:d=1",
+            "-f", "lavfi", "-i", "sine=d=1",
+            "-c:v", "libx264", "-c:a", "aac", "-shortest", str(video),
+        ],
+        check=True,
+    )
+    script = tmp_path / "script.txt"
+    script.write_text("A stand-in upload. Nothing to see here.", encoding="utf-8")
+    monkeypatch.setenv("GP_UPLOAD_MAX_RETRIES", "0")
+    ledger = QuotaLedger(daily_limit=10000, path=tmp_path / "quota.json")
+
+    standin.fail_next("drop")
+    with UploadScheduler(workers=1, ledger=ledger, client=_client()) as uploads:
+        failed = uploads.submit("a", video, script, ["maps"]).result()
+        published = uploads.submit("a", video, script, ["maps"]).result()
+
+    assert (failed.status, failed.quota_units) == ("failed", 1600)
+    # The retry resumes the saved session: no second videos.insert.
+    assert (published.status, published.quota_units) == ("published", 0)
+    assert standin.initiated == 1
+    assert ledger.summary().startswith("1600/10000 units")
@@ -14,8 +14,8 @@ hash -r
 # Force fresh render output
 rm -f artifacts/video.mp4
 
-# Run pipeline
-python -m geopilot_publisher.pipeline.run --publish false
+# Run pipeline (draft profile by default: 360x640 @ 12 fps, fast encode)
+python -m geopilot_publisher.pipeline.run --publish false --profile "${GP_RENDER_PROFILE:-draft}"
 
 # Auto-play (macOS)
 open artifacts/video.mp4